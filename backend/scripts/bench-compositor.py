@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-frame compositing cost against the number of caption layers.
+
+Builds timelines shaped like generate_video() output (full-frame background,
+two corner logos, one caption per subtitle segment, a layover every few
+seconds) with a growing number of captions, and times frames from MoviePy's
+CompositeVideoClip and from IndexedCompositor (video_compositor). The
+background is a solid colour so only compositing is measured, not decoding.
+
+Every sampled frame from the two compositors is compared too. The run fails
+if they differ by more than --max-diff levels, or if the indexed cost per frame
+at the largest caption count is over --max-growth times the cost at the
+smallest.
+
+Usage: python3 scripts/bench-compositor.py [--captions 10 50 200 800] [--frames 48]
+           [--width 1920 --height 1080]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from video_captions import render_caption  # noqa: E402
+from video_moviepy_render import timeline_clip  # noqa: E402
+from video_timeline import Timeline, VisualLayer  # noqa: E402
+
+SEGMENT_SECONDS = 1.5
+
+
+def logo_png(path: str, color: tuple):
+    img = Image.new('RGBA', (400, 400), (0, 0, 0, 0))
+    ImageDraw.Draw(img).ellipse((20, 20, 380, 380), fill=color + (255,))
+    img.save(path)
+    return path
+
+
+def caption_png(directory: str, text: str, width: int, size: int, color: str) -> str:
+    name = hashlib.sha1(f"{text}|{width}|{size}|{color}".encode('utf-8')).hexdigest()
+    path = os.path.join(directory, f"{name}.png")
+    if not os.path.exists(path):
+        Image.fromarray(render_caption(text, 'DejaVuSans', size, color, 'black', 2, width), 'RGBA').save(path)
+    return path
+
+
+def build_timeline(captions: int, width: int, height: int, directory: str) -> Timeline:
+    """A layout like VideoGenerator.build_timeline() with `captions` subtitle segments"""
+    duration = captions * SEGMENT_SECONDS
+    client = logo_png(os.path.join(directory, 'client.png'), (30, 60, 200))
+    user = logo_png(os.path.join(directory, 'user.png'), (200, 30, 60))
+
+    layers = [
+        VisualLayer('#3c5a78', 0, duration, kind='color', full_frame=True, name='body'),
+        VisualLayer(client, 0, duration, kind='image', width=180, height=180, x=30, y=30, name='client_logo'),
+        VisualLayer(user, 0, duration, kind='image', width=180, height=180, x=width - 210, y=30, name='user_logo'),
+    ]
+    for i in range(captions):
+        layers.append(VisualLayer(
+            caption_png(directory, f"Subtitle segment number {i} with a few more words", width - 100, 30, 'yellow'),
+            i * SEGMENT_SECONDS, SEGMENT_SECONDS, kind='image', y=height - 150, name='subtitle'
+        ))
+        if i % 4 == 0:
+            layers.append(VisualLayer(
+                caption_png(directory, f"Layover {i}", width - 200, 100, 'white'),
+                i * SEGMENT_SECONDS, 2, kind='image', name='layover'
+            ))
+    return Timeline(width=width, height=height, fps=24, duration=duration, layers=tuple(layers))
+
+
+def time_frames(clip, times) -> float:
+    start = time.perf_counter()
+    for t in times:
+        clip.get_frame(t)
+    return (time.perf_counter() - start) / len(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-frame compositing cost vs caption count')
+    parser.add_argument('--captions', type=int, nargs='+', default=[10, 50, 200, 800])
+    parser.add_argument('--frames', type=int, default=48, help='frames sampled per timeline')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--max-diff', type=int, default=2)
+    parser.add_argument('--max-growth', type=float, default=1.5)
+    args = parser.parse_args()
+
+    rows = []
+    worst_diff = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for captions in args.captions:
+            timeline = build_timeline(captions, args.width, args.height, directory)
+            times = np.linspace(0, timeline.duration, args.frames, endpoint=False)
+
+            reference = timeline_clip(timeline, compositor='moviepy')
+            indexed = timeline_clip(timeline, compositor='indexed')
+            for t in times[::max(1, len(times) // 8)]:
+                diff = np.abs(reference.get_frame(t).astype(np.int16) - indexed.get_frame(t).astype(np.int16))
+                worst_diff = max(worst_diff, int(diff.max()))
+
+            rows.append((
+                captions,
+                len(timeline.layers),
+                time_frames(reference, times) * 1000,
+                time_frames(indexed, times) * 1000
+            ))
+
+    print(f"\n{'captions':>8} {'layers':>7} {'moviepy ms/frame':>17} {'indexed ms/frame':>17} {'speedup':>8}")
+    for captions, layers, reference_ms, indexed_ms in rows:
+        print(f"{captions:>8} {layers:>7} {reference_ms:>17.2f} {indexed_ms:>17.2f} {reference_ms / indexed_ms:>7.1f}x")
+    growth = rows[-1][3] / rows[0][3]
+    print(f"indexed cost at {rows[-1][0]} vs {rows[0][0]} captions: {growth:.2f}x; "
+          f"largest pixel difference: {worst_diff}")
+
+    failures = []
+    if worst_diff > args.max_diff:
+        failures.append(f"frames differ by up to {worst_diff} levels (> {args.max_diff})")
+    if growth > args.max_growth:
+        failures.append(f"indexed per-frame cost grew {growth:.2f}x (> {args.max_growth}x)")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Per-frame cost stays flat")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark the encoding profiles: encode time against output size and quality.
+
+Renders the same timeline (the template as a full-frame background with the
+BGM under it, --seconds long) with the ffmpeg backend once per profile in
+video_encoding.PROFILES, and scores each output with ffmpeg's ssim filter
+against a lossless (CRF 0) render of the same timeline.
+
+Usage: python3 scripts/bench-encoding-profiles.py --template t.mp4 --bgm bgm.mp3 \
+           [--seconds 20] [--width 1920 --height 1080 --fps 24] [--profiles standard email-fast]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from moviepy.config import get_setting  # noqa: E402
+
+from video_encoding import PROFILES, EncodingProfile  # noqa: E402
+from video_ffmpeg_render import render_timeline  # noqa: E402
+from video_timeline import Timeline, VisualLayer, AudioLayer  # noqa: E402
+
+LOSSLESS = EncodingProfile('lossless', preset='ultrafast', crf=0, faststart=False)
+
+
+def ssim(reference: str, candidate: str) -> float:
+    """Average SSIM (all planes) of `candidate` against `reference`"""
+    cmd = [
+        get_setting("FFMPEG_BINARY"), "-nostdin",
+        "-i", reference, "-i", candidate,
+        "-lavfi", "[0:v][1:v]ssim", "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    match = re.search(r"All:([\d.]+)", result.stderr)
+    if result.returncode != 0 or not match:
+        raise RuntimeError(f"ssim comparison failed: {result.stderr.strip()[-500:]}")
+    return float(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode time vs output size for each encoding profile')
+    parser.add_argument('--template', required=True)
+    parser.add_argument('--bgm', required=True)
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--fps', type=int, default=24)
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=list(PROFILES))
+    args = parser.parse_args()
+
+    timeline = Timeline(
+        width=args.width,
+        height=args.height,
+        fps=args.fps,
+        duration=args.seconds,
+        layers=(VisualLayer(args.template, 0, args.seconds, full_frame=True, loop=True, name='body'),),
+        audio=(AudioLayer(args.bgm, 0, args.seconds),)
+    )
+    ffmpeg_binary = get_setting("FFMPEG_BINARY")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        reference = os.path.join(directory, 'lossless.mp4')
+        render_timeline(timeline, reference, ffmpeg_binary, profile=LOSSLESS)
+
+        for name in args.profiles:
+            profile = PROFILES[name]
+            path = os.path.join(directory, f"{name}.mp4")
+            start = time.perf_counter()
+            render_timeline(timeline, path, ffmpeg_binary, profile=profile)
+            seconds = time.perf_counter() - start
+            size = os.path.getsize(path)
+            rows.append((profile, seconds, size, ssim(reference, path)))
+            print(f"{name}: {seconds:.1f}s", file=sys.stderr)
+
+    print(f"\n{args.seconds:g}s at {args.width}x{args.height} {args.fps} fps (ffmpeg backend, "
+          f"{os.cpu_count()} CPUs)\n")
+    print(f"| {'profile':<11} | {'preset':<9} | {'crf':>3} | {'tune':<10} | {'audio':>5} "
+          f"| {'encode s':>8} | {'x realtime':>10} | {'size MB':>7} | {'kbit/s':>6} | {'SSIM':>6} |")
+    print(f"|{'-' * 13}|{'-' * 11}|{'-' * 5}|{'-' * 12}|{'-' * 7}|{'-' * 10}|{'-' * 12}|{'-' * 9}|{'-' * 8}|{'-' * 8}|")
+    for profile, seconds, size, score in rows:
+        print(
+            f"| {profile.name:<11} | {profile.preset:<9} | {profile.crf:>3} | {profile.tune or '-':<10} "
+            f"| {profile.audio_bitrate:>5} | {seconds:>8.1f} | {args.seconds / seconds:>10.2f} "
+            f"| {size / 1024 / 1024:>7.2f} | {size * 8 / 1000 / args.seconds:>6.0f} | {score:>6.4f} |"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
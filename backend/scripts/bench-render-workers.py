@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch throughput against the number of render worker processes.
+
+Renders the same --jobs videos through render_parallel() once per worker count
+in --workers (default 1, 2, 4, ... up to the CPU count) and prints videos per
+minute, the speedup over the first count and the scaling efficiency (speedup
+divided by the worker ratio; 1.0 is linear). Every job has its own narration
+and the segment cache is off, so each video is rendered in full.
+
+Set TTS_PROVIDER=stub to run without an ElevenLabs key; VIDEO_WIDTH/VIDEO_HEIGHT
+shrink the renders for a quicker run.
+
+Usage: python3 scripts/bench-render-workers.py --template t.mp4 --bgm bgm.mp3 \
+           [--jobs 8] [--workers 1 2 4] [--backend ffmpeg]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from video_generator import VideoGeneratorConfig, render_parallel  # noqa: E402
+
+
+def default_worker_counts() -> list:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def make_jobs(count: int, template: str, bgm: str) -> list:
+    return [
+        {
+            "job_id": str(i),
+            "narration_text": f"Hello there, this is video number {i}. Here is a quick look at what we can build together.",
+            "output_filename": f"bench-workers-{i}.mp4",
+            "template_video": template,
+            "bgm": bgm,
+            "text_layovers": [{"text": f"Video {i}", "start_time": 4, "duration": 2}],
+            "upload_to_s3": False
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch throughput vs render worker count')
+    parser.add_argument('--template', required=True)
+    parser.add_argument('--bgm', required=True)
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts())
+    parser.add_argument('--backend', choices=['moviepy', 'ffmpeg'])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        config = VideoGeneratorConfig()
+        config.output_directory = directory
+        config.segment_cache_enabled = False
+        config.stream_upload = False
+        if args.backend:
+            config.render_backend = args.backend
+        jobs = make_jobs(args.jobs, args.template, args.bgm)
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            results = list(render_parallel(jobs, workers, config))
+            seconds = time.perf_counter() - start
+            failed = [r for r in results if not r["success"]]
+            if failed:
+                print(f"❌ {len(failed)} jobs failed with {workers} workers: {failed[0]['error']}")
+                return 1
+            rows.append((workers, seconds))
+            print(f"{workers} workers: {seconds:.1f}s", file=sys.stderr)
+
+    base_workers, base_seconds = rows[0]
+    print(f"\n{args.jobs} videos, {config.video_width}x{config.video_height}, {config.render_backend} backend, "
+          f"{os.cpu_count()} CPUs\n")
+    print(f"| {'workers':>7} | {'wall s':>7} | {'videos/min':>10} | {'speedup':>7} | {'efficiency':>10} |")
+    print(f"|{'-' * 9}|{'-' * 9}|{'-' * 12}|{'-' * 9}|{'-' * 12}|")
+    for workers, seconds in rows:
+        speedup = base_seconds / seconds
+        print(f"| {workers:>7} | {seconds:>7.1f} | {args.jobs * 60 / seconds:>10.1f} | {speedup:>6.2f}x "
+              f"| {speedup / (workers / base_workers):>10.2f} |")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Exercise S3Uploader against a local S3 stand-in and verify what lands in the bucket.
+
+Uploads a file (multipart above S3_MULTIPART_THRESHOLD_MB), uploads it again to
+check plain overwrite, and streams an ffmpeg encode from its stdout pipe. Each
+object is downloaded and its SHA-256 compared with what was sent.
+
+By default S3 is mocked in-process with moto (pip install 'moto[s3]'); pass
+--endpoint-url to use a running stand-in such as MinIO or `moto_server`.
+
+Usage: python3 scripts/check-s3-upload.py [--size-mb 40] [--endpoint-url http://127.0.0.1:5000]
+"""
+
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import boto3  # noqa: E402
+from moviepy.config import get_setting  # noqa: E402
+
+from video_s3_upload import S3Uploader, file_sha256  # noqa: E402
+
+BUCKET = 'video-upload-check'
+
+
+def object_sha256(s3_client, key: str) -> str:
+    digest = hashlib.sha256()
+    body = s3_client.get_object(Bucket=BUCKET, Key=key)['Body']
+    for chunk in iter(lambda: body.read(1024 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check(label: str, ok: bool, failures: list):
+    print(f"{'✅' if ok else '❌'} {label}")
+    if not ok:
+        failures.append(label)
+
+
+def run(args) -> int:
+    s3_client = boto3.client(
+        's3',
+        region_name='us-east-1',
+        endpoint_url=args.endpoint_url,
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID', 'testing'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    )
+    s3_client.create_bucket(Bucket=BUCKET)
+    uploader = S3Uploader.from_env(s3_client, BUCKET)
+    failures: list = []
+
+    with tempfile.NamedTemporaryFile(suffix='.mp4') as f:
+        f.write(os.urandom(args.size_mb * 1024 * 1024))
+        f.flush()
+
+        for attempt in ('upload', 'overwrite'):
+            start = time.perf_counter()
+            result = uploader.upload_file(f.name, 'check/file.mp4')
+            elapsed = time.perf_counter() - start
+            print(f"{attempt}: {result['bytes'] / 1e6:.1f} MB in {elapsed:.2f}s")
+            check(f"{attempt} content matches", object_sha256(s3_client, 'check/file.mp4') == file_sha256(f.name), failures)
+
+        head = s3_client.head_object(Bucket=BUCKET, Key='check/file.mp4')
+        check("sha256 stored as metadata", head['Metadata'].get('sha256') == result['sha256'], failures)
+        check("multipart upload", '-' in head['ETag'], failures)
+
+    # Fragmented MP4 can be written to a pipe: the encoder never seeks back
+    encoder = subprocess.Popen(
+        [
+            get_setting('FFMPEG_BINARY'), '-nostdin', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f"testsrc2=size=1280x720:rate=24:duration={args.stream_seconds}",
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+            '-movflags', 'frag_keyframe+empty_moov+delay_moov', '-f', 'mp4', 'pipe:1'
+        ],
+        stdout=subprocess.PIPE
+    )
+    start = time.perf_counter()
+    result = uploader.upload_stream(encoder.stdout, 'check/stream.mp4')
+    encoder.wait()
+    print(f"stream: {result['bytes'] / 1e6:.1f} MB in {time.perf_counter() - start:.2f}s")
+    check("encoder exited cleanly", encoder.returncode == 0, failures)
+    check("streamed content matches", object_sha256(s3_client, 'check/stream.mp4') == result['sha256'], failures)
+
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check S3 uploads against a local S3 stand-in')
+    parser.add_argument('--endpoint-url', help='S3-compatible endpoint (default: in-process moto)')
+    parser.add_argument('--size-mb', type=int, default=40)
+    parser.add_argument('--stream-seconds', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        return run(args)
+
+    try:
+        from moto import mock_aws
+    except ImportError:
+        print("moto is not installed: pip install 'moto[s3]', or pass --endpoint-url")
+        return 1
+    with mock_aws():
+        return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
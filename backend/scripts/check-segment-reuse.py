@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Check that an identical render reuses every cached segment.
+
+Builds a template, BGM and disclaimer with ffmpeg, then renders the same job
+twice per backend with template ingest on (offline stub narration, no upload).
+The second render must take every segment from the segment cache: an input
+whose fingerprint changes between renders (e.g. a cached file whose mtime moves
+on every hit) would make it encode them all again.
+
+Usage: python3 scripts/check-segment-reuse.py [--backends moviepy ffmpeg] [--width 640 --height 360]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from moviepy.config import get_setting  # noqa: E402
+
+NARRATION = "Hello there friend. Welcome aboard, we are excited to work together on what comes next."
+
+
+def make_fixtures(directory: str) -> dict:
+    """Template, disclaimer and BGM files generated by ffmpeg"""
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    fixtures = {
+        'template': ('-f', 'lavfi', '-i', 'testsrc2=s=1280x720:r=30:d=8', '-c:v', 'libx264', '-g', '240'),
+        'disclaimer': ('-f', 'lavfi', '-i', 'smptebars=s=1280x720:r=30:d=3', '-c:v', 'libx264'),
+        'bgm': ('-f', 'lavfi', '-i', 'sine=frequency=330:duration=20', '-c:a', 'libmp3lame'),
+    }
+    paths = {}
+    for name, args in fixtures.items():
+        path = os.path.join(directory, f"{name}.{'mp3' if name == 'bgm' else 'mp4'}")
+        subprocess.run([ffmpeg, '-nostdin', '-loglevel', 'error', '-y', *args, path], check=True)
+        paths[name] = path
+    return paths
+
+
+def render_twice(backend: str, fixtures: dict, directory: str) -> list:
+    """Segment cache (hits, misses) for two identical renders with `backend`"""
+    from video_generator import VideoGenerator
+
+    os.environ['RENDER_BACKEND'] = backend
+    counts = []
+    with VideoGenerator() as generator:
+        for run in range(2):
+            before = dict(generator.segment_cache.stats)
+            generator.generate_video(
+                narration_text=NARRATION,
+                output_filename=f"{backend}-{run}.mp4",
+                template_video=fixtures['template'],
+                bgm=fixtures['bgm'],
+                text_layovers=[{"text": "Segment reuse", "start_time": 5, "duration": 2}],
+                upload_to_s3=False
+            )
+            stats = generator.segment_cache.stats
+            counts.append((stats['hits'] - before['hits'], stats['misses'] - before['misses']))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Identical renders reuse every cached segment')
+    parser.add_argument('--backends', nargs='+', choices=['moviepy', 'ffmpeg'], default=['moviepy', 'ffmpeg'])
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=360)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = make_fixtures(directory)
+        os.environ.update(
+            TTS_PROVIDER='stub',
+            TEMPLATE_INGEST='true',
+            SEGMENT_CACHE_ENABLED='true',
+            STREAM_UPLOAD='false',
+            VIDEO_WIDTH=str(args.width),
+            VIDEO_HEIGHT=str(args.height),
+            DEFAULT_DISCLAIMER_VIDEO=fixtures['disclaimer'],
+            VIDEO_OUTPUT_DIR=os.path.join(directory, 'out'),
+            ASSET_CACHE_DIR=os.path.join(directory, 'assets'),
+            MEDIA_INDEX_DIR=os.path.join(directory, 'media-index'),
+            SEGMENT_CACHE_DIR=os.path.join(directory, 'segments'),
+            TTS_CACHE_DIR=os.path.join(directory, 'voiceover')
+        )
+
+        for backend in args.backends:
+            (_, first_misses), (hits, misses) = render_twice(backend, fixtures, directory)
+            ok = first_misses > 0 and misses == 0
+            print(f"{'✅' if ok else '❌'} {backend}: second render reused {hits}/{hits + misses} segments "
+                  f"(first encoded {first_misses})")
+            if not ok:
+                failures.append(backend)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
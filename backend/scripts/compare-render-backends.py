@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Render the same video with the MoviePy and ffmpeg backends and compare them.
+
+MoviePy is the reference: the ffmpeg filter-graph output is scored against it
+with ffmpeg's psnr filter, and both render times are reported. Set
+TTS_PROVIDER=stub to run without an ElevenLabs key.
+
+Usage: python3 scripts/compare-render-backends.py --template t.mp4 --bgm bgm.mp3 \
+           [--client-logo URL --user-logo URL] [--min-psnr 25]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from moviepy.config import get_setting  # noqa: E402
+
+from video_generator import VideoGenerator, VideoGeneratorConfig  # noqa: E402
+
+DEFAULT_NARRATION = (
+    "Hello there friend. Welcome to Critical River, we are excited to have you on board. "
+    "Let's achieve great things together!"
+)
+
+
+def psnr(reference: str, candidate: str) -> float:
+    """Average PSNR (dB) of `candidate` against `reference` over all frames"""
+    cmd = [
+        get_setting("FFMPEG_BINARY"), "-nostdin",
+        "-i", reference, "-i", candidate,
+        "-lavfi", "[0:v][1:v]psnr", "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    match = re.search(r"average:([\d.]+|inf)", result.stderr)
+    if result.returncode != 0 or not match:
+        raise RuntimeError(f"psnr comparison failed: {result.stderr.strip()[-500:]}")
+    return float(match.group(1))
+
+
+def render(backend: str, args) -> float:
+    config = VideoGeneratorConfig()
+    config.render_backend = backend
+    config.output_directory = args.out_dir
+    config.segment_cache_enabled = False
+
+    start = time.perf_counter()
+    with VideoGenerator(config) as generator:
+        generator.generate_video(
+            narration_text=args.narration,
+            output_filename=f"compare-{backend}.mp4",
+            template_video=args.template,
+            client_logo_url=args.client_logo,
+            user_logo_url=args.user_logo,
+            bgm=args.bgm,
+            text_layovers=[{"text": "Streamline Production", "start_time": args.layover_at, "duration": 2}],
+            upload_to_s3=False
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare MoviePy and ffmpeg render backends')
+    parser.add_argument('--narration', default=DEFAULT_NARRATION)
+    parser.add_argument('--template', required=True)
+    parser.add_argument('--bgm', required=True)
+    parser.add_argument('--client-logo')
+    parser.add_argument('--user-logo')
+    parser.add_argument('--layover-at', type=float, default=6.0)
+    parser.add_argument('--out-dir', default='tmp/render-compare')
+    parser.add_argument('--min-psnr', type=float, default=25.0)
+    args = parser.parse_args()
+
+    timings = {backend: render(backend, args) for backend in ('moviepy', 'ffmpeg')}
+    score = psnr(
+        os.path.join(args.out_dir, 'compare-moviepy.mp4'),
+        os.path.join(args.out_dir, 'compare-ffmpeg.mp4')
+    )
+
+    print(f"\n{'backend':>10} {'time (s)':>10}")
+    for backend, seconds in timings.items():
+        print(f"{backend:>10} {seconds:>10.2f}")
+    print(f"speedup: {timings['moviepy'] / timings['ffmpeg']:.1f}x, PSNR vs moviepy: {score:.2f} dB")
+
+    if score < args.min_psnr:
+        print(f"❌ ffmpeg output differs from the reference (PSNR < {args.min_psnr} dB)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
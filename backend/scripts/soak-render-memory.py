@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Soak test: render many videos in one process and check that memory stays flat.
+
+A long-lived worker renders job after job with one VideoGenerator, so a clip,
+reader or buffer leaked per job adds up until the process is OOM-killed. This
+renders --count videos the same way (default 200), samples RSS and open file
+descriptors after each one, and fails if either keeps growing after the warmup
+jobs (caches, fonts and codecs loading) or if any ffmpeg reader outlives its job.
+Every job has a new layover caption, so the allowed growth includes the
+caption cache's CAPTION_CACHE_MB budget.
+
+Set TTS_PROVIDER=stub to run without an ElevenLabs key; VIDEO_WIDTH/VIDEO_HEIGHT
+shrink the renders for a quicker run.
+
+Usage: python3 scripts/soak-render-memory.py --template t.mp4 --bgm bgm.mp3 \
+           [--count 200] [--warmup 5] [--max-growth-mb 50] [--backend moviepy]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from video_captions import CAPTION_CACHE_BYTES  # noqa: E402
+from video_generator import VideoGenerator, VideoGeneratorConfig  # noqa: E402
+from video_resources import MB, process_rss  # noqa: E402
+
+NARRATIONS = [
+    "Hello there friend. Welcome to Critical River, we are excited to have you on board.",
+    "Thanks for your time today. Here is a quick look at what we can build together.",
+    "Great speaking with you. Let's achieve great things together!",
+]
+
+
+def child_processes() -> list:
+    """Command names of this process's live children (Linux only; empty elsewhere)"""
+    pid = os.getpid()
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(f.read().split())
+    except OSError:
+        return []
+    names = []
+    for child in children:
+        try:
+            with open(f"/proc/{child}/comm") as f:
+                names.append(f"{f.read().strip()}[{child}]")
+        except OSError:
+            pass
+    return names
+
+
+def open_fds() -> int:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render many videos in one process and check memory stays flat')
+    parser.add_argument('--template', required=True)
+    parser.add_argument('--bgm', required=True)
+    parser.add_argument('--client-logo')
+    parser.add_argument('--user-logo')
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--max-growth-mb', type=float, default=50.0,
+                        help='allowed RSS growth after warmup, on top of CAPTION_CACHE_MB')
+    parser.add_argument('--max-fd-growth', type=int, default=8)
+    parser.add_argument('--backend', choices=('moviepy', 'ffmpeg'))
+    parser.add_argument('--out-dir', default='tmp/render-soak')
+    args = parser.parse_args()
+
+    config = VideoGeneratorConfig()
+    config.output_directory = args.out_dir
+    # Every job renders in full instead of reusing cached segments
+    config.segment_cache_enabled = False
+    if args.backend:
+        config.render_backend = args.backend
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    samples = []
+    leaked_children = []
+    start = time.perf_counter()
+    with VideoGenerator(config) as generator:
+        for i in range(args.count):
+            generator.generate_video(
+                narration_text=NARRATIONS[i % len(NARRATIONS)],
+                output_filename="soak.mp4",
+                template_video=args.template,
+                client_logo_url=args.client_logo,
+                user_logo_url=args.user_logo,
+                bgm=args.bgm,
+                text_layovers=[{"text": f"Job {i}", "start_time": 2, "duration": 2}],
+                upload_to_s3=False
+            )
+            generator.cleanup()
+            gc.collect()
+
+            children = child_processes()
+            if children:
+                leaked_children.append((i, children))
+            samples.append((process_rss(), open_fds()))
+            print(f"job {i + 1}/{args.count}: rss {samples[-1][0] / MB:.0f} MB, fds {samples[-1][1]}, "
+                  f"{time.perf_counter() - start:.0f}s", flush=True)
+
+    warmup = min(args.warmup, len(samples) - 1)
+    base_rss, base_fds = samples[warmup]
+    # Compare the end of the run against the first post-warmup sample; the mean of the
+    # last few samples keeps one noisy allocation peak from failing the run
+    tail = samples[-max(1, (len(samples) - warmup) // 10):]
+    rss_growth = sum(rss for rss, _ in tail) / len(tail) - base_rss
+    max_growth = args.max_growth_mb * MB + CAPTION_CACHE_BYTES
+    fd_growth = max(fds for _, fds in tail) - base_fds
+
+    print(f"\n{args.count} renders in {time.perf_counter() - start:.0f}s")
+    print(f"RSS after warmup {base_rss / MB:.0f} MB, at the end {samples[-1][0] / MB:.0f} MB "
+          f"(growth {rss_growth / MB:+.1f} MB, peak {max(rss for rss, _ in samples) / MB:.0f} MB)")
+    print(f"open fds after warmup {base_fds}, at the end {samples[-1][1]} (growth {fd_growth:+d})")
+
+    failures = []
+    if rss_growth > max_growth:
+        failures.append(f"RSS grew {rss_growth / MB:.1f} MB (> {max_growth / MB:.0f} MB)")
+    if fd_growth > args.max_fd_growth:
+        failures.append(f"open file descriptors grew by {fd_growth} (> {args.max_fd_growth})")
+    if leaked_children:
+        job, children = leaked_children[0]
+        failures.append(f"child processes outlived {len(leaked_children)} jobs (first: job {job + 1}: {children})")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Memory stayed flat")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
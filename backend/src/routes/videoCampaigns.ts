@@ -1387,6 +1387,7 @@ router.get('/:id/status', async (req, res, next) => {
       progress: latestJob?.progress || 0,
       currentStep: latestJob?.currentStep,
       videoUrl: campaign.videoUrl,
+      previewVideoUrl: campaign.previewVideoUrl,
       error: campaign.generationError || latestJob?.errorMessage,
     });
   } catch (error) {
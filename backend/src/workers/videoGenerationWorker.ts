@@ -1,5 +1,5 @@
 import { PrismaClient } from '@prisma/client';
-import { spawn } from 'child_process';
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
 import path from 'path';
 import { logger } from '../utils/logger';
 
@@ -10,12 +10,44 @@ interface GenerationResult {
   video_url?: string;
   error?: string;
   message?: string;
+  job_id?: string;
+  preview?: boolean; // interim low-resolution render; the full result follows
+}
+
+interface GenerationJobPayload {
+  job_id: string;
+  script: string;
+  output: string;
+  campaign_id: string;
+  template?: string;
+  client_logo?: string;
+  user_logo?: string;
+  voice_id?: string;
+  custom_voice_url?: string;
+  preview_first?: boolean;
+}
+
+interface PendingGeneration {
+  jobId: string;
+  daemon: ChildProcessWithoutNullStreams;
+  timer: NodeJS.Timeout;
+  resolve: (result: GenerationResult) => void;
+  reject: (error: Error) => void;
+  onPreview?: (result: GenerationResult) => void;
 }
 
 class VideoGenerationWorker {
   private isRunning = false;
   private pollInterval = 5000; // Poll every 5 seconds
 
+  // Long-lived `video_generator_lite.py --serve` process, so imports and
+  // clients stay warm between jobs instead of paying startup per campaign
+  private pythonDaemon: ChildProcessWithoutNullStreams | null = null;
+  private daemonStdout = '';
+  private pendingGeneration: PendingGeneration | null = null;
+  // A job still running after this long is failed and the daemon restarted
+  private jobTimeout = parseInt(process.env.VIDEO_JOB_TIMEOUT_MS || '1800000', 10);
+
   async start() {
     logger.info('Video Generation Worker started');
     this.isRunning = true;
@@ -25,6 +57,11 @@ class VideoGenerationWorker {
   async stop() {
     logger.info('Video Generation Worker stopping...');
     this.isRunning = false;
+
+    if (this.pythonDaemon) {
+      this.pythonDaemon.kill('SIGTERM');
+      this.pythonDaemon = null;
+    }
   }
 
   private async poll() {
@@ -64,6 +101,10 @@ class VideoGenerationWorker {
   private async processJob(job: any) {
     logger.info(`Processing job ${job.id} for campaign ${job.campaignId}`);
 
+    // Preview writes are chained here and awaited before the job's final
+    // update, so a late preview write never lands after it
+    let previewUpdate: Promise<void> = Promise.resolve();
+
     try {
       // Mark as processing
       await prisma.videoGenerationJob.update({
@@ -77,41 +118,45 @@ class VideoGenerationWorker {
       });
 
       const campaign = job.campaign;
-      const pythonScript = path.join(__dirname, '../../video_generator_lite.py');
       const outputFilename = `video_${campaign.id}_${Date.now()}.mp4`;
 
-      // Build arguments
-      const args = [
-        pythonScript,
-        '--script', campaign.narrationScript,
-        '--output', outputFilename,
-        '--campaign-id', campaign.id,
-      ];
+      // Build job payload
+      const payload: GenerationJobPayload = {
+        job_id: job.id,
+        script: campaign.narrationScript,
+        output: outputFilename,
+        campaign_id: campaign.id,
+      };
 
       if (campaign.templateId && campaign.template?.videoUrl) {
-        args.push('--template', campaign.template.videoUrl);
+        payload.template = campaign.template.videoUrl;
       } else if (campaign.customVideoUrl) {
-        args.push('--template', campaign.customVideoUrl);
+        payload.template = campaign.customVideoUrl;
       }
 
       if (campaign.clientLogoUrl && !campaign.clientLogoUrl.startsWith('blob:')) {
-        args.push('--client-logo', campaign.clientLogoUrl);
+        payload.client_logo = campaign.clientLogoUrl;
       }
 
       if (campaign.userLogoUrl && campaign.userLogoUrl !== 'w' && !campaign.userLogoUrl.startsWith('blob:')) {
-        args.push('--user-logo', campaign.userLogoUrl);
+        payload.user_logo = campaign.userLogoUrl;
       }
 
       // Voice settings
       if (campaign.voiceId) {
-        args.push('--voice-id', campaign.voiceId);
+        payload.voice_id = campaign.voiceId;
       }
 
       if (campaign.customVoiceUrl) {
-        args.push('--custom-voice-url', campaign.customVoiceUrl);
+        payload.custom_voice_url = campaign.customVoiceUrl;
       }
 
-      logger.info(`Spawning Python process: python3 ${args.join(' ')}`);
+      // Publish a fast low-resolution preview before the full-quality render
+      if (process.env.VIDEO_PREVIEW_FIRST === 'true') {
+        payload.preview_first = true;
+      }
+
+      logger.info(`Submitting job ${job.id} to Python video generator`);
 
       // Update progress
       await prisma.videoGenerationJob.update({
@@ -123,7 +168,10 @@ class VideoGenerationWorker {
       });
 
       // Execute Python script
-      const result = await this.executePythonScript(args, job.id);
+      const result = await this.executePythonScript(payload, job.id, (preview) => {
+        previewUpdate = previewUpdate.then(() => this.recordPreview(job.id, campaign.id, preview));
+      });
+      await previewUpdate;
 
       if (result.success && result.video_url) {
         // Success!
@@ -152,6 +200,7 @@ class VideoGenerationWorker {
       }
     } catch (error: any) {
       logger.error(`Job ${job.id} failed:`, error);
+      await previewUpdate;
 
       await prisma.videoGenerationJob.update({
         where: { id: job.id },
@@ -173,41 +222,148 @@ class VideoGenerationWorker {
     }
   }
 
-  private executePythonScript(args: string[], jobId: string): Promise<GenerationResult> {
-    return new Promise((resolve, reject) => {
-      const python = spawn('python3', args);
-      let stdout = '';
-      let stderr = '';
+  // The preview goes in its own field: videoUrl only ever holds the finished
+  // video, so a failed full render never leaves the campaign pointing at a preview
+  private async recordPreview(jobId: string, campaignId: string, preview: GenerationResult) {
+    try {
+      await prisma.videoCampaign.update({
+        where: { id: campaignId },
+        data: { previewVideoUrl: preview.video_url },
+      });
+      await prisma.videoGenerationJob.update({
+        where: { id: jobId },
+        data: { progress: 70, currentStep: 'Preview ready, rendering full quality' },
+      });
+    } catch (error) {
+      logger.error(`Failed to record preview for job ${jobId}:`, error);
+    }
+  }
 
-      python.stdout.on('data', (data) => {
-        stdout += data.toString();
-        logger.info(`Python output: ${data}`);
+  private getPythonDaemon(): ChildProcessWithoutNullStreams {
+    if (this.pythonDaemon) {
+      return this.pythonDaemon;
+    }
 
-        // Update progress based on log messages
-        this.updateProgressFromLogs(data.toString(), jobId);
-      });
+    const pythonScript = path.join(__dirname, '../../video_generator_lite.py');
+    logger.info(`Spawning Python process: python3 ${pythonScript} --serve`);
 
-      python.stderr.on('data', (data) => {
-        stderr += data.toString();
-        logger.error(`Python error: ${data}`);
-      });
+    const python = spawn('python3', [pythonScript, '--serve']);
+    this.daemonStdout = '';
 
-      python.on('close', (code) => {
-        if (code === 0) {
-          try {
-            const result: GenerationResult = JSON.parse(stdout);
-            resolve(result);
-          } catch (e) {
-            reject(new Error(`Invalid JSON output: ${stdout}`));
-          }
-        } else {
-          reject(new Error(`Python script exited with code ${code}: ${stderr}`));
+    python.stdout.on('data', (data) => {
+      // Output from a daemon that was dropped (e.g. after a timeout) belongs to no job
+      if (this.pythonDaemon !== python) {
+        return;
+      }
+      this.daemonStdout += data.toString();
+
+      // One JSON result per line
+      let newline = this.daemonStdout.indexOf('\n');
+      while (newline !== -1) {
+        const line = this.daemonStdout.slice(0, newline).trim();
+        this.daemonStdout = this.daemonStdout.slice(newline + 1);
+        if (line) {
+          this.handleDaemonLine(line);
         }
-      });
+        newline = this.daemonStdout.indexOf('\n');
+      }
+    });
 
-      python.on('error', (error) => {
-        reject(error);
-      });
+    python.stderr.on('data', (data) => {
+      logger.info(`Python output: ${data}`);
+
+      // Update progress based on log messages
+      if (this.pendingGeneration) {
+        this.updateProgressFromLogs(data.toString(), this.pendingGeneration.jobId);
+      }
+    });
+
+    python.on('close', (code) => {
+      logger.error(`Python video generator exited with code ${code}`);
+      this.dropDaemon(python, new Error(`Python video generator exited with code ${code}`));
+    });
+
+    python.on('error', (error) => {
+      this.dropDaemon(python, error);
+    });
+
+    // Writing a job just after the process died fails with EPIPE here; without
+    // a listener that would crash the worker instead of failing the one job
+    python.stdin.on('error', (error) => {
+      logger.error('Python video generator stdin error:', error);
+      this.dropDaemon(python, error);
+      python.kill('SIGKILL');
+    });
+
+    this.pythonDaemon = python;
+    return python;
+  }
+
+  // Forget a daemon that died or misbehaved (the next job spawns a new one) and
+  // fail the job it was running; a newer daemon's job is left alone
+  private dropDaemon(python: ChildProcessWithoutNullStreams, error: Error) {
+    if (this.pythonDaemon === python) {
+      this.pythonDaemon = null;
+    }
+    if (this.pendingGeneration?.daemon === python) {
+      this.takePendingGeneration()?.reject(error);
+    }
+  }
+
+  private takePendingGeneration(): PendingGeneration | null {
+    const pending = this.pendingGeneration;
+    if (pending) {
+      clearTimeout(pending.timer);
+      this.pendingGeneration = null;
+    }
+    return pending;
+  }
+
+  private handleDaemonLine(line: string) {
+    const pending = this.pendingGeneration;
+    if (!pending) {
+      logger.error(`Unexpected Python output: ${line}`);
+      return;
+    }
+
+    let result: GenerationResult;
+    try {
+      result = JSON.parse(line);
+    } catch (e) {
+      this.takePendingGeneration()?.reject(new Error(`Invalid JSON output: ${line}`));
+      return;
+    }
+
+    // A preview line is interim: the same job still owes its final result
+    if (result.preview) {
+      pending.onPreview?.(result);
+      return;
+    }
+
+    this.takePendingGeneration()?.resolve(result);
+  }
+
+  private executePythonScript(
+    payload: GenerationJobPayload,
+    jobId: string,
+    onPreview?: (result: GenerationResult) => void
+  ): Promise<GenerationResult> {
+    return new Promise((resolve, reject) => {
+      // The daemon runs one job at a time and answers in order
+      if (this.pendingGeneration) {
+        reject(new Error(`Python video generator is busy with job ${this.pendingGeneration.jobId}`));
+        return;
+      }
+
+      const python = this.getPythonDaemon();
+      const timer = setTimeout(() => {
+        logger.error(`Job ${jobId} timed out after ${this.jobTimeout}ms, restarting Python video generator`);
+        this.dropDaemon(python, new Error(`Video generation timed out after ${this.jobTimeout}ms`));
+        python.kill('SIGKILL');
+      }, this.jobTimeout);
+
+      this.pendingGeneration = { jobId, daemon: python, timer, resolve, reject, onPreview };
+      python.stdin.write(`${JSON.stringify(payload)}\n`);
     });
   }
 
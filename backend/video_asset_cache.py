@@ -0,0 +1,534 @@
+"""
+Shared on-disk caches for video assets.
+
+AssetCache holds remote downloads (templates, BGM, disclaimer, logos) under a
+name derived from the URL and its ETag/Last-Modified validators, so a changed
+asset gets a new entry while unchanged ones are served from disk; downloads
+go through the pooled, retrying client in video_http. VoiceoverCache holds
+synthesized narration keyed by text, voice, model and format, so retries and
+resends skip paid TTS calls. SegmentCache holds encoded video segments keyed by
+a fingerprint of what renders into them. MediaIndex holds probed metadata
+(duration, size, fps, codec, keyframes) per asset version, plus files derived
+from it: render-ready mezzanine copies of templates and BGM (see normalized()
+and decoded_audio()) and stream-copied loops of templates shorter than the
+video they fill.
+
+Writes go to a temp file in the cache directory followed by an atomic rename,
+which keeps concurrent worker processes from ever seeing partial files. Each
+directory is kept under a size budget by evicting least recently used files.
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+import requests
+
+from video_http import HttpClient, shared_client
+from video_media_info import MediaInfo, probe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'video-asset-cache')
+DEFAULT_VOICEOVER_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'video-voiceover-cache')
+DEFAULT_SEGMENT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'video-segment-cache')
+DEFAULT_MEDIA_INDEX_DIR = os.path.join(tempfile.gettempdir(), 'video-media-index')
+
+# Bytes read from each end of a file to identify its version
+VERSION_SAMPLE_BYTES = 64 * 1024
+
+# Bumped when the mezzanine encoding changes, so old ingests are not reused
+MEZZANINE_FORMAT = 'm1'
+
+
+class DiskCache:
+    """Directory of files with atomic writes and size-bounded LRU eviction"""
+
+    def __init__(self, cache_dir: str, max_bytes: int, ttl_seconds: int, grace_seconds: int = 0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # Files used more recently than this are never evicted, even over max_bytes
+        self.grace_seconds = grace_seconds
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _write_atomic(self, final_path: str, write_fn) -> None:
+        """Write via a temp file in the cache directory, then rename into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write_fn(f)
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _touch(self, path: str) -> None:
+        """
+        Mark `path` as just used for LRU eviction. Only the access time moves:
+        the mtime stays that of the write, since renderers fingerprint local
+        inputs by it.
+        """
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def touch(self, path: str) -> None:
+        """Mark `path` as in use if it is one of this cache's files (anything else is ignored)"""
+        if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.cache_dir):
+            self._touch(path)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Delete least recently used files until the cache fits in max_bytes,
+        sparing those used within grace_seconds (they may still be open)
+        """
+        cutoff = time.time() - self.grace_seconds
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json') or name.startswith('.tmp-'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for used, size, path in entries:
+            if total <= self.max_bytes or used > cutoff:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._remove_sidecar(path)
+            total -= size
+            self.stats['evictions'] += 1
+            logger.info(f"Evicted {path} from {self.cache_dir}")
+
+    def _remove_sidecar(self, path: str) -> None:
+        """Drop the <name>.json metadata stored next to a cached file, if any"""
+        try:
+            os.remove(f"{os.path.splitext(path)[0]}.json")
+        except OSError:
+            pass
+
+
+class AssetCache(DiskCache):
+    """Size-bounded LRU cache of downloaded assets keyed by URL + validators"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 2048 * 1024 * 1024,
+        ttl_seconds: int = 300,
+        timeout: Optional[float] = None,
+        http: Optional[HttpClient] = None
+    ):
+        super().__init__(cache_dir or DEFAULT_CACHE_DIR, max_bytes, ttl_seconds)
+        # Pooled, retrying client shared with every other cache in the process
+        self.http = http or shared_client()
+        self.timeout = timeout or self.http.timeout
+        self.stats.update({'revalidations': 0, 'bytes_downloaded': 0})
+
+    @classmethod
+    def from_env(cls) -> 'AssetCache':
+        """Build a cache from ASSET_CACHE_DIR / ASSET_CACHE_MAX_MB / ASSET_CACHE_TTL"""
+        return cls(
+            cache_dir=os.getenv('ASSET_CACHE_DIR') or None,
+            max_bytes=int(os.getenv('ASSET_CACHE_MAX_MB', '2048')) * 1024 * 1024,
+            ttl_seconds=int(os.getenv('ASSET_CACHE_TTL', '300'))
+        )
+
+    def _meta_path(self, url: str) -> str:
+        return self._meta_file(self._hash(url))
+
+    def _meta_file(self, url_key: str) -> str:
+        """Metadata for the URL hashed to `url_key`, stored next to its files"""
+        return os.path.join(self.cache_dir, f"{url_key}.json")
+
+    def _remove_sidecar(self, path: str) -> None:
+        """
+        Drop the URL's metadata when `path` is the version it points at. Files
+        are named <url hash>-<version hash>, so the metadata is found the same
+        way it was written; an evicted older version leaves it alone.
+        """
+        url_key = os.path.basename(path).split('-', 1)[0]
+        meta_path = self._meta_file(url_key)
+        try:
+            with open(meta_path, 'r') as f:
+                current = json.load(f).get('path')
+        except (OSError, ValueError):
+            return
+        if current == path:
+            try:
+                os.remove(meta_path)
+            except OSError:
+                pass
+
+    def _read_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(url), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(meta.get('path', '')):
+            return None
+        return meta
+
+    def _save_meta(self, url: str, meta: Dict[str, Any]) -> None:
+        payload = json.dumps(meta).encode('utf-8')
+        self._write_atomic(self._meta_path(url), lambda f: f.write(payload))
+
+    def fetch(self, url: str, suffix: str = '', headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        Return a local path for `url`, downloading only if the cached copy is
+        missing or the server reports that it changed.
+
+        The returned file belongs to the cache; callers must not delete or modify it.
+        """
+        meta = self._read_meta(url)
+
+        # Fresh enough to skip the round-trip entirely
+        if meta and time.time() - meta.get('checked_at', 0) < self.ttl_seconds:
+            self.stats['hits'] += 1
+            self._touch(meta['path'])
+            return meta['path']
+
+        request_headers = dict(headers or {})
+        if meta:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = self.http.get(url, headers=request_headers, stream=True, timeout=self.timeout)
+
+            if meta and response.status_code == 304:
+                response.close()
+                self.stats['hits'] += 1
+                self.stats['revalidations'] += 1
+                meta['checked_at'] = time.time()
+                self._save_meta(url, meta)
+                self._touch(meta['path'])
+                return meta['path']
+
+            response.raise_for_status()
+        except requests.RequestException:
+            if meta:
+                logger.warning(f"Revalidation failed for {url}, serving cached copy")
+                self.stats['hits'] += 1
+                self._touch(meta['path'])
+                return meta['path']
+            raise
+
+        self.stats['misses'] += 1
+        etag = response.headers.get('ETag', '')
+        last_modified = response.headers.get('Last-Modified', '')
+        ext = f".{suffix.lstrip('.')}" if suffix else ''
+        path = os.path.join(
+            self.cache_dir, f"{self._hash(url)}-{self._hash(url, etag, last_modified)[:32]}{ext}"
+        )
+
+        def write_body(f):
+            # Resumes with Range requests if the connection drops mid-body
+            self.stats['bytes_downloaded'] += self.http.stream_to(response, f, url, headers)
+
+        self._write_atomic(path, write_body)
+        logger.info(f"Cached {url} -> {path}")
+
+        # A replaced version may still be open in another worker's render, so it
+        # is left for LRU eviction rather than deleted here
+        self._save_meta(url, {
+            'url': url,
+            'path': path,
+            'etag': etag,
+            'last_modified': last_modified,
+            'checked_at': time.time()
+        })
+        self.evict(keep=path)
+        return path
+
+
+class VoiceoverCache(DiskCache):
+    """Synthesized narration keyed by (text, voice, model, format), with TTL and LRU eviction"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: int = 30 * 24 * 3600
+    ):
+        super().__init__(cache_dir or DEFAULT_VOICEOVER_CACHE_DIR, max_bytes, ttl_seconds)
+        self.stats.update({'expired': 0, 'bytes_saved': 0})
+
+    @classmethod
+    def from_env(cls) -> 'VoiceoverCache':
+        """Build a cache from TTS_CACHE_DIR / TTS_CACHE_MAX_MB / TTS_CACHE_TTL_DAYS"""
+        return cls(
+            cache_dir=os.getenv('TTS_CACHE_DIR') or None,
+            max_bytes=int(os.getenv('TTS_CACHE_MAX_MB', '512')) * 1024 * 1024,
+            ttl_seconds=int(float(os.getenv('TTS_CACHE_TTL_DAYS', '30')) * 24 * 3600)
+        )
+
+    @classmethod
+    def key(cls, text: str, voice: str, model: str, audio_format: str) -> str:
+        return cls._hash(text, voice, model, audio_format)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        return os.path.join(self.cache_dir, f"{key}.audio"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+        """Return (audio path, word timings or None) for a cached voiceover, or None on a miss"""
+        audio_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            size = os.path.getsize(audio_path)
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+
+        if time.time() - meta.get('created_at', 0) > self.ttl_seconds:
+            for path in (audio_path, meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        self._touch(audio_path)
+        self.stats['hits'] += 1
+        self.stats['bytes_saved'] += size
+        return audio_path, meta.get('word_timings')
+
+    def put(self, key: str, audio: bytes, word_timings: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Store synthesized audio (and its word timings) and return the cached audio path"""
+        audio_path, meta_path = self._paths(key)
+        self._write_atomic(audio_path, lambda f: f.write(audio))
+        payload = json.dumps({'created_at': time.time(), 'word_timings': word_timings}).encode('utf-8')
+        self._write_atomic(meta_path, lambda f: f.write(payload))
+        self.evict(keep=audio_path)
+        return audio_path
+
+
+class SegmentCache(DiskCache):
+    """Encoded video segments keyed by a fingerprint of their inputs, with LRU eviction"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 4096 * 1024 * 1024):
+        super().__init__(cache_dir or DEFAULT_SEGMENT_CACHE_DIR, max_bytes, ttl_seconds=0)
+
+    @classmethod
+    def from_env(cls) -> 'SegmentCache':
+        """Build a cache from SEGMENT_CACHE_DIR / SEGMENT_CACHE_MAX_MB"""
+        return cls(
+            cache_dir=os.getenv('SEGMENT_CACHE_DIR') or None,
+            max_bytes=int(os.getenv('SEGMENT_CACHE_MAX_MB', '4096')) * 1024 * 1024
+        )
+
+    def get(self, key: str, suffix: str = '.mp4') -> Optional[str]:
+        """Return the cached segment for `key`, or None on a miss"""
+        path = os.path.join(self.cache_dir, f"{key}{suffix}")
+        if not os.path.exists(path):
+            self.stats['misses'] += 1
+            return None
+        self._touch(path)
+        self.stats['hits'] += 1
+        return path
+
+    def put(self, key: str, render: Callable[[str], None], suffix: str = '.mp4') -> str:
+        """Render a segment with `render(path)` into the cache and return its final path"""
+        path = os.path.join(self.cache_dir, f"{key}{suffix}")
+        # Encoders write to a path, so use a named temp file rather than _write_atomic
+        tmp_path = os.path.join(self.cache_dir, f".tmp-{key}.{os.getpid()}{suffix}")
+        try:
+            render(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+class MediaIndex(DiskCache):
+    """
+    Probed MediaInfo per asset version, persisted as <version>.json, and
+    files derived from each version: mezzanine videos, decoded audio and
+    stream-copied loops of short videos (LRU-evicted like the other caches,
+    except that files used in the last grace_seconds are kept: other renders
+    and pool workers hold their paths).
+
+    A version is the file's size plus a hash of its first and last 64 KB, so
+    the same template is probed once whatever path it is reached by, and a
+    replaced file is probed again even if it keeps its name.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ffmpeg_binary: str = 'ffmpeg',
+        grace_seconds: int = 3600
+    ):
+        super().__init__(cache_dir or DEFAULT_MEDIA_INDEX_DIR, max_bytes, ttl_seconds=0, grace_seconds=grace_seconds)
+        self.ffmpeg_binary = ffmpeg_binary
+        self.stats.update({'probes': 0, 'loops': 0, 'ingests': 0})
+        self._infos: Dict[str, MediaInfo] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, ffmpeg_binary: str = 'ffmpeg') -> 'MediaIndex':
+        """Build an index from MEDIA_INDEX_DIR / MEDIA_INDEX_MAX_MB / MEDIA_INDEX_GRACE_SECONDS"""
+        return cls(
+            cache_dir=os.getenv('MEDIA_INDEX_DIR') or None,
+            max_bytes=int(os.getenv('MEDIA_INDEX_MAX_MB', '1024')) * 1024 * 1024,
+            ffmpeg_binary=ffmpeg_binary,
+            grace_seconds=int(os.getenv('MEDIA_INDEX_GRACE_SECONDS', '3600'))
+        )
+
+    @staticmethod
+    def version(path: str) -> str:
+        size = os.path.getsize(path)
+        digest = hashlib.sha256(str(size).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read(VERSION_SAMPLE_BYTES))
+            if size > VERSION_SAMPLE_BYTES:
+                f.seek(max(VERSION_SAMPLE_BYTES, size - VERSION_SAMPLE_BYTES))
+                digest.update(f.read(VERSION_SAMPLE_BYTES))
+        return digest.hexdigest()
+
+    def info(self, path: str) -> MediaInfo:
+        """Metadata for the video at `path`, probing only the first time this version is seen"""
+        version = self.version(path)
+        with self._lock:
+            cached = self._infos.get(version)
+        if cached:
+            self.stats['hits'] += 1
+            return cached
+
+        meta_path = os.path.join(self.cache_dir, f"{version}.json")
+        try:
+            with open(meta_path, 'r') as f:
+                info = MediaInfo.from_dict(json.load(f))
+            self.stats['hits'] += 1
+        except (OSError, ValueError, TypeError):
+            self.stats['misses'] += 1
+            self.stats['probes'] += 1
+            info = probe(path, self.ffmpeg_binary)
+            payload = json.dumps(info.to_dict()).encode('utf-8')
+            self._write_atomic(meta_path, lambda f: f.write(payload))
+            logger.info(
+                f"Probed {path}: {info.width}x{info.height} {info.fps:g} fps, "
+                f"{info.duration:.2f}s, {info.codec}, {len(info.keyframes)} keyframes"
+            )
+
+        with self._lock:
+            self._infos[version] = info
+        return info
+
+    def _derive(self, path: str, name: str, args: List[str], action: str, stat: str) -> str:
+        """
+        The cached file `name` made from `path` by `ffmpeg <args>`, created
+        (and counted in stats[stat]) on first use. Returns its path.
+        """
+        derived_path = os.path.join(self.cache_dir, name)
+        if os.path.exists(derived_path):
+            self.stats['hits'] += 1
+            self._touch(derived_path)
+            return derived_path
+
+        ext = os.path.splitext(name)[1]
+        tmp_path = os.path.join(self.cache_dir, f".tmp-{os.getpid()}-{threading.get_ident()}{ext}")
+        cmd = [self.ffmpeg_binary, '-nostdin', '-loglevel', 'error', '-y'] + args + [tmp_path]
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"{action} {path} failed: {result.stderr.strip()[-500:]}")
+            os.replace(tmp_path, derived_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.stats[stat] += 1
+        logger.info(f"{action} {path} -> {derived_path} in {time.perf_counter() - start:.1f}s")
+        self.evict(keep=derived_path)
+        return derived_path
+
+    def normalized(self, path: str, width: int, height: int, fps: int, fit: str = 'scale') -> str:
+        """
+        A mezzanine copy of the video at `path`: exactly width x height at `fps`,
+        yuv420p, one-second closed GOPs and no audio, so renders use its frames
+        as they are and seek to any second without decoding a long GOP first.
+
+        fit='scale' stretches to the size; 'crop' centre-crops to at most the
+        size first, as a full-frame layer with fit='crop' does. Returns `path`
+        itself if it already matches.
+        """
+        info = self.info(path)
+        gop = max(1, int(fps))
+        if (
+            info.size == (width, height) and abs(info.fps - fps) < 0.01 and info.codec == 'h264'
+            and len(info.keyframes) > 1 and max(b - a for a, b in zip(info.keyframes, info.keyframes[1:])) <= 1.0 + 1e-3
+        ):
+            return path
+
+        scale = f"scale={width}:{height}:flags=lanczos"
+        if fit == 'crop':
+            scale = f"crop='min(iw,{width})':'min(ih,{height})'," + scale
+        return self._derive(path, f"{self.version(path)}-{MEZZANINE_FORMAT}-{width}x{height}-{fps}-{fit}.mp4", [
+            '-i', path, '-map', '0:v:0', '-an',
+            '-vf', f"{scale},setsar=1,fps={fps},format=yuv420p",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '16',
+            '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+            '-movflags', '+faststart'
+        ], 'Ingested', 'ingests')
+
+    def decoded_audio(self, path: str, sample_rate: int = 44100) -> str:
+        """The audio of `path` decoded once to 16-bit stereo PCM WAV, so renders mix it without decoding"""
+        return self._derive(path, f"{self.version(path)}-{MEZZANINE_FORMAT}-{sample_rate}.wav", [
+            '-i', path, '-map', '0:a:0', '-vn', '-ac', '2', '-ar', str(sample_rate), '-c:a', 'pcm_s16le'
+        ], 'Decoded', 'ingests')
+
+    def looped(self, path: str, duration: float) -> str:
+        """
+        `path` if it is at least `duration` long, otherwise a copy repeated with
+        ffmpeg -stream_loop (stream copy, no re-encode) long enough to cover it
+        """
+        info = self.info(path)
+        if info.duration <= 0 or info.duration >= duration:
+            return path
+
+        repeats = math.ceil(duration / info.duration)
+        ext = os.path.splitext(path)[1] or '.mp4'
+        return self._derive(path, f"{self.version(path)}-x{repeats}{ext}", [
+            '-stream_loop', str(repeats - 1), '-i', path, '-map', '0:v:0', '-c', 'copy'
+        ], f"Looped x{repeats}", 'loops')
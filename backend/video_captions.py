@@ -0,0 +1,178 @@
+"""
+Caption rendering with Pillow/FreeType instead of ImageMagick.
+
+MoviePy's TextClip shells out to ImageMagick for every caption. Here each
+caption is rasterized in-process into an RGBA array and wrapped in an
+ImageClip, reproducing TextClip(method='caption'): text word-wrapped to a box
+width, centred, filled with `color` and outlined with `stroke_color`.
+
+Fonts, word widths and finished captions are cached, so repeated subtitles and
+layovers in a batch are rendered once. Finished captions are full-width RGBA
+arrays (about 0.5 MB each at 1080p), so that cache is bounded by size
+(CAPTION_CACHE_MB) rather than by count, and a long-running worker's memory
+levels off instead of climbing with every new subtitle.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from moviepy.editor import ImageClip
+
+# Tried in order when a font name is not a file path
+FONT_DIRS = [
+    '/usr/share/fonts',
+    '/usr/local/share/fonts',
+    '/Library/Fonts',
+    '/System/Library/Fonts',
+    'C:\\Windows\\Fonts',
+]
+FALLBACK_FONTS = ['DejaVuSans.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf']
+LINE_SPACING = 4
+
+CAPTION_CACHE_BYTES = int(float(os.getenv('CAPTION_CACHE_MB', '64')) * 1024 * 1024)
+
+_captions: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+_captions_bytes = 0
+_captions_lock = threading.Lock()
+
+
+@lru_cache(maxsize=64)
+def _find_font_file(name: str) -> Optional[str]:
+    """Locate a font file for an ImageMagick-style name such as 'Arial-Bold' or 'Avenir'"""
+    if os.path.isfile(name):
+        return name
+
+    stem = name.lower().replace(' ', '')
+    candidates = {f"{stem}.ttf", f"{stem}.otf", f"{stem}.ttc", f"{stem.replace('-', '')}.ttf"}
+    for font_dir in FONT_DIRS:
+        if not os.path.isdir(font_dir):
+            continue
+        for root, _, files in os.walk(font_dir):
+            for filename in files:
+                if filename.lower() in candidates:
+                    return os.path.join(root, filename)
+    return None
+
+
+@lru_cache(maxsize=64)
+def load_font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    """Load a TrueType font by name or path, falling back to a common sans font"""
+    path = _find_font_file(name)
+    if path:
+        return ImageFont.truetype(path, size)
+
+    for fallback in FALLBACK_FONTS:
+        try:
+            return ImageFont.truetype(fallback, size)
+        except OSError:
+            path = _find_font_file(fallback)
+            if path:
+                return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+
+@lru_cache(maxsize=8192)
+def _text_width(font_name: str, size: int, stroke_width: int, text: str) -> float:
+    """Advance width of `text` in a given font/size/stroke (memoized word layout)"""
+    return load_font(font_name, size).getlength(text) + 2 * stroke_width
+
+
+def wrap_text(text: str, font_name: str, size: int, stroke_width: int, max_width: int) -> List[str]:
+    """Greedy word wrap so no line is wider than max_width (overlong words get their own line)"""
+    lines: List[str] = []
+    for paragraph in text.splitlines() or ['']:
+        current = ''
+        for word in paragraph.split():
+            candidate = f"{current} {word}" if current else word
+            if current and _text_width(font_name, size, stroke_width, candidate) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return lines
+
+
+def render_caption(
+    text: str,
+    font_name: str,
+    size: int,
+    color: str,
+    stroke_color: str,
+    stroke_width: int,
+    box_width: int
+) -> np.ndarray:
+    """Rasterize a wrapped, centred caption into a read-only RGBA uint8 array box_width pixels wide"""
+    global _captions_bytes
+    key = (text, font_name, size, color, stroke_color, stroke_width, box_width)
+    with _captions_lock:
+        if key in _captions:
+            _captions.move_to_end(key)
+            return _captions[key]
+
+    rgba = _rasterize_caption(*key)
+
+    with _captions_lock:
+        if key not in _captions and rgba.nbytes <= CAPTION_CACHE_BYTES:
+            _captions[key] = rgba
+            _captions_bytes += rgba.nbytes
+            # Least recently used captions go first
+            while _captions_bytes > CAPTION_CACHE_BYTES:
+                _, evicted = _captions.popitem(last=False)
+                _captions_bytes -= evicted.nbytes
+    return rgba
+
+
+def _rasterize_caption(
+    text: str,
+    font_name: str,
+    size: int,
+    color: str,
+    stroke_color: str,
+    stroke_width: int,
+    box_width: int
+) -> np.ndarray:
+    font = load_font(font_name, size)
+    lines = wrap_text(text, font_name, size, stroke_width, box_width)
+
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent + 2 * stroke_width
+    height = max(1, line_height * len(lines) + LINE_SPACING * (len(lines) - 1))
+
+    img = Image.new('RGBA', (box_width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    y = stroke_width
+    for line in lines:
+        x = (box_width - _text_width(font_name, size, stroke_width, line)) / 2 + stroke_width
+        draw.text(
+            (x, y),
+            line,
+            font=font,
+            fill=color,
+            stroke_width=stroke_width,
+            stroke_fill=stroke_color
+        )
+        y += line_height + LINE_SPACING
+
+    rgba = np.array(img)
+    rgba.setflags(write=False)
+    return rgba
+
+
+def caption_clip(
+    text: str,
+    font_name: str,
+    size: int,
+    color: str = 'white',
+    stroke_color: str = 'black',
+    stroke_width: int = 2,
+    box_width: int = 1820
+):
+    """ImageClip equivalent of TextClip(text, ..., size=(box_width, None), method='caption')"""
+    return ImageClip(render_caption(text, font_name, size, color, stroke_color, stroke_width, box_width))
+
@@ -0,0 +1,156 @@
+"""
+Named encoding profiles for rendered output.
+
+An EncodingProfile holds every encoder setting that trades encode time
+against file size and quality: x264 preset, CRF, tune, threads, pixel format,
+MP4 faststart and AAC bitrate. Renderers take a profile instead of
+hard-coding those settings, and generators pick one by name per job
+(ENCODING_PROFILE / --profile, PREVIEW_ENCODING_PROFILE for previews).
+
+    standard    medium / CRF 23, 128k audio: the encoder defaults renders used before
+    email-fast  veryfast / CRF 27, 96k audio: short turnaround, small attachments
+    landing-hq  slow / CRF 19 tuned for film, 192k audio: pages where quality shows
+    preview     ultrafast / CRF 30 tuned for fast decode, 64k audio: throwaway previews
+
+scripts/bench-encoding-profiles.py prints encode time against output size for
+each profile.
+
+within_size() caps a profile's video bitrate for an output size limit (e.g. an
+email attachment) from the duration known before encoding, so the file fits in
+the same pass instead of being transcoded again afterwards.
+"""
+
+import json
+import hashlib
+import math
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+# Share of a size budget kept back for MP4 boxes (moov, fragment headers) and
+# AAC running over its nominal bitrate
+CONTAINER_OVERHEAD = 0.03
+# VBV buffer of size-capped encodes, in seconds at the capped rate; x264 starts
+# each encode with the buffer 90% full and may spend that on top of the cap
+CAP_BUFFER_SECONDS = 1.0
+VBV_INITIAL_FILL = 0.9
+# Below this the video is not worth sending; the budget is rejected instead
+MIN_VIDEO_KBPS = 100
+
+
+def _kbps(bitrate: str) -> float:
+    """'128k' -> 128.0, '1.5M' -> 1500.0 (ffmpeg's decimal prefixes)"""
+    scale = {'k': 1, 'm': 1000}.get(bitrate[-1:].lower())
+    return float(bitrate[:-1]) * scale if scale else float(bitrate) / 1000
+
+
+def _round_down(value: float, digits: int = 2) -> int:
+    """`value` rounded down to `digits` significant figures"""
+    step = 10 ** max(0, int(math.floor(math.log10(value))) - digits + 1)
+    return int(value // step * step)
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """Encoder settings for one kind of output"""
+
+    name: str
+    preset: str = 'medium'              # x264 speed/size trade-off, ultrafast ... veryslow
+    crf: int = 23                       # constant quality; lower is better and larger
+    tune: Optional[str] = None          # x264 tune, e.g. 'film', 'animation', 'fastdecode'
+    threads: int = 0                    # encoder threads; 0 = FFMPEG_THREADS, else ffmpeg's default
+    pix_fmt: str = 'yuv420p'
+    faststart: bool = True              # moov atom first, so players start before the download ends
+    audio_bitrate: str = '128k'
+    codec: str = 'libx264'
+    maxrate_kbps: int = 0               # video bitrate cap from within_size(); 0 = CRF only
+    bufsize_kbps: int = 0
+
+    def encoder_threads(self, default: int = 0) -> int:
+        return self.threads or default
+
+    def video_args(self) -> Tuple[str, ...]:
+        """ffmpeg output options for the video stream (threads are passed separately)"""
+        args = ['-c:v', self.codec, '-preset', self.preset, '-crf', str(self.crf)]
+        if self.tune:
+            args += ['-tune', self.tune]
+        return tuple(args + self._rate_args() + ['-pix_fmt', self.pix_fmt])
+
+    def _rate_args(self) -> List[str]:
+        if not self.maxrate_kbps:
+            return []
+        return ['-maxrate', f"{self.maxrate_kbps}k", '-bufsize', f"{self.bufsize_kbps}k"]
+
+    def audio_args(self) -> Tuple[str, ...]:
+        return ('-c:a', 'aac', '-b:a', self.audio_bitrate)
+
+    def file_args(self) -> Tuple[str, ...]:
+        """Container options for MP4 written to a file (streamed output is fragmented instead)"""
+        return ('-movflags', '+faststart') if self.faststart else ()
+
+    def moviepy_params(self, audio: bool = True) -> Dict[str, Any]:
+        """Keyword arguments for MoviePy's write_videofile()"""
+        ffmpeg_params: List[str] = ['-crf', str(self.crf), '-pix_fmt', self.pix_fmt]
+        if self.tune:
+            ffmpeg_params += ['-tune', self.tune]
+        ffmpeg_params += self._rate_args() + list(self.file_args())
+        params = {'codec': self.codec, 'preset': self.preset, 'ffmpeg_params': ffmpeg_params}
+        if audio:
+            params.update(audio_codec='aac', audio_bitrate=self.audio_bitrate)
+        return params
+
+    def video_fingerprint(self) -> str:
+        """Hash of the settings that change encoded video, for keying cached segments"""
+        fields = asdict(self)
+        for name in ('name', 'threads', 'faststart', 'audio_bitrate'):
+            fields.pop(name)
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def within_size(self, max_mb: float, duration: float, pieces: int = 1) -> 'EncodingProfile':
+        """
+        This profile with its video bitrate capped so `duration` seconds of output
+        come to at most `max_mb` MB (MiB, as compress-video.py counts them).
+
+        CRF still sets the quality and the cap (constrained VBR: -maxrate with a
+        one-second -bufsize) only lowers it where CRF would overshoot the budget.
+        `pieces` is the number of separately encoded parts joined into the file
+        (cached segments): each starts with a nearly full VBV buffer it may spend
+        above the cap, so each one is budgeted for. The cap is rounded down to two
+        significant figures so jobs of similar length share cached segments.
+        Raises ValueError when the budget leaves less than MIN_VIDEO_KBPS for video.
+        """
+        if max_mb <= 0:
+            raise ValueError(f"max_output_mb must be positive, got {max_mb}")
+        budget_kbit = max_mb * 1024 * 1024 * 8 / 1000 * (1 - CONTAINER_OVERHEAD)
+        video_kbit = budget_kbit - _kbps(self.audio_bitrate) * duration
+        maxrate = video_kbit / (duration + VBV_INITIAL_FILL * CAP_BUFFER_SECONDS * pieces)
+        if maxrate < MIN_VIDEO_KBPS:
+            raise ValueError(
+                f"{max_mb:g} MB is too small for {duration:.1f}s of video "
+                f"({max(maxrate, 0):.0f} kbit/s left for video after {self.audio_bitrate} audio)"
+            )
+        maxrate = _round_down(maxrate)
+        if self.maxrate_kbps:
+            maxrate = min(maxrate, self.maxrate_kbps)
+        return replace(self, maxrate_kbps=maxrate, bufsize_kbps=int(maxrate * CAP_BUFFER_SECONDS))
+
+
+PROFILES: Dict[str, EncodingProfile] = {
+    profile.name: profile for profile in (
+        EncodingProfile('standard'),
+        EncodingProfile('email-fast', preset='veryfast', crf=27, audio_bitrate='96k'),
+        EncodingProfile('landing-hq', preset='slow', crf=19, tune='film', audio_bitrate='192k'),
+        EncodingProfile('preview', preset='ultrafast', crf=30, tune='fastdecode', audio_bitrate='64k'),
+    )
+}
+
+DEFAULT_PROFILE = PROFILES['standard']
+
+
+def get_profile(name: Optional[str]) -> EncodingProfile:
+    """The profile called `name` (None gives 'standard'); ValueError for an unknown name"""
+    if not name:
+        return DEFAULT_PROFILE
+    try:
+        return PROFILES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown encoding profile {name!r}; choose from {', '.join(PROFILES)}")
@@ -0,0 +1,338 @@
+"""
+FFmpeg filter-graph render backend.
+
+Turns a Timeline into a single ffmpeg invocation: background segments are
+normalized and joined with `concat`, logos and caption images are laid on top
+with time-gated `overlay`, and audio layers are delayed, gained and summed
+with `amix`. No frame passes through Python.
+
+The output can also be streamed: run_streaming() hands the encoder's stdout
+(fragmented MP4) to a consumer such as an S3 multipart upload.
+"""
+
+import subprocess
+import tempfile
+import threading
+from typing import Any, BinaryIO, Callable, List, Optional
+
+from video_encoding import DEFAULT_PROFILE, EncodingProfile
+from video_timeline import Timeline, VisualLayer, AudioLayer
+
+# Below this, gaps between background segments are rounding noise
+EPSILON = 1e-3
+
+# Fragmented MP4 never seeks back to patch the header, so it can go to a pipe.
+# delay_moov holds the header until the first fragment so it carries the edit
+# list; without it the video starts a B-frame delay (~2 frames) behind the audio
+STREAM_OUTPUT = 'pipe:1'
+STREAM_FORMAT_ARGS = ('-movflags', 'frag_keyframe+empty_moov+delay_moov', '-f', 'mp4')
+
+# consume(pipe, wait): read the encoder's output; wait() blocks until the encoder
+# exits and raises if it failed, so a truncated stream is never committed
+StreamConsumer = Callable[[BinaryIO, Callable[[], None]], Any]
+
+
+def _num(value: float) -> str:
+    return f"{value:.3f}".rstrip('0').rstrip('.') or '0'
+
+
+def _position(value, axis: str) -> str:
+    """Overlay x/y expression for an int or a named position"""
+    if isinstance(value, (int, float)):
+        return str(int(value))
+
+    size = 'main_w-overlay_w' if axis == 'x' else 'main_h-overlay_h'
+    return {
+        'left': '0',
+        'top': '0',
+        'center': f"({size})/2",
+        'right': size,
+        'bottom': size,
+    }[value]
+
+
+class FilterGraphBuilder:
+    """Accumulates ffmpeg inputs and filter_complex chains for one Timeline"""
+
+    def __init__(self, timeline: Timeline):
+        self.timeline = timeline
+        self.input_args: List[str] = []
+        self.filters: List[str] = []
+        self.input_count = 0
+        self.label_count = 0
+
+    def _label(self, prefix: str) -> str:
+        self.label_count += 1
+        return f"{prefix}{self.label_count}"
+
+    def _add_input(self, args: List[str]) -> int:
+        self.input_args.extend(args)
+        self.input_count += 1
+        return self.input_count - 1
+
+    def _visual_input(self, layer: VisualLayer, duration: float) -> int:
+        if layer.kind == 'image':
+            return self._add_input([
+                '-loop', '1', '-framerate', str(self.timeline.fps),
+                '-t', _num(duration), '-i', layer.source
+            ])
+        args = ['-stream_loop', '-1'] if layer.loop else []
+        if layer.source_start:
+            args += ['-ss', _num(layer.source_start)]
+        return self._add_input(args + ['-t', _num(duration), '-i', layer.source])
+
+    def _color_segment(self, color: str, duration: float) -> str:
+        label = self._label('bg')
+        t = self.timeline
+        self.filters.append(
+            f"color=c={color}:s={t.width}x{t.height}:r={t.fps}:d={_num(duration)},"
+            f"format=yuv420p,setsar=1[{label}]"
+        )
+        return label
+
+    def _background_segment(self, layer: VisualLayer, duration: float) -> str:
+        if layer.kind == 'color':
+            return self._color_segment(layer.source, duration)
+
+        t = self.timeline
+        index = self._visual_input(layer, duration)
+        if layer.fit == 'crop':
+            fit = f"crop='min(iw,{t.width})':'min(ih,{t.height})',scale={t.width}:{t.height}"
+        else:
+            fit = f"scale={t.width}:{t.height}"
+
+        # Clone the last frame if the source runs out, so every segment has its full length
+        label = self._label('bg')
+        self.filters.append(
+            f"[{index}:v]{fit},fps={t.fps},setsar=1,format=yuv420p,"
+            f"tpad=stop_mode=clone:stop_duration={_num(duration)},"
+            f"trim=duration={_num(duration)},setpts=PTS-STARTPTS[{label}]"
+        )
+        return label
+
+    def build_video(self) -> str:
+        """Background track via concat, then overlays; returns the output label"""
+        t = self.timeline
+        segments: List[str] = []
+        cursor = 0.0
+        backgrounds = [l for l in t.backgrounds if l.start < t.duration]
+
+        for i, layer in enumerate(backgrounds):
+            if layer.start > cursor + EPSILON:
+                segments.append(self._color_segment('black', layer.start - cursor))
+                cursor = layer.start
+
+            next_start = backgrounds[i + 1].start if i + 1 < len(backgrounds) else t.duration
+            end = min(layer.end, next_start, t.duration)
+            if end - cursor > EPSILON:
+                segments.append(self._background_segment(layer, end - cursor))
+                cursor = end
+
+        if t.duration - cursor > EPSILON:
+            segments.append(self._color_segment('black', t.duration - cursor))
+
+        current = self._label('base')
+        if len(segments) == 1:
+            self.filters.append(f"[{segments[0]}]null[{current}]")
+        else:
+            inputs = ''.join(f"[{s}]" for s in segments)
+            self.filters.append(f"{inputs}concat=n={len(segments)}:v=1:a=0[{current}]")
+
+        for layer in t.overlays:
+            end = min(layer.end, t.duration)
+            if end - layer.start <= EPSILON:
+                continue
+
+            index = self._visual_input(layer, end - layer.start)
+            chain = [f"[{index}:v]"]
+            if layer.width or layer.height:
+                chain.append(f"scale={layer.width or -1}:{layer.height or -1},")
+            chain.append(f"format=rgba,setpts=PTS-STARTPTS+{_num(layer.start)}/TB")
+            overlay_label = self._label('ov')
+            self.filters.append(''.join(chain) + f"[{overlay_label}]")
+
+            out = self._label('v')
+            self.filters.append(
+                f"[{current}][{overlay_label}]overlay="
+                f"x={_position(layer.x, 'x')}:y={_position(layer.y, 'y')}:"
+                f"enable='between(t,{_num(layer.start)},{_num(end)})':eof_action=pass[{out}]"
+            )
+            current = out
+
+        out = self._label('vout')
+        self.filters.append(f"[{current}]format=yuv420p[{out}]")
+        return out
+
+    def _audio_chain(self, layer: AudioLayer) -> str:
+        args = ['-ss', _num(layer.source_start)] if layer.source_start else []
+        index = self._add_input(args + ['-t', _num(layer.duration), '-i', layer.source])
+
+        delay_ms = int(round(layer.start * 1000))
+        label = self._label('a')
+        # Every input is padded to the full duration so amix always divides by the same count
+        self.filters.append(
+            f"[{index}:a]aformat=sample_fmts=fltp:sample_rates=44100:channel_layouts=stereo,"
+            f"atrim=0:{_num(layer.duration)},asetpts=PTS-STARTPTS,volume={layer.gain},"
+            f"adelay={delay_ms}|{delay_ms},apad,atrim=0:{_num(self.timeline.duration)}[{label}]"
+        )
+        return label
+
+    def build_audio(self) -> str:
+        """Mix all audio layers; returns the output label, or '' when there is no audio"""
+        layers = [l for l in self.timeline.audio if l.start < self.timeline.duration]
+        if not layers:
+            return ''
+
+        labels = [self._audio_chain(layer) for layer in layers]
+        out = self._label('aout')
+        if len(labels) == 1:
+            self.filters.append(f"[{labels[0]}]anull[{out}]")
+        else:
+            inputs = ''.join(f"[{l}]" for l in labels)
+            # amix averages its inputs; scale back up so layers sum like CompositeAudioClip
+            self.filters.append(
+                f"{inputs}amix=inputs={len(labels)}:duration=first:dropout_transition=0,"
+                f"volume={len(labels)}[{out}]"
+            )
+        return out
+
+
+def build_ffmpeg_command(
+    timeline: Timeline,
+    output_path: str,
+    ffmpeg_binary: str = 'ffmpeg',
+    threads: int = 0,
+    profile: EncodingProfile = DEFAULT_PROFILE
+) -> List[str]:
+    """Build the full ffmpeg argv that renders `timeline` to `output_path` with `profile`'s encoder settings"""
+    builder = FilterGraphBuilder(timeline)
+    video_label = builder.build_video()
+    audio_label = builder.build_audio()
+
+    cmd = [ffmpeg_binary, '-y', '-nostdin', '-loglevel', 'error']
+    cmd += builder.input_args
+    cmd += ['-filter_complex', ';'.join(builder.filters)]
+    cmd += ['-map', f"[{video_label}]"]
+    if audio_label:
+        cmd += ['-map', f"[{audio_label}]"]
+        cmd += list(profile.audio_args())
+    cmd += list(profile.video_args())
+    cmd += ['-r', str(timeline.fps), '-t', _num(timeline.duration)]
+    threads = profile.encoder_threads(threads)
+    if threads:
+        cmd += ['-threads', str(threads)]
+    cmd += list(STREAM_FORMAT_ARGS if output_path == STREAM_OUTPUT else profile.file_args())
+    cmd.append(output_path)
+    return cmd
+
+
+def build_audio_command(
+    timeline: Timeline,
+    output_path: str,
+    ffmpeg_binary: str = 'ffmpeg',
+    profile: EncodingProfile = DEFAULT_PROFILE
+) -> List[str]:
+    """Build the ffmpeg argv that mixes only the audio layers of `timeline`"""
+    builder = FilterGraphBuilder(timeline)
+    audio_label = builder.build_audio()
+    if not audio_label:
+        raise ValueError("timeline has no audio layers")
+
+    cmd = [ffmpeg_binary, '-y', '-nostdin', '-loglevel', 'error']
+    cmd += builder.input_args
+    cmd += ['-filter_complex', ';'.join(builder.filters)]
+    cmd += ['-map', f"[{audio_label}]"] + list(profile.audio_args())
+    cmd += ['-t', _num(timeline.duration), output_path]
+    return cmd
+
+
+def _run(cmd: List[str]) -> None:
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg render failed: {result.stderr.strip()}")
+
+
+def run_streaming(
+    cmd: List[str],
+    consume: StreamConsumer,
+    feed: Optional[Callable[[BinaryIO], None]] = None
+) -> Any:
+    """
+    Run an ffmpeg command whose output is STREAM_OUTPUT, handing its stdout to
+    `consume` while it encodes. `feed(stdin)`, if given, writes the input on a
+    separate thread. Returns what `consume` returns.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr
+        )
+        feed_errors: List[BaseException] = []
+
+        def write_input():
+            try:
+                feed(proc.stdin)
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; its exit status reports why
+            except BaseException as e:
+                feed_errors.append(e)
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = threading.Thread(target=write_input, daemon=True) if feed else None
+        if feeder:
+            feeder.start()
+
+        def wait():
+            if feeder:
+                feeder.join()
+            if feed_errors:
+                proc.kill()
+                raise feed_errors[0]
+            if proc.wait() != 0:
+                stderr.seek(0)
+                message = stderr.read().decode('utf-8', 'replace').strip()
+                raise RuntimeError(f"ffmpeg render failed: {message}")
+
+        try:
+            result = consume(proc.stdout, wait)
+            wait()
+            return result
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+
+def render_timeline(
+    timeline: Timeline,
+    output_path: str,
+    ffmpeg_binary: str = 'ffmpeg',
+    threads: int = 0,
+    profile: EncodingProfile = DEFAULT_PROFILE,
+    consume: Optional[StreamConsumer] = None
+) -> Any:
+    """
+    Render `timeline` to `output_path` with a single ffmpeg process, or with
+    `consume` as fragmented MP4 streamed from the encoder (output_path is ignored)
+    """
+    if consume:
+        cmd = build_ffmpeg_command(timeline, STREAM_OUTPUT, ffmpeg_binary, threads, profile)
+        return run_streaming(cmd, consume)
+    _run(build_ffmpeg_command(timeline, output_path, ffmpeg_binary, threads, profile))
+
+
+def render_audio(
+    timeline: Timeline,
+    output_path: str,
+    ffmpeg_binary: str = 'ffmpeg',
+    profile: EncodingProfile = DEFAULT_PROFILE
+) -> None:
+    """Render only the mixed audio track of `timeline` (e.g. to mux with cached video segments)"""
+    _run(build_audio_command(timeline, output_path, ffmpeg_binary, profile))
@@ -6,10 +6,20 @@ Security: All sensitive credentials must be set via environment variables.
 """
 
 import os
+import sys
+import json
+import argparse
+import contextlib
+import multiprocessing
 import tempfile
 import warnings
 import time
-from typing import Optional, List, Dict, Any
+import hashlib
+import subprocess
+from concurrent.futures import Future
+from dataclasses import replace
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
+import base64
 from io import BytesIO
 from pathlib import Path
 
@@ -24,13 +34,28 @@ from moviepy.editor import (
     VideoFileClip,
     AudioFileClip,
     TextClip,
-    CompositeVideoClip,
-    CompositeAudioClip,
-    ImageClip,
-    ColorClip,
-    concatenate_videoclips
+    ImageClip
 )
-import whisper
+from moviepy.config import get_setting
+
+from video_asset_cache import AssetCache, VoiceoverCache, SegmentCache, MediaIndex
+from video_captions import render_caption
+from video_encoding import EncodingProfile, PROFILES, get_profile
+from video_ffmpeg_render import (
+    render_timeline,
+    render_audio,
+    run_streaming,
+    STREAM_FORMAT_ARGS,
+    STREAM_OUTPUT,
+    StreamConsumer
+)
+from video_moviepy_render import timeline_clip, stream_clip
+from video_overlays import flatten_static_overlays
+from video_pipeline import Pipeline
+from video_resources import JobResources
+from video_s3_upload import S3Uploader
+from video_subtitles import align_segments, words_from_character_alignment, synthesize_stub_speech
+from video_timeline import Timeline, VisualLayer, AudioLayer
 
 # Suppress FP16 warnings
 warnings.filterwarnings("ignore", message="FP16 is not supported on CPU")
@@ -39,6 +64,29 @@ warnings.filterwarnings("ignore", message="FP16 is not supported on CPU")
 load_dotenv()
 
 
+def remove_white_background(img: Image.Image, threshold: int = 200, feather: int = 0) -> Image.Image:
+    """
+    Make near-white pixels of an image transparent.
+
+    A pixel whose R, G and B are all above `threshold` becomes fully transparent.
+    With `feather` > 0, pixels up to `feather` levels below the threshold fade out
+    linearly instead of keeping a hard edge.
+    """
+    rgba = np.array(img.convert("RGBA"))
+    rgb_min = rgba[..., :3].min(axis=2)
+
+    if feather > 0:
+        scale = np.clip(
+            (threshold + 1 - rgb_min.astype(np.float32)) / (feather + 1),
+            0.0,
+            1.0
+        )
+        rgba[..., 3] = (rgba[..., 3] * scale).astype(np.uint8)
+
+    rgba[rgb_min > threshold] = (255, 255, 255, 0)
+    return Image.fromarray(rgba, "RGBA")
+
+
 class VideoGeneratorConfig:
     """Configuration for video generation service"""
 
@@ -46,6 +94,10 @@ class VideoGeneratorConfig:
         # API Keys
         self.elevenlabs_api_key = os.getenv('ELEVENLABS_API_KEY')
         self.elevenlabs_voice_id = os.getenv('ELEVENLABS_VOICE_ID', '2EiwWnXFnvU5JabPnv8n')
+        # Request character timestamps with the audio so subtitles need no extra pass
+        self.elevenlabs_timestamps = os.getenv('ELEVENLABS_TIMESTAMPS', 'true').lower() == 'true'
+        # 'stub' synthesizes offline test audio with synthetic alignment
+        self.tts_provider = os.getenv('TTS_PROVIDER', 'elevenlabs').lower()
 
         # AWS S3 Configuration
         self.aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
@@ -53,6 +105,9 @@ class VideoGeneratorConfig:
         self.aws_region = os.getenv('AWS_REGION', 'us-east-1')
         self.s3_bucket_name = os.getenv('S3_BUCKET_NAME', 'suiteflow-demo')
         self.cloudfront_domain = os.getenv('CLOUDFRONT_DOMAIN', 'd26e2s8btupe4a.cloudfront.net')
+        # Stream the encoder's fragmented MP4 straight into a multipart upload
+        # instead of writing the video to VIDEO_OUTPUT_DIR first
+        self.stream_upload = os.getenv('STREAM_UPLOAD', 'false').lower() == 'true'
 
         # Default Assets
         self.default_template_video = os.getenv(
@@ -74,10 +129,58 @@ class VideoGeneratorConfig:
         self.video_height = int(os.getenv('VIDEO_HEIGHT', '1080'))
         self.video_fps = int(os.getenv('VIDEO_FPS', '24'))
         self.default_font = os.getenv('DEFAULT_FONT', 'Avenir')
+        # 'pillow' rasterizes captions in-process; 'imagemagick' uses MoviePy's TextClip
+        self.caption_renderer = os.getenv('CAPTION_RENDERER', 'pillow').lower()
 
         # Whisper Model
         self.whisper_model_size = os.getenv('WHISPER_MODEL_SIZE', 'small')
 
+        # Subtitle timing: 'align' places the known narration on the audio,
+        # 'whisper' transcribes it (also used as the fallback for 'align')
+        self.subtitle_timing = os.getenv('SUBTITLE_TIMING', 'align').lower()
+
+        # Preview renders: frame height and fps
+        self.preview_height = int(os.getenv('PREVIEW_HEIGHT', '480'))
+        self.preview_fps = int(os.getenv('PREVIEW_FPS', '12'))
+
+        # Render backend: 'moviepy' composites frames in Python (reference output),
+        # 'ffmpeg' renders the same timeline as one ffmpeg filter graph
+        self.render_backend = os.getenv('RENDER_BACKEND', 'moviepy').lower()
+
+        # Job pipeline: threads for the stages that overlap (downloads, TTS, logos)
+        self.pipeline_threads = int(os.getenv('PIPELINE_THREADS', '6'))
+
+        # Encoding profiles (video_encoding): preset, CRF, tune, threads, pixel format,
+        # faststart and audio bitrate for full renders and for previews
+        self.encoding_profile = os.getenv('ENCODING_PROFILE', 'standard')
+        self.preview_encoding_profile = os.getenv('PREVIEW_ENCODING_PROFILE', 'preview')
+
+        # Parallel rendering: worker processes and ffmpeg threads per encode (0 = ffmpeg default)
+        self.render_workers = int(os.getenv('RENDER_WORKERS', '1'))
+        self.ffmpeg_threads = int(os.getenv('FFMPEG_THREADS', '0'))
+
+        # Shared asset cache (templates, BGM, disclaimer, logos)
+        self.asset_cache_dir = os.getenv('ASSET_CACHE_DIR') or None
+        self.asset_cache_max_mb = int(os.getenv('ASSET_CACHE_MAX_MB', '2048'))
+        self.asset_cache_ttl = int(os.getenv('ASSET_CACHE_TTL', '300'))
+
+        # Segment cache: output encoded in ~SEGMENT_SECONDS chunks keyed by their
+        # inputs, so edits and shared intros only re-encode what changed
+        self.segment_cache_enabled = os.getenv('SEGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+        self.segment_seconds = float(os.getenv('SEGMENT_SECONDS', '2'))
+
+        # Merge overlays that share a time span (the corner logos) into one pre-sized image
+        self.flatten_overlays = os.getenv('FLATTEN_OVERLAYS', 'true').lower() == 'true'
+
+        # Template ingest: templates and the disclaimer are normalized once per source
+        # version to VIDEO_WIDTH x VIDEO_HEIGHT at VIDEO_FPS (short GOPs) and BGM is
+        # decoded to WAV, so renders never resize or crop template frames
+        self.template_ingest = os.getenv('TEMPLATE_INGEST', 'true').lower() == 'true'
+
+        # Logo background removal
+        self.logo_bg_threshold = int(os.getenv('LOGO_BG_THRESHOLD', '200'))
+        self.logo_bg_feather = int(os.getenv('LOGO_BG_FEATHER', '0'))
+
         self.validate()
 
     def validate(self):
@@ -95,7 +198,18 @@ class VideoGenerator:
     def __init__(self, config: Optional[VideoGeneratorConfig] = None):
         self.config = config or VideoGeneratorConfig()
         self.temp_files: List[str] = []
+        # Content hashes of generated timeline sources (logos, captions), by path
+        self.generated_sources: Dict[str, str] = {}
         self.whisper_model = None
+        self.asset_cache = AssetCache(
+            cache_dir=self.config.asset_cache_dir,
+            max_bytes=self.config.asset_cache_max_mb * 1024 * 1024,
+            ttl_seconds=self.config.asset_cache_ttl
+        )
+        self.voiceover_cache = VoiceoverCache.from_env()
+        self.segment_cache = SegmentCache.from_env()
+        # Template/disclaimer duration and size, probed once per asset version
+        self.media_index = MediaIndex.from_env(get_setting("FFMPEG_BINARY"))
 
         # Initialize S3 client
         if self.config.aws_access_key_id and self.config.aws_secret_access_key:
@@ -108,6 +222,7 @@ class VideoGenerator:
         else:
             # Use default credentials (IAM role, environment, etc.)
             self.s3_client = boto3.client('s3', region_name=self.config.aws_region)
+        self.uploader = S3Uploader.from_env(self.s3_client, self.config.s3_bucket_name)
 
     def __enter__(self):
         return self
@@ -125,6 +240,7 @@ class VideoGenerator:
             except Exception as e:
                 print(f"⚠️ Failed to clean up {temp_file}: {e}")
         self.temp_files.clear()
+        self.generated_sources.clear()
 
     def fetch_if_url(self, path_or_url: str, file_ext: str = "mp4") -> str:
         """Download file if given a URL, otherwise return local path."""
@@ -133,17 +249,10 @@ class VideoGenerator:
 
         if path_or_url.startswith("http"):
             try:
-                r = requests.get(path_or_url, stream=True, timeout=30)
-                r.raise_for_status()
-
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}")
-                for chunk in r.iter_content(chunk_size=8192):
-                    temp_file.write(chunk)
-                temp_file.close()
-
-                self.temp_files.append(temp_file.name)
-                print(f"⬇️ Downloaded: {path_or_url} -> {temp_file.name}")
-                return temp_file.name
+                # Cached files are shared across renders, so they are not added to temp_files
+                cached_path = self.asset_cache.fetch(path_or_url, file_ext)
+                print(f"⬇️ Fetched: {path_or_url} -> {cached_path}")
+                return cached_path
             except requests.RequestException as e:
                 raise RuntimeError(f"Failed to download {path_or_url}: {e}")
 
@@ -152,25 +261,23 @@ class VideoGenerator:
 
         return path_or_url
 
-    def download_logo(self, url: str) -> BytesIO:
+    def download_logo(
+        self,
+        url: str,
+        threshold: Optional[int] = None,
+        feather: Optional[int] = None
+    ) -> BytesIO:
         """Download and process logo with background removal"""
-        try:
-            r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=30)
-            r.raise_for_status()
+        threshold = self.config.logo_bg_threshold if threshold is None else threshold
+        feather = self.config.logo_bg_feather if feather is None else feather
 
-            img = Image.open(BytesIO(r.content)).convert("RGBA")
+        try:
+            logo_path = self.asset_cache.fetch(url, headers={"User-Agent": "Mozilla/5.0"})
+            with open(logo_path, "rb") as f:
+                img = Image.open(BytesIO(f.read()))
 
             # Remove white background
-            datas = img.getdata()
-            newData = []
-            for item in datas:
-                # If pixel is mostly white, make it transparent
-                if item[0] > 200 and item[1] > 200 and item[2] > 200:
-                    newData.append((255, 255, 255, 0))
-                else:
-                    newData.append(item)
-
-            img.putdata(newData)
+            img = remove_white_background(img, threshold=threshold, feather=feather)
 
             buffer = BytesIO()
             img.save(buffer, format="PNG")
@@ -181,21 +288,92 @@ class VideoGenerator:
         except Exception as e:
             raise RuntimeError(f"Failed to download/process logo {url}: {e}")
 
+    def logo_file(self, url: str) -> str:
+        """Download and process a logo into a PNG temp file usable as a timeline source"""
+        return self._png_temp_file(Image.open(self.download_logo(url)))
+
     def imageclip_from_buffer(self, buffer: BytesIO) -> ImageClip:
         """Create ImageClip from BytesIO buffer"""
         buffer.seek(0)
         img = Image.open(buffer).convert("RGBA")
         return ImageClip(np.array(img))
 
+    def caption_image(
+        self,
+        text: str,
+        font: str,
+        fontsize: int,
+        color: str,
+        stroke_color: str,
+        stroke_width: int,
+        width: int
+    ) -> np.ndarray:
+        """Word-wrapped, centred caption `width` pixels wide as RGBA (Pillow or ImageMagick)"""
+        if self.config.caption_renderer == "imagemagick":
+            clip = TextClip(
+                text,
+                font=font,
+                fontsize=fontsize,
+                color=color,
+                stroke_color=stroke_color,
+                stroke_width=stroke_width,
+                size=(width, None),
+                method='caption'
+            )
+            alpha = (clip.mask.get_frame(0) * 255).astype(np.uint8)
+            return np.dstack([clip.get_frame(0).astype(np.uint8), alpha])
+        return render_caption(text, font, fontsize, color, stroke_color, stroke_width, width)
+
     def generate_voiceover(self, text: str) -> BytesIO:
         """Generate voiceover audio using ElevenLabs or gTTS fallback"""
+        audio_bytes_io, _ = self.generate_voiceover_with_timings(text)
+        return audio_bytes_io
+
+    def generate_voiceover_with_timings(self, text: str) -> Tuple[BytesIO, Optional[List[Dict[str, Any]]]]:
+        """
+        Generate voiceover audio plus word timings when the provider supplies them.
+
+        Word timings are {"word", "start", "end"} dicts, or None (gTTS, or
+        ElevenLabs with ELEVENLABS_TIMESTAMPS disabled).
+        """
+        if self.config.tts_provider == "stub":
+            audio_bytes, alignment = synthesize_stub_speech(text)
+            print("🧪 Stub voiceover generated with synthetic alignment.")
+            return BytesIO(audio_bytes), self._word_timings_from_alignment(alignment)
+
         if self.config.elevenlabs_api_key:
+            cache_key = VoiceoverCache.key(
+                text, self.config.elevenlabs_voice_id, "eleven_multilingual_v2", "mp3_44100_128"
+            )
+            cached = self._cached_voiceover(cache_key)
+            if cached:
+                return cached
+
             try:
                 client = ElevenLabs(
                     api_key=self.config.elevenlabs_api_key,
                     base_url="https://api.elevenlabs.io/"
                 )
 
+                if self.config.elevenlabs_timestamps:
+                    try:
+                        response = client.text_to_speech.convert_with_timestamps(
+                            voice_id=self.config.elevenlabs_voice_id,
+                            output_format="mp3_44100_128",
+                            text=text,
+                            model_id="eleven_multilingual_v2"
+                        )
+                        audio_b64 = self._response_field(response, "audio_base_64", "audio_base64")
+                        alignment = self._response_field(response, "alignment")
+                        audio_bytes = base64.b64decode(audio_b64)
+                        word_timings = self._word_timings_from_alignment(alignment)
+                        self._store_voiceover(cache_key, audio_bytes, word_timings)
+
+                        print("🎙️ ElevenLabs voiceover generated with timestamps.")
+                        return BytesIO(audio_bytes), word_timings
+                    except Exception as e:
+                        print(f"⚠️ ElevenLabs timestamps unavailable, requesting plain audio: {e}")
+
                 audio_stream = client.text_to_speech.convert(
                     voice_id=self.config.elevenlabs_voice_id,
                     output_format="mp3_44100_128",
@@ -206,62 +384,669 @@ class VideoGenerator:
                 audio_bytes_io = BytesIO()
                 for chunk in audio_stream:
                     audio_bytes_io.write(chunk)
+                self._store_voiceover(cache_key, audio_bytes_io.getvalue())
                 audio_bytes_io.seek(0)
 
                 print("🎙️ ElevenLabs voiceover generated successfully.")
-                return audio_bytes_io
+                return audio_bytes_io, None
             except Exception as e:
                 print(f"⚠️ ElevenLabs error: {e}")
                 print("🔄 Falling back to gTTS...")
 
         # Fallback to gTTS
+        cache_key = VoiceoverCache.key(text, "en", "gtts", "mp3")
+        cached = self._cached_voiceover(cache_key)
+        if cached:
+            return cached
+
         try:
             from gtts import gTTS
             tts_buffer = BytesIO()
             tts = gTTS(text=text, lang="en", slow=False)
             tts.write_to_fp(tts_buffer)
+            self._store_voiceover(cache_key, tts_buffer.getvalue())
             tts_buffer.seek(0)
             print("✅ Fallback voiceover generated using gTTS.")
-            return tts_buffer
+            return tts_buffer, None
         except Exception as e:
             raise RuntimeError(f"Failed to generate voiceover: {e}")
 
+    def _cached_voiceover(self, cache_key: str) -> Optional[Tuple[BytesIO, Optional[List[Dict[str, Any]]]]]:
+        """Return (audio, word timings) from the voiceover cache, or None on a miss"""
+        cached = self.voiceover_cache.get(cache_key)
+        if not cached:
+            return None
+
+        audio_path, word_timings = cached
+        with open(audio_path, "rb") as f:
+            audio_bytes_io = BytesIO(f.read())
+        print(f"♻️ Reusing cached voiceover ({self.voiceover_cache.stats})")
+        return audio_bytes_io, word_timings
+
+    def _store_voiceover(
+        self,
+        cache_key: str,
+        audio_bytes: bytes,
+        word_timings: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Add synthesized audio to the voiceover cache; failures only cost a future re-synthesis"""
+        try:
+            self.voiceover_cache.put(cache_key, audio_bytes, word_timings)
+        except Exception as e:
+            print(f"⚠️ Failed to cache voiceover: {e}")
+
+    @staticmethod
+    def _response_field(response: Any, *names: str) -> Any:
+        """Read a field from an SDK response that may be a model object or a plain dict"""
+        for name in names:
+            value = response.get(name) if isinstance(response, dict) else getattr(response, name, None)
+            if value is not None:
+                return value
+        raise KeyError(f"Response has none of: {', '.join(names)}")
+
+    def _word_timings_from_alignment(self, alignment: Any) -> Optional[List[Dict[str, Any]]]:
+        """Convert an ElevenLabs-style character alignment into word timings"""
+        if alignment is None:
+            return None
+        return words_from_character_alignment(
+            self._response_field(alignment, "characters"),
+            self._response_field(alignment, "character_start_times_seconds"),
+            self._response_field(alignment, "character_end_times_seconds")
+        )
+
     def get_whisper_model(self):
         """Load Whisper model (cached)"""
         if self.whisper_model is None:
+            # Imported lazily: torch/whisper are only needed when transcribing
+            import whisper
+
             print(f"📝 Loading Whisper model: {self.config.whisper_model_size}")
             self.whisper_model = whisper.load_model(self.config.whisper_model_size)
         return self.whisper_model
 
+    def subtitle_segments(
+        self,
+        narration_text: str,
+        audio_path: str,
+        word_timings: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Return subtitle segments ({start, end, text}) for the narration audio"""
+        if self.config.subtitle_timing == "align":
+            try:
+                segments = align_segments(
+                    narration_text,
+                    audio_path,
+                    word_timings=word_timings,
+                    ffmpeg_binary=get_setting("FFMPEG_BINARY")
+                )
+                print(f"📝 Aligned {len(segments)} subtitle segments to narration")
+                return segments
+            except Exception as e:
+                print(f"⚠️ Subtitle alignment failed, falling back to Whisper: {e}")
+
+        model = self.get_whisper_model()
+        return model.transcribe(audio_path)["segments"]
+
     def upload_to_s3(self, local_file: str, s3_key: str) -> str:
         """Upload file to S3 and return CloudFront URL"""
         try:
-            # Check if file exists and delete it
-            try:
-                self.s3_client.head_object(Bucket=self.config.s3_bucket_name, Key=s3_key)
-                print(f"🗑️ Existing S3 object found. Deleting: {s3_key}")
-                self.s3_client.delete_object(Bucket=self.config.s3_bucket_name, Key=s3_key)
-            except ClientError as e:
-                if e.response['Error']['Code'] != '404':
-                    raise
-                print(f"ℹ️ No existing S3 object found: {s3_key}")
-
-            # Upload new file
-            self.s3_client.upload_file(
-                Filename=local_file,
-                Bucket=self.config.s3_bucket_name,
-                Key=s3_key,
-                ExtraArgs={'ContentType': 'video/mp4'}
-            )
-            print(f"✅ Uploaded to S3: s3://{self.config.s3_bucket_name}/{s3_key}")
-
-            # Return CloudFront URL with cache busting
-            video_url = f"https://{self.config.cloudfront_domain}/{s3_key}?v={int(time.time())}"
-            return video_url
+            # Overwrites any existing object; large files go up as parallel multipart
+            upload = self.uploader.upload_file(local_file, s3_key)
+            print(f"✅ Uploaded to S3: s3://{self.config.s3_bucket_name}/{s3_key} (sha256 {upload['sha256'][:12]})")
+            return self.cloudfront_url(s3_key)
 
         except ClientError as e:
             raise RuntimeError(f"S3 upload failed: {e}")
 
+    def cloudfront_url(self, s3_key: str) -> str:
+        """CloudFront URL for an uploaded video, with cache busting"""
+        return f"https://{self.config.cloudfront_domain}/{s3_key}?v={int(time.time())}"
+
+    def fetch_shared_assets(
+        self,
+        pipeline: Pipeline,
+        template_video: Optional[str] = None,
+        bgm: Optional[str] = None
+    ) -> Dict[str, Future]:
+        """Start downloading and ingesting the template, BGM and disclaimer in parallel; see open_assets()"""
+        return {
+            "template_video_path": pipeline.submit(
+                "asset:template", self.fetch_asset,
+                template_video or self.config.default_template_video, "mp4", self.ingest_video
+            ),
+            "bgm_path": pipeline.submit(
+                "asset:bgm", self.fetch_asset, bgm or self.config.default_bgm, "mp3", self.ingest_audio
+            ),
+            "disclaimer_path": pipeline.submit(
+                "asset:disclaimer", self.fetch_asset, self.config.default_disclaimer_video, "mp4",
+                lambda path: self.ingest_video(path, fit="crop")
+            ),
+        }
+
+    def fetch_asset(self, path_or_url: str, file_ext: str, ingest: Callable[[str], str]) -> str:
+        """Download (or locate) an asset and return its ingested, render-ready copy"""
+        path = self.fetch_if_url(path_or_url, file_ext)
+        return ingest(path) if path and os.path.exists(path) else path
+
+    def ingest_video(self, path: str, fit: str = "scale") -> str:
+        """
+        Mezzanine copy of a template or disclaimer at VIDEO_WIDTH x VIDEO_HEIGHT and
+        VIDEO_FPS with one-second GOPs, made once per source version (TEMPLATE_INGEST)
+        """
+        if not self.config.template_ingest:
+            return path
+        config = self.config
+        return self.media_index.normalized(path, config.video_width, config.video_height, config.video_fps, fit)
+
+    def ingest_audio(self, path: str) -> str:
+        """BGM decoded once to PCM WAV per source version (TEMPLATE_INGEST)"""
+        if not self.config.template_ingest:
+            return path
+        return self.media_index.decoded_audio(path)
+
+    def open_shared_assets(
+        self,
+        template_video: Optional[str] = None,
+        bgm: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Download and open the template, BGM and disclaimer once so several renders can share them"""
+        with Pipeline(3) as pipeline:
+            fetches = self.fetch_shared_assets(pipeline, template_video, bgm)
+            return self.open_assets(**{name: future.result() for name, future in fetches.items()})
+
+    def open_assets(
+        self,
+        template_video_path: str,
+        bgm_path: str,
+        disclaimer_path: str,
+        resources: Optional[JobResources] = None
+    ) -> Dict[str, Any]:
+        """
+        Look up downloaded assets in the media index and, for the MoviePy backend,
+        open their readers, in the shape open_shared_assets() returns. The ffmpeg
+        backend reads files directly, so it gets no clips.
+
+        With `resources`, each reader is owned by that job as soon as it opens.
+        """
+        track = resources.track if resources else (lambda clip: clip)
+        has_template = template_video_path and os.path.exists(template_video_path)
+        has_disclaimer = os.path.exists(disclaimer_path)
+        open_readers = self.config.render_backend != 'ffmpeg'
+        return {
+            "template_video_path": template_video_path,
+            "bgm_path": bgm_path,
+            "disclaimer_path": disclaimer_path,
+            "template_info": self.media_index.info(template_video_path) if has_template else None,
+            "disclaimer_info": self.media_index.info(disclaimer_path) if has_disclaimer else None,
+            "template_clip": track(VideoFileClip(template_video_path)) if has_template and open_readers else None,
+            "bgm_clip": track(AudioFileClip(bgm_path)) if open_readers else None,
+            "disclaimer_clip": track(VideoFileClip(disclaimer_path)) if has_disclaimer and open_readers else None,
+        }
+
+    def close_shared_assets(self, assets: Dict[str, Any]):
+        """Release the readers opened by open_shared_assets()"""
+        for name in ("template_clip", "bgm_clip", "disclaimer_clip"):
+            clip = assets.get(name)
+            if clip is not None:
+                try:
+                    clip.close()
+                except Exception as e:
+                    print(f"⚠️ Failed to close {name}: {e}")
+
+    def generate_batch(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Render many videos, opening each distinct template/BGM pair only once.
+
+        Each job is a dict of generate_video() keyword arguments plus an optional
+        "job_id". Results are yielded as each job finishes, in the same
+        {"success", "video_url" | "error"} shape as the CLI. A failing job does
+        not stop the batch.
+        """
+        shared: Dict[tuple, Dict[str, Any]] = {}
+        try:
+            for job in jobs:
+                yield self.run_batch_job(job, shared)
+        finally:
+            for assets in shared.values():
+                self.close_shared_assets(assets)
+
+    def shared_assets_key(self, job: Dict[str, Any]) -> tuple:
+        """
+        Which shared template/BGM/disclaimer set a job renders with: (template, BGM),
+        None for the configured defaults. Only the assets enter the key; the
+        encoding profile, max_output_mb and preview size are applied per render.
+        """
+        template, bgm = job.get("template_video"), job.get("bgm")
+        return (
+            None if template == self.config.default_template_video else template,
+            None if bgm == self.config.default_bgm else bgm
+        )
+
+    def run_batch_job(self, job: Dict[str, Any], shared: Dict[tuple, Dict[str, Any]]) -> Dict[str, Any]:
+        """Render one batch job, reusing (and filling) `shared` assets keyed by template/BGM"""
+        job = dict(job)
+        job_id = job.pop("job_id", None)
+        try:
+            key = self.shared_assets_key(job)
+            if key not in shared:
+                shared[key] = self.open_shared_assets(*key)
+            # Shared assets stay open for the whole batch; marking them used for
+            # every job keeps the caches from evicting them as idle
+            for name in ("template_video_path", "bgm_path", "disclaimer_path"):
+                self.media_index.touch(shared[key][name])
+                self.asset_cache.touch(shared[key][name])
+
+            video_url = self.generate_video(**job, shared_assets=shared[key])
+            result = {"success": True, "video_url": video_url}
+        except Exception as e:
+            print(f"❌ Batch job {job_id} failed: {e}")
+            result = {"success": False, "error": str(e)}
+        finally:
+            self.cleanup()
+
+        if job_id is not None:
+            result["job_id"] = job_id
+        return result
+
+    def _file_fingerprint(self, path: str) -> str:
+        """Identify a local input by path, size and modification time"""
+        if not path or not os.path.exists(path):
+            return ''
+        # Asset cache names already encode URL + ETag/Last-Modified, and media index
+        # names (mezzanines, decoded audio, loops) the source version and the ffmpeg
+        # settings, so for those the path alone is stable
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory in (os.path.abspath(self.asset_cache.cache_dir), os.path.abspath(self.media_index.cache_dir)):
+            return path
+        st = os.stat(path)
+        return f"{path}:{st.st_size}:{int(st.st_mtime)}"
+
+    def _write_video_segment(self, clip, path: str, profile: EncodingProfile):
+        """Encode a video-only segment with the settings shared by every segment"""
+        clip.without_audio().write_videofile(
+            path,
+            fps=self.config.video_fps,
+            audio=False,
+            threads=profile.encoder_threads(self.config.ffmpeg_threads) or None,
+            verbose=False,
+            logger=None,
+            # Segments are joined afterwards, so only the final file needs faststart
+            **replace(profile, faststart=False).moviepy_params(audio=False)
+        )
+
+    def concat_segments(
+        self,
+        segment_paths: List[str],
+        audio_path: str,
+        output_path: str,
+        consume: Optional[StreamConsumer] = None,
+        profile: Optional[EncodingProfile] = None
+    ):
+        """
+        Join encoded segments with the ffmpeg concat demuxer (stream copy) and mux
+        the audio, into output_path (with `profile`'s container options) or as a
+        fragmented MP4 stream for `consume`
+        """
+        list_file = tempfile.NamedTemporaryFile("w", delete=False, suffix=".txt")
+        for segment_path in segment_paths:
+            list_file.write(f"file '{os.path.abspath(segment_path)}'\n")
+        list_file.close()
+        self.temp_files.append(list_file.name)
+
+        cmd = [
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_file.name,
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c", "copy",
+            "-shortest"
+        ]
+        if consume:
+            run_streaming(cmd + list(STREAM_FORMAT_ARGS) + [STREAM_OUTPUT], consume)
+            return
+
+        file_args = list(profile.file_args()) if profile else []
+        result = subprocess.run(cmd + file_args + [output_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {result.stderr.strip()}")
+
+    def segment_bounds(self, timeline: Timeline, cuts: Iterable[float] = ()) -> List[Tuple[float, float]]:
+        """Frame-aligned [start, end) ranges of about segment_seconds each, also split at `cuts`"""
+        fps = timeline.fps
+        total = int(round(timeline.duration * fps))
+        step = max(1, int(round(self.config.segment_seconds * fps)))
+        frames = set(range(0, total, step)) | {total}
+        frames.update(int(round(cut * fps)) for cut in cuts if 0 < cut * fps < total)
+        frames = sorted(frames)
+        return [(a / fps, b / fps) for a, b in zip(frames, frames[1:])]
+
+    def write_segmented(
+        self,
+        timeline: Timeline,
+        render_segment: Callable[[float, float, Timeline, str], None],
+        render_audio_track: Callable[[str], None],
+        output_path: str,
+        cuts: Iterable[float] = (),
+        consume: Optional[StreamConsumer] = None,
+        profile: Optional[EncodingProfile] = None
+    ) -> bool:
+        """
+        Write `timeline` as cached, independently encoded segments plus a fresh audio track.
+
+        Each segment is keyed by the fingerprint of its window of the timeline, so
+        after an edit (a layover typo, a new logo) only the segments whose inputs
+        changed are encoded again, and segments that are the same for every
+        recipient (the disclaimer and logo intro) are encoded once. Segments are
+        encoded separately, so each starts on a keyframe and the concat demuxer can
+        join them with stream copy.
+
+        `render_segment(start, end, window, path)` encodes one segment without audio,
+        with `profile`'s video settings, which are part of every segment's key.
+        Returns False when the segment cache is off or fails, and the caller should
+        render the whole timeline in one pass.
+        """
+        if not self.config.segment_cache_enabled:
+            return False
+
+        profile = profile or self.default_profile()
+        try:
+            segment_paths = []
+            reused = 0
+            for start, end in self.segment_bounds(timeline, cuts):
+                window = timeline.window(start, end).without_audio()
+                key = hashlib.sha256("|".join([
+                    self.config.render_backend,
+                    profile.video_fingerprint(),
+                    window.fingerprint(self.source_fingerprint)
+                ]).encode("utf-8")).hexdigest()
+
+                path = self.segment_cache.get(key)
+                if path:
+                    reused += 1
+                else:
+                    path = self.segment_cache.put(
+                        key,
+                        lambda tmp_path: render_segment(start, end, window, tmp_path)
+                    )
+                segment_paths.append(path)
+
+            audio_file = tempfile.NamedTemporaryFile(delete=False, suffix=".m4a")
+            audio_file.close()
+            self.temp_files.append(audio_file.name)
+            render_audio_track(audio_file.name)
+
+            self.concat_segments(segment_paths, audio_file.name, output_path, consume, profile)
+            print(f"♻️ Reused {reused}/{len(segment_paths)} cached segments")
+            self.segment_cache.evict()
+            return True
+        except Exception as e:
+            print(f"⚠️ Segmented render failed, rendering in one pass: {e}")
+            return False
+
+    def _png_temp_file(self, image: Image.Image) -> str:
+        """Save an image as a temp PNG for the renderers, remembering a hash of its contents"""
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        png_bytes = buffer.getvalue()
+
+        png_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
+        png_file.write(png_bytes)
+        png_file.close()
+        self.temp_files.append(png_file.name)
+        self.generated_sources[png_file.name] = hashlib.sha256(png_bytes).hexdigest()
+        return png_file.name
+
+    def source_fingerprint(self, path: str) -> str:
+        """Content identity of a timeline source, used in Timeline.fingerprint()"""
+        return self.generated_sources.get(path) or self._file_fingerprint(path)
+
+    def build_timeline(
+        self,
+        assets: Dict[str, Any],
+        voiceover_path: str,
+        voiceover_duration: float,
+        segments: List[Dict[str, Any]],
+        client_logo: Optional[str] = None,
+        user_logo: Optional[str] = None,
+        text_layovers: Optional[List[Dict[str, Any]]] = None,
+        selected_font: Optional[str] = None
+    ) -> Timeline:
+        """
+        Lay out one video: 3s disclaimer, 4s logo intro (client then user logo
+        over the template), then the template body with 180x180 corner logos,
+        subtitles 150px above the bottom and any text layovers on top. The corner
+        logos are flattened into one image layer (FLATTEN_OVERLAYS).
+
+        `client_logo` and `user_logo` are processed PNGs from logo_file(); the
+        logo intro is only laid out when both are given.
+        """
+        selected_font = selected_font or self.config.default_font
+        template = assets["template_info"]
+        if template is None:
+            print("⚠️ No template video found. Creating blank video.")
+            width, height = self.config.video_width, self.config.video_height
+            template_duration = voiceover_duration
+        else:
+            width, height = template.size
+            template_duration = min(template.duration, voiceover_duration)
+
+        def template_layer(start: float, source_start: float, duration: float, name: str) -> VisualLayer:
+            if template is None:
+                return VisualLayer('#000000', start, duration, kind='color', full_frame=True, name=name)
+            return VisualLayer(
+                assets["template_video_path"], start, duration,
+                source_start=source_start, full_frame=True, name=name
+            )
+
+        layers: List[VisualLayer] = []
+        disclaimer_duration = 0
+        if assets["disclaimer_info"] is not None:
+            disclaimer_duration = min(3, assets["disclaimer_info"].duration)
+            layers.append(VisualLayer(
+                assets["disclaimer_path"], 0, disclaimer_duration,
+                full_frame=True, fit='crop', name='disclaimer'
+            ))
+
+        if client_logo and user_logo:
+            intro_duration = disclaimer_duration + 4
+            body_start = min(template_duration, 4)
+            logo_width = int(width * 0.5)
+            logo_size = 180
+
+            layers += [
+                template_layer(disclaimer_duration, 0, body_start, 'logo_intro'),
+                VisualLayer(client_logo, disclaimer_duration, 2, kind='image', width=logo_width, name='client_logo'),
+                VisualLayer(user_logo, disclaimer_duration + 2, 2, kind='image', width=logo_width, name='user_logo'),
+                template_layer(
+                    intro_duration, body_start,
+                    min(template_duration, 4 + voiceover_duration) - body_start, 'body'
+                ),
+                VisualLayer(
+                    client_logo, intro_duration, voiceover_duration, kind='image',
+                    width=logo_size, height=logo_size, x=30, y=30, name='client_logo'
+                ),
+                VisualLayer(
+                    user_logo, intro_duration, voiceover_duration, kind='image',
+                    width=logo_size, height=logo_size, x=width - logo_size - 30, y=30, name='user_logo'
+                ),
+            ]
+        else:
+            intro_duration = disclaimer_duration
+            layers.append(template_layer(intro_duration, 0, template_duration, 'body'))
+
+        # Captions are rasterized once per distinct text and style
+        caption_files: Dict[tuple, str] = {}
+
+        def caption_file(text: str, fontsize: int, color: str, stroke_color: str, stroke_width: int, box_width: int) -> str:
+            key = (text, fontsize, color, stroke_color, stroke_width, box_width)
+            if key not in caption_files:
+                rgba = self.caption_image(text, selected_font, fontsize, color, stroke_color, stroke_width, box_width)
+                caption_files[key] = self._png_temp_file(Image.fromarray(rgba, "RGBA"))
+            return caption_files[key]
+
+        for seg in segments:
+            layers.append(VisualLayer(
+                caption_file(seg["text"], 30, 'yellow', 'black', 2, width - 100),
+                disclaimer_duration + seg["start"], seg["end"] - seg["start"],
+                kind='image', y=height - 150, name='subtitle'
+            ))
+
+        if text_layovers:
+            print(f"📺 Adding {len(text_layovers)} text layovers")
+            for item in text_layovers:
+                layers.append(VisualLayer(
+                    caption_file(
+                        item["text"],
+                        item.get("font_size", 100),
+                        item.get("color", "white"),
+                        item.get("stroke_color", "black"),
+                        item.get("stroke_width", 3),
+                        width - 200
+                    ),
+                    item.get("start_time", 0), item.get("duration", 3), kind='image', name='layover'
+                ))
+                print(f"  ✅ {item['text']} @ {item.get('start_time', 0)}s")
+
+        audio = (
+            AudioLayer(assets["bgm_path"], 0, intro_duration + voiceover_duration, gain=0.1),
+            AudioLayer(voiceover_path, disclaimer_duration, voiceover_duration),
+        )
+
+        timeline = Timeline(
+            width=width,
+            height=height,
+            fps=self.config.video_fps,
+            duration=disclaimer_duration + voiceover_duration,
+            layers=tuple(layers),
+            audio=audio
+        )
+        if self.config.flatten_overlays:
+            timeline = flatten_static_overlays(timeline, self._png_temp_file)
+        return timeline
+
+    def default_profile(self, preview: bool = False) -> EncodingProfile:
+        """ENCODING_PROFILE, or PREVIEW_ENCODING_PROFILE for previews"""
+        return get_profile(self.config.preview_encoding_profile if preview else self.config.encoding_profile)
+
+    def size_capped_profile(self, profile: EncodingProfile, timeline: Timeline, max_output_mb: float) -> EncodingProfile:
+        """
+        `profile` with its video bitrate capped so the full render of `timeline`
+        (disclaimer + voiceover, known before encoding) fits in max_output_mb
+        """
+        pieces = 1
+        if self.config.segment_cache_enabled:
+            pieces = len(self.segment_bounds(timeline, [self.shared_prefix_end(timeline)]))
+        capped = profile.within_size(max_output_mb, timeline.duration, pieces)
+        print(
+            f"📏 Capping video at {capped.maxrate_kbps} kbit/s for {max_output_mb:g} MB "
+            f"({timeline.duration:.1f}s, {pieces} segment{'s' if pieces != 1 else ''})"
+        )
+        return capped
+
+    def shared_prefix_end(self, timeline: Timeline) -> float:
+        """
+        End of the part that is the same for every recipient with the same
+        template and logos: everything before the body and the first caption
+        """
+        return min(
+            [timeline.duration]
+            + [layer.start for layer in timeline.layers if layer.name in ('body', 'subtitle', 'layover')]
+        )
+
+    def render_with_moviepy(
+        self,
+        timeline: Timeline,
+        sources: Dict[str, Any],
+        local_file: str,
+        preview: bool = False,
+        consume: Optional[StreamConsumer] = None,
+        track: Optional[Callable[[Any], Any]] = None,
+        profile: Optional[EncodingProfile] = None
+    ):
+        """
+        Composite the timeline frame by frame with MoviePy (the reference renderer),
+        into local_file or, with `consume`, as a fragmented MP4 stream, encoded
+        with `profile` (by default the job's profile for `preview`)
+        """
+        profile = profile or self.default_profile(preview)
+        final = timeline_clip(timeline, sources, track)
+        half_frame = 0.5 / timeline.fps
+
+        def render_segment(start: float, end: float, window: Timeline, path: str):
+            # iter_frames() yields ceil(duration * fps) frames; ending half a frame
+            # early makes that exactly the segment's frame count
+            self._write_video_segment(final.subclip(start, end - half_frame), path, profile)
+
+        def render_audio_track(path: str):
+            final.audio.set_duration(timeline.duration).write_audiofile(
+                path,
+                fps=44100,
+                codec="aac",
+                bitrate=profile.audio_bitrate,
+                verbose=False,
+                logger=None
+            )
+
+        try:
+            # Previews are one-off renders, so they skip the segment cache
+            cuts = [self.shared_prefix_end(timeline)]
+            if preview or not self.write_segmented(
+                timeline, render_segment, render_audio_track, local_file, cuts, consume, profile
+            ):
+                if consume:
+                    stream_clip(
+                        final,
+                        timeline.fps,
+                        consume,
+                        get_setting("FFMPEG_BINARY"),
+                        profile,
+                        threads=self.config.ffmpeg_threads or None
+                    )
+                else:
+                    final.write_videofile(
+                        local_file,
+                        fps=timeline.fps,
+                        threads=profile.encoder_threads(self.config.ffmpeg_threads) or None,
+                        verbose=False,
+                        logger=None,
+                        **profile.moviepy_params()
+                    )
+        finally:
+            final.close()
+
+    def render_with_ffmpeg(
+        self,
+        timeline: Timeline,
+        local_file: str,
+        preview: bool = False,
+        consume: Optional[StreamConsumer] = None,
+        profile: Optional[EncodingProfile] = None
+    ):
+        """
+        Render the timeline with ffmpeg filter graphs, without decoding frames in
+        Python, into local_file or, with `consume`, as a fragmented MP4 stream,
+        encoded with `profile` (by default the job's profile for `preview`)
+        """
+        ffmpeg_binary = get_setting("FFMPEG_BINARY")
+        threads = self.config.ffmpeg_threads
+        profile = profile or self.default_profile(preview)
+
+        def render_segment(start: float, end: float, window: Timeline, path: str):
+            # Segments are joined afterwards, so only the final file needs faststart
+            render_timeline(window, path, ffmpeg_binary, threads, replace(profile, faststart=False))
+
+        cuts = [self.shared_prefix_end(timeline)]
+        if preview or not self.write_segmented(
+            timeline,
+            render_segment,
+            lambda path: render_audio(timeline, path, ffmpeg_binary, profile),
+            local_file,
+            cuts,
+            consume,
+            profile
+        ):
+            render_timeline(timeline, local_file, ffmpeg_binary, threads, profile, consume)
+
     def generate_video(
         self,
         narration_text: str,
@@ -272,7 +1057,12 @@ class VideoGenerator:
         bgm: Optional[str] = None,
         text_layovers: Optional[List[Dict[str, Any]]] = None,
         selected_font: Optional[str] = None,
-        upload_to_s3: bool = True
+        upload_to_s3: bool = True,
+        shared_assets: Optional[Dict[str, Any]] = None,
+        preview: bool = False,
+        on_preview: Optional[Callable[[str], None]] = None,
+        encoding_profile: Optional[str] = None,
+        max_output_mb: Optional[float] = None
     ) -> str:
         """
         Generate personalized video with AI voiceover and subtitles
@@ -287,6 +1077,15 @@ class VideoGenerator:
             text_layovers: List of text overlays with timing
             selected_font: Font for text rendering
             upload_to_s3: Whether to upload to S3
+            shared_assets: Assets from open_shared_assets() to reuse instead of opening them again
+            preview: Render only a fast low-resolution preview (PREVIEW_HEIGHT / PREVIEW_FPS,
+                PREVIEW_ENCODING_PROFILE)
+            on_preview: Render the preview first and pass its URL here, then render full quality
+                reusing the same voiceover and subtitle timings
+            encoding_profile: Encoding profile name for the full-quality render (see
+                video_encoding.PROFILES); defaults to ENCODING_PROFILE
+            max_output_mb: Size limit for the full-quality file (e.g. an email attachment);
+                its video bitrate is capped from the known duration so it fits in one pass
 
         Returns:
             URL to the generated video (S3/CloudFront if uploaded, local path otherwise)
@@ -295,9 +1094,11 @@ class VideoGenerator:
             raise ValueError("narration_text cannot be empty")
 
         # Use defaults if not provided
-        template_video = template_video or self.config.default_template_video
-        bgm = bgm or self.config.default_bgm
         selected_font = selected_font or self.config.default_font
+        # Unknown profile names fail here, before any work is done
+        profile = get_profile(encoding_profile) if encoding_profile else self.default_profile()
+        if max_output_mb is not None and max_output_mb <= 0:
+            raise ValueError(f"max_output_mb must be positive, got {max_output_mb}")
 
         print(f"🎬 Starting video generation: {output_filename}")
         print(f"📝 Narration: {narration_text[:100]}...")
@@ -306,212 +1107,154 @@ class VideoGenerator:
         output_dir = Path(self.config.output_directory)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Download assets
-        template_video_path = self.fetch_if_url(template_video, "mp4")
-        bgm_path = self.fetch_if_url(bgm, "mp3")
-        disclaimer_path = self.fetch_if_url(self.config.default_disclaimer_video, "mp4")
-
-        # Generate voiceover
-        audio_bytes_io = self.generate_voiceover(narration_text)
+        owns_assets = shared_assets is None
+        assets = shared_assets
 
-        # Save audio to temp file
-        temp_audio_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-        temp_audio_file.write(audio_bytes_io.read())
-        temp_audio_file.close()
-        self.temp_files.append(temp_audio_file.name)
-
-        # Load audio and get duration
-        voiceover_audio_clip = AudioFileClip(temp_audio_file.name)
-        voiceover_duration = voiceover_audio_clip.duration
-
-        # Load or create template video
-        if not template_video_path or not os.path.exists(template_video_path):
-            print("⚠️ No template video found. Creating blank video.")
-            video = ColorClip(
-                size=(self.config.video_width, self.config.video_height),
-                color=(0, 0, 0),
-                duration=voiceover_duration
-            ).set_fps(self.config.video_fps)
-        else:
-            video = VideoFileClip(template_video_path)
-            if video.duration > voiceover_duration:
-                video = video.subclip(0, voiceover_duration)
-
-        # Transcribe audio for subtitles
-        model = self.get_whisper_model()
-        result = model.transcribe(temp_audio_file.name)
-
-        # Load disclaimer
-        disclaimer_duration = 0
-        disclaimer_clip = None
-        if os.path.exists(disclaimer_path):
-            disc_clip = VideoFileClip(disclaimer_path).subclip(0, 3)
-            disclaimer_clip = disc_clip.crop(
-                x_center=disc_clip.w / 2,
-                y_center=disc_clip.h / 2,
-                width=video.w,
-                height=video.h
-            ).set_position("center")
-            disclaimer_duration = disclaimer_clip.duration
-
-        # Process logos if provided
-        clips_to_combine = []
-
-        if client_logo_url and user_logo_url:
-            # Download and process logos
-            client_logo_buffer = self.download_logo(client_logo_url)
-            user_logo_buffer = self.download_logo(user_logo_url)
-
-            # Create logo intro sequence
-            logo_width = int(video.w * 0.5)
-            background_clip = video.subclip(0, min(video.duration, 4)).without_audio().resize(height=video.h).resize(width=video.w)
-
-            client_logo_img = (
-                self.imageclip_from_buffer(client_logo_buffer)
-                .resize(width=logo_width)
-                .set_duration(2)
-                .set_start(0)
-                .set_position("center")
-            )
+        # Every clip this job opens is owned by `resources` and closed when the job
+        # ends; shared assets stay open for the rest of the batch
+        with Pipeline(self.config.pipeline_threads) as pipeline, \
+                JobResources.from_env(output_filename) as resources:
+            try:
+                # Independent stages start together: TTS, asset downloads (unless shared
+                # by a batch) and logo fetches
+                voiceover = pipeline.submit("tts", self.generate_voiceover_with_timings, narration_text)
+                fetches = self.fetch_shared_assets(pipeline, template_video, bgm) if owns_assets else {}
+                logos = [
+                    pipeline.submit(f"logo:{name}", self.logo_file, url)
+                    for name, url in (("client", client_logo_url), ("user", user_logo_url))
+                ] if client_logo_url and user_logo_url else []
+
+                # Save audio to temp file
+                audio_bytes_io, word_timings = voiceover.result()
+                audio_bytes = audio_bytes_io.read()
+                audio_suffix = ".wav" if audio_bytes[:4] == b"RIFF" else ".mp3"
+                temp_audio_file = tempfile.NamedTemporaryFile(delete=False, suffix=audio_suffix)
+                temp_audio_file.write(audio_bytes)
+                temp_audio_file.close()
+                self.temp_files.append(temp_audio_file.name)
+
+                # Load audio and get duration
+                voiceover_audio_clip = resources.track(AudioFileClip(temp_audio_file.name))
+
+                # Time subtitles against the narration audio while downloads finish
+                with pipeline.stage("subtitles"):
+                    segments = self.subtitle_segments(narration_text, temp_audio_file.name, word_timings)
+
+                resources.check("subtitles")
+
+                if owns_assets:
+                    assets = self.open_assets(
+                        **{name: future.result() for name, future in fetches.items()},
+                        resources=resources
+                    )
+                client_logo, user_logo = [logo.result() for logo in logos] or (None, None)
 
-            user_logo_img = (
-                self.imageclip_from_buffer(user_logo_buffer)
-                .resize(width=logo_width)
-                .set_duration(2)
-                .set_start(2)
-                .set_position("center")
-            )
+                with pipeline.stage("timeline"):
+                    timeline = self.build_timeline(
+                        assets, temp_audio_file.name, voiceover_audio_clip.duration, segments,
+                        client_logo, user_logo, text_layovers, selected_font
+                    )
+                resources.check("timeline")
+                if max_output_mb is not None:
+                    profile = self.size_capped_profile(profile, timeline, max_output_mb)
+
+                # Clips that are already open; the renderer reuses them instead of reopening
+                open_clips = {
+                    path: clip for path, clip in (
+                        (assets["template_video_path"], assets["template_clip"]),
+                        (assets["disclaimer_path"], assets["disclaimer_clip"]),
+                        (assets["bgm_path"], assets["bgm_clip"]),
+                        (temp_audio_file.name, voiceover_audio_clip),
+                    ) if clip is not None
+                }
+
+                if preview or on_preview:
+                    preview_url = self.render_output(
+                        pipeline,
+                        self.preview_timeline(timeline),
+                        # The template is reopened so it is decoded at preview size
+                        {p: c for p, c in open_clips.items() if p != assets["template_video_path"]},
+                        f"{Path(output_filename).stem}-preview{Path(output_filename).suffix or '.mp4'}",
+                        upload_to_s3,
+                        resources,
+                        preview=True
+                    )
+                    if preview:
+                        return preview_url
+                    on_preview(preview_url)
 
-            logo_intro = CompositeVideoClip(
-                [background_clip, client_logo_img, user_logo_img]
-            ).set_duration(4)
-
-            # Compose intro sequence
-            if disclaimer_clip:
-                intro_sequence = concatenate_videoclips([disclaimer_clip, logo_intro])
-            else:
-                intro_sequence = logo_intro
-
-            intro_duration = intro_sequence.duration
-            clips_to_combine.append(intro_sequence)
-
-            # Adjust main video timing
-            video = video.subclip(
-                min(video.duration, 4),
-                min(video.duration, 4 + voiceover_duration)
-            ).set_start(intro_duration)
-
-            # Add fixed logos for main video
-            logo_size = (180, 180)
-
-            logo_fixed_client = (
-                self.imageclip_from_buffer(client_logo_buffer)
-                .resize(logo_size)
-                .set_position((30, 30))
-                .set_start(intro_duration)
-                .set_duration(voiceover_duration)
-            )
+                return self.render_output(
+                    pipeline, timeline, open_clips, output_filename, upload_to_s3, resources, profile=profile
+                )
+            finally:
+                print(f"⏱️ Stages: {pipeline.summary()}")
+                resources.close()
+                print(f"🧠 Job memory: {resources.summary()}")
 
-            logo_fixed_user = (
-                self.imageclip_from_buffer(user_logo_buffer)
-                .resize(logo_size)
-                .set_position((video.w - logo_size[0] - 30, 30))
-                .set_start(intro_duration)
-                .set_duration(voiceover_duration)
-            )
+    def preview_timeline(self, timeline: Timeline) -> Timeline:
+        """Low-resolution, low-fps copy of `timeline` for a fast preview render"""
+        def image_size(path: str) -> Tuple[int, int]:
+            with Image.open(path) as img:
+                return img.size
 
-            clips_to_combine.extend([video, logo_fixed_client, logo_fixed_user])
-        else:
-            intro_duration = 0
-            if disclaimer_clip:
-                clips_to_combine.append(disclaimer_clip)
-                intro_duration = disclaimer_duration
-            clips_to_combine.append(video.set_start(intro_duration))
-
-        # Prepare audio tracks
-        voiceover_audio = voiceover_audio_clip.set_start(disclaimer_duration).volumex(1.0)
-        bgm_audio = (
-            AudioFileClip(bgm_path)
-            .volumex(0.1)
-            .set_start(0)
-            .set_duration(intro_duration + voiceover_duration)
-        )
-        combined_audio = CompositeAudioClip([bgm_audio, voiceover_audio])
-
-        # Generate subtitles
-        subtitle_clips = []
-        for seg in result["segments"]:
-            start_time = disclaimer_duration + seg["start"]
-            duration = seg["end"] - seg["start"]
-
-            subtitle = (
-                TextClip(
-                    seg["text"],
-                    font=selected_font,
-                    fontsize=30,
-                    color='yellow',
-                    stroke_color='black',
-                    stroke_width=2,
-                    size=(video.w - 100, None),
-                    method='caption'
-                )
-                .set_start(start_time)
-                .set_duration(duration)
-                .set_position(('center', video.h - 150))
-            )
-            subtitle_clips.append(subtitle)
+        return timeline.scaled(self.config.preview_height, self.config.preview_fps, image_size)
 
-        clips_to_combine.extend(subtitle_clips)
+    def render_output(
+        self,
+        pipeline: Pipeline,
+        timeline: Timeline,
+        open_clips: Dict[str, Any],
+        output_filename: str,
+        upload_to_s3: bool,
+        resources: Optional[JobResources] = None,
+        preview: bool = False,
+        profile: Optional[EncodingProfile] = None
+    ) -> str:
+        """
+        Render `timeline` with the configured backend and `profile` (by default
+        the configured one for `preview`) and upload it; returns the URL or local path
+        """
+        profile = profile or self.default_profile(preview)
+        local_file = Path(self.config.output_directory) / output_filename
+        stage = "preview" if preview else "render"
 
-        # Add text layovers
-        if text_layovers:
-            print(f"📺 Adding {len(text_layovers)} text layovers")
-            for item in text_layovers:
-                overlay = (
-                    TextClip(
-                        item["text"],
-                        font=selected_font,
-                        fontsize=item.get("font_size", 100),
-                        color=item.get("color", "white"),
-                        stroke_color=item.get("stroke_color", "black"),
-                        stroke_width=item.get("stroke_width", 3),
-                        size=(video.w - 200, None),
-                        method='caption'
+        if upload_to_s3 and self.config.stream_upload:
+            print(f"🎥 Streaming {'preview' if preview else 'video'} to: s3://{self.config.s3_bucket_name}/{output_filename}")
+            try:
+                with pipeline.stage(f"{stage}+upload"):
+                    upload = self.render_to(
+                        timeline, open_clips, str(local_file), preview,
+                        lambda pipe, wait: self.uploader.upload_stream(pipe, output_filename, before_complete=wait),
+                        resources,
+                        profile
                     )
-                    .set_start(item.get("start_time", 0))
-                    .set_duration(item.get("duration", 3))
-                    .set_position('center')
-                )
-                clips_to_combine.append(overlay)
-                print(f"  ✅ {item['text']} @ {item.get('start_time', 0)}s")
-
-        # Compose final video
-        final = CompositeVideoClip(clips_to_combine, size=(video.w, video.h))
-        final = final.set_audio(combined_audio)
-        final = final.subclip(0, disclaimer_duration + voiceover_duration)
+                print(f"✅ Uploaded to S3: s3://{self.config.s3_bucket_name}/{output_filename} (sha256 {upload['sha256'][:12]})")
+                video_url = self.cloudfront_url(output_filename)
+                print(f"🌐 Video URL: {video_url}")
+                return video_url
+            except Exception as e:
+                if resources:
+                    resources.raise_if_exceeded(e)
+                print(f"⚠️ Streaming upload failed, rendering to disk instead: {e}")
 
-        # Write video file
-        local_file = output_dir / output_filename
-        print(f"🎥 Rendering video to: {local_file}")
-        final.write_videofile(
-            str(local_file),
-            fps=self.config.video_fps,
-            codec="libx264",
-            audio_codec="aac",
-            verbose=False,
-            logger=None
+        print(
+            f"🎥 Rendering {'preview' if preview else 'video'} to: {local_file} "
+            f"({self.config.render_backend}, {profile.name})"
         )
-
-        # Close resources
-        voiceover_audio_clip.close()
-        final.close()
+        with pipeline.stage(stage):
+            self.render_to(timeline, open_clips, str(local_file), preview, resources=resources, profile=profile)
+        if resources:
+            resources.check(stage)
 
         print(f"✅ Video generated: {local_file}")
+        print(f"📦 Asset cache: {self.asset_cache.stats}")
+        print(f"🌐 HTTP: {self.asset_cache.http.summary()}")
 
         # Upload to S3 if requested
         if upload_to_s3:
             try:
-                video_url = self.upload_to_s3(str(local_file), output_filename)
+                with pipeline.stage(f"upload:{stage}"):
+                    video_url = self.upload_to_s3(str(local_file), output_filename)
                 print(f"🌐 Video URL: {video_url}")
                 return video_url
             except Exception as e:
@@ -521,9 +1264,189 @@ class VideoGenerator:
 
         return str(local_file)
 
+    def render_to(
+        self,
+        timeline: Timeline,
+        open_clips: Dict[str, Any],
+        local_file: str,
+        preview: bool = False,
+        consume: Optional[StreamConsumer] = None,
+        resources: Optional[JobResources] = None,
+        profile: Optional[EncodingProfile] = None
+    ) -> Any:
+        """Render with the configured backend to local_file, or to `consume`; returns what `consume` returns"""
+        # Keeps the consumer's result (e.g. the upload's checksum)
+        results: List[Any] = []
+        sink = (lambda pipe, wait: results.append(consume(pipe, wait))) if consume else None
+
+        if self.config.render_backend == 'ffmpeg':
+            self.render_with_ffmpeg(timeline, local_file, preview, sink, profile)
+        else:
+            sources = dict(open_clips)
+            try:
+                self.render_with_moviepy(
+                    timeline, sources, local_file, preview, sink,
+                    track=resources.track if resources else None,
+                    profile=profile
+                )
+            finally:
+                # Close only what the renderer opened itself
+                for path, clip in sources.items():
+                    if path not in open_clips:
+                        if resources:
+                            resources.release(clip)
+                        else:
+                            clip.close()
+        return results[-1] if results else None
+
+
+# Per-process state for render_parallel() pool workers
+_worker_generator: Optional[VideoGenerator] = None
+_worker_shared_assets: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _init_render_worker(config: VideoGeneratorConfig, threads_per_worker: int):
+    """
+    Pool initializer: build one generator per process, load Whisper if used and
+    open the default template/BGM/disclaimer. That warms the (None, None) shared
+    assets key, which every job on the default assets uses whatever its encoding
+    profile or max_output_mb (see VideoGenerator.shared_assets_key); jobs naming
+    other assets open them on first use.
+    """
+    global _worker_generator
+
+    # The caller's config arrives pickled, so each worker has its own copy to adjust
+    config.ffmpeg_threads = threads_per_worker
+    _worker_generator = VideoGenerator(config)
+
+    if config.subtitle_timing == "whisper":
+        import torch
+        torch.set_num_threads(threads_per_worker)
+        _worker_generator.get_whisper_model()
+
+    # Default template/BGM/disclaimer stay open for every job this worker runs
+    try:
+        _worker_shared_assets[(None, None)] = _worker_generator.open_shared_assets()
+    except Exception as e:
+        print(f"⚠️ Asset warmup failed, jobs will fetch on demand: {e}", file=sys.stderr)
+
+
+def _render_worker_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    with contextlib.redirect_stdout(sys.stderr):
+        return _worker_generator.run_batch_job(job, _worker_shared_assets)
+
+
+def render_parallel(
+    jobs: Iterable[Dict[str, Any]],
+    workers: Optional[int] = None,
+    config: Optional[VideoGeneratorConfig] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Render jobs across a pool of worker processes, yielding results as they finish.
+
+    CPU cores are split evenly between workers and each worker's ffmpeg and torch
+    thread counts are capped to its share, so N workers do not oversubscribe the box.
+    Every worker renders with `config` (default: from the environment).
+    scripts/bench-render-workers.py measures throughput against the worker count.
+    """
+    config = config or VideoGeneratorConfig()
+    workers = workers or config.render_workers or os.cpu_count() or 1
+    threads_per_worker = config.ffmpeg_threads or max(1, (os.cpu_count() or 1) // workers)
+    print(f"🧵 Rendering with {workers} workers x {threads_per_worker} threads", file=sys.stderr)
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_render_worker, initargs=(config, threads_per_worker)) as pool:
+        for result in pool.imap_unordered(_render_worker_job, jobs):
+            yield result
+
+
+def read_jobs_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield job dicts from a JSON Lines file ("-" for stdin)"""
+    with (contextlib.nullcontext(sys.stdin) if path == "-" else open(path, "r")) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def run_jobs_file(
+    path: str,
+    workers: int = 1,
+    preview: bool = False,
+    encoding_profile: Optional[str] = None,
+    max_output_mb: Optional[float] = None
+) -> int:
+    """
+    Render every job in a JSON Lines file, writing one JSON result per line to
+    stdout. `encoding_profile` and `max_output_mb` apply to jobs that do not
+    set their own.
+    """
+    results = sys.stdout
+    failed = 0
+    jobs = read_jobs_file(path)
+    if preview:
+        jobs = (dict(job, preview=True) for job in jobs)
+    if encoding_profile:
+        jobs = ({"encoding_profile": encoding_profile, **job} for job in jobs)
+    if max_output_mb is not None:
+        if max_output_mb <= 0:
+            raise ValueError(f"max_output_mb must be positive, got {max_output_mb}")
+        jobs = ({"max_output_mb": max_output_mb, **job} for job in jobs)
+
+    # Progress output goes to stderr so stdout carries only results
+    with contextlib.redirect_stdout(sys.stderr), contextlib.ExitStack() as stack:
+        if workers > 1:
+            batch = render_parallel(jobs, workers)
+        else:
+            generator = stack.enter_context(VideoGenerator())
+            batch = generator.generate_batch(jobs)
+
+        for result in batch:
+            if not result["success"]:
+                failed += 1
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+
+    return 1 if failed else 0
+
 
 def main():
-    """Example usage"""
+    """Example usage, or batch rendering with --jobs-file"""
+    parser = argparse.ArgumentParser(description="Generate personalized marketing videos")
+    parser.add_argument(
+        "--jobs-file",
+        help="JSON Lines file of generate_video() arguments (plus optional job_id), or - for stdin"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("RENDER_WORKERS", "1")),
+        help="With --jobs-file, number of render processes (default RENDER_WORKERS or 1)"
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Render fast low-resolution previews (PREVIEW_HEIGHT / PREVIEW_FPS) instead of full quality"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        help="Encoding profile for full-quality renders (default ENCODING_PROFILE); "
+             "jobs can set their own with \"encoding_profile\""
+    )
+    parser.add_argument(
+        "--max-output-mb",
+        type=float,
+        help="Size limit for full-quality videos, met in the same encode; "
+             "jobs can set their own with \"max_output_mb\""
+    )
+    args = parser.parse_args()
+    if args.max_output_mb is not None and args.max_output_mb <= 0:
+        parser.error("--max-output-mb must be positive")
+
+    if args.jobs_file:
+        return run_jobs_file(args.jobs_file, args.workers, args.preview, args.profile, args.max_output_mb)
+
     narration_text = "Hello! Welcome to Critical River. We are excited to have you on board. Let's achieve great things together!"
 
     client_logo_url = "https://img.freepik.com/premium-vector/abstract-logo-design-any-corporate-brand-business-company_1253202-84182.jpg"
@@ -540,10 +1463,14 @@ def main():
             client_logo_url=client_logo_url,
             user_logo_url=user_logo_url,
             text_layovers=text_layovers,
-            upload_to_s3=True
+            upload_to_s3=True,
+            preview=args.preview,
+            encoding_profile=args.profile,
+            max_output_mb=args.max_output_mb
         )
         print(f"🎉 Final video URL: {video_url}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -5,14 +5,17 @@ Uses ElevenLabs for TTS and MoviePy for video editing
 No Whisper dependency - uses simple text overlays instead
 """
 
+import io
 import os
 import sys
 import json
 import argparse
 import tempfile
 import logging
+import shutil
+import socketserver
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple
 from dotenv import load_dotenv
 
 # Configure logging
@@ -23,13 +26,21 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 try:
-    from moviepy.editor import (
-        VideoFileClip, AudioFileClip, ImageClip,
-        TextClip, CompositeVideoClip, concatenate_videoclips
-    )
+    from moviepy.editor import AudioFileClip, ImageClip
     from PIL import Image
     import requests
     import boto3
+    from video_asset_cache import AssetCache, VoiceoverCache, MediaIndex
+    from video_captions import caption_clip
+    from video_encoding import EncodingProfile, PROFILES, get_profile
+    from video_media_info import MediaInfo
+    from moviepy.config import get_setting
+    from video_moviepy_render import timeline_clip, stream_clip
+    from video_overlays import flatten_static_overlays
+    from video_pipeline import Pipeline
+    from video_resources import JobResources, ResourceLimitExceeded
+    from video_s3_upload import S3Uploader
+    from video_timeline import Timeline, VisualLayer, AudioLayer
 except ImportError as e:
     logger.error(f"Missing dependency: {e}")
     logger.error("Install with: pip install moviepy pillow requests boto3")
@@ -60,8 +71,39 @@ class VideoGeneratorLite:
         else:
             self.s3_client = None
             logger.warning("AWS credentials not found - S3 upload disabled")
+        self.uploader = S3Uploader.from_env(self.s3_client, self.s3_bucket) if self.s3_client else None
+        # Stream the encoder's fragmented MP4 straight into a multipart upload
+        self.stream_upload = os.getenv('STREAM_UPLOAD', 'false').lower() == 'true'
+
+        # Preview renders: frame height and fps
+        self.preview_height = int(os.getenv('PREVIEW_HEIGHT', '480'))
+        self.preview_fps = int(os.getenv('PREVIEW_FPS', '12'))
+
+        # Output frame size and rate (when there is no template, and for ingest)
+        self.video_width = int(os.getenv('VIDEO_WIDTH', '1920'))
+        self.video_height = int(os.getenv('VIDEO_HEIGHT', '1080'))
+        self.video_fps = int(os.getenv('VIDEO_FPS', '24'))
+
+        # Normalize each template once to the output size and rate (short GOPs), so
+        # renders never resize its frames
+        self.template_ingest = os.getenv('TEMPLATE_INGEST', 'true').lower() == 'true'
+
+        # Encoding profiles (video_encoding) for full renders and previews
+        self.encoding_profile = os.getenv('ENCODING_PROFILE', 'standard')
+        self.preview_encoding_profile = os.getenv('PREVIEW_ENCODING_PROFILE', 'preview')
+        # Size limit (MB) for full-quality videos of jobs that do not set their own
+        self.max_output_mb: Optional[float] = None
+
+        # Threads for the stages that overlap (narration, template and logo downloads)
+        self.pipeline_threads = int(os.getenv('PIPELINE_THREADS', '6'))
+
+        # Merge the two corner logos into one pre-sized image layer
+        self.flatten_overlays = os.getenv('FLATTEN_OVERLAYS', 'true').lower() == 'true'
 
         self.temp_files = []
+        self.asset_cache = AssetCache.from_env()
+        self.voiceover_cache = VoiceoverCache.from_env()
+        self.media_index = MediaIndex.from_env(get_setting('FFMPEG_BINARY'))
 
     def cleanup(self):
         """Clean up temporary files"""
@@ -71,6 +113,48 @@ class VideoGeneratorLite:
                     os.remove(file_path)
             except Exception as e:
                 logger.warning(f"Failed to clean up {file_path}: {e}")
+        # The generator is reused across jobs in server mode
+        self.temp_files.clear()
+
+    def remove_temp_dir(self, temp_dir: str, keep: Optional[List[str]] = None):
+        """
+        Delete a job's working directory, which holds the full-size render, so a
+        resident --serve process does not fill the disk. Files in `keep` that
+        are inside it (renders returned as local paths) are left in place.
+        """
+        keep = {os.path.abspath(path) for path in keep or () if path and os.path.exists(path)}
+        if not any(os.path.dirname(path) == os.path.abspath(temp_dir) for path in keep):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+        for name in os.listdir(temp_dir):
+            path = os.path.abspath(os.path.join(temp_dir, name))
+            if path in keep:
+                continue
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to clean up {path}: {e}")
+
+    def restore_cached_audio(self, cache_key: str, output_path: str) -> bool:
+        """Copy a cached voiceover to output_path; returns False on a cache miss"""
+        cached = self.voiceover_cache.get(cache_key)
+        if not cached:
+            return False
+
+        shutil.copyfile(cached[0], output_path)
+        logger.info(f"Reusing cached audio ({self.voiceover_cache.stats})")
+        return True
+
+    def store_cached_audio(self, cache_key: str, audio_path: str):
+        """Add freshly synthesized audio to the voiceover cache"""
+        try:
+            with open(audio_path, 'rb') as f:
+                self.voiceover_cache.put(cache_key, f.read())
+        except Exception as e:
+            logger.warning(f"Failed to cache audio: {e}")
 
     def generate_audio_elevenlabs(self, text: str, output_path: str) -> bool:
         """Generate audio using ElevenLabs API"""
@@ -78,6 +162,10 @@ class VideoGeneratorLite:
             logger.error("ElevenLabs API key not configured")
             return False
 
+        cache_key = VoiceoverCache.key(text, "Adam", "eleven_monolingual_v1", "mp3")
+        if self.restore_cached_audio(cache_key, output_path):
+            return True
+
         try:
             from elevenlabs import generate, save
 
@@ -89,6 +177,7 @@ class VideoGeneratorLite:
             )
 
             save(audio, output_path)
+            self.store_cached_audio(cache_key, output_path)
             logger.info(f"Audio saved to {output_path}")
             return True
 
@@ -113,9 +202,14 @@ class VideoGeneratorLite:
 
             lang, tld = voice_map.get(voice_id, ('en', 'us'))
 
+            cache_key = VoiceoverCache.key(text, f"{lang}-{tld}", "gtts", "mp3")
+            if self.restore_cached_audio(cache_key, output_path):
+                return True
+
             logger.info(f"Generating audio with gTTS (voice: {voice_id}, lang: {lang}, tld: {tld})...")
             tts = gTTS(text=text, lang=lang, tld=tld, slow=False)
             tts.save(output_path)
+            self.store_cached_audio(cache_key, output_path)
             logger.info(f"Audio saved to {output_path}")
             return True
 
@@ -126,17 +220,61 @@ class VideoGeneratorLite:
             logger.error(f"gTTS generation failed: {e}")
             return False
 
-    def download_file(self, url: str, output_path: str) -> bool:
-        """Download file from URL"""
+    def generate_audio(
+        self,
+        script: str,
+        output_path: str,
+        voice_id: str = 'gtts-en-us',
+        custom_voice_url: Optional[str] = None
+    ):
+        """Write the narration to output_path: custom voice, then ElevenLabs, then gTTS"""
+        audio_generated = False
+
+        # Priority 1: Custom uploaded voice
+        if custom_voice_url:
+            logger.info(f"Using custom voice from: {custom_voice_url}")
+            audio_generated = self.download_file(custom_voice_url, output_path)
+
+        # Priority 2: ElevenLabs (if API key available)
+        if not audio_generated and self.elevenlabs_api_key:
+            audio_generated = self.generate_audio_elevenlabs(script, output_path)
+
+        # Priority 3: gTTS with selected voice/accent
+        if not audio_generated:
+            audio_generated = self.generate_audio_gtts(script, output_path, voice_id)
+
+        if not audio_generated:
+            raise Exception("Failed to generate audio")
+
+    def fetch_cached(self, url: str, suffix: str = '') -> Optional[str]:
+        """Return a shared cached copy of URL (must not be modified or deleted)"""
         try:
             logger.info(f"Downloading {url}...")
-            response = requests.get(url, stream=True, timeout=60)
-            response.raise_for_status()
+            cached_path = self.asset_cache.fetch(url, suffix)
+            logger.info(f"Cached at {cached_path}")
+            return cached_path
 
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        except Exception as e:
+            logger.error(f"Download failed: {e}")
+            return None
 
+    def fetch_template(self, url: str) -> Optional[str]:
+        """Cached template download, ingested into a render-ready mezzanine copy; None if the download failed"""
+        template_path = self.fetch_cached(url, 'mp4')
+        if template_path and self.template_ingest:
+            template_path = self.media_index.normalized(
+                template_path, self.video_width, self.video_height, self.video_fps
+            )
+        return template_path
+
+    def download_file(self, url: str, output_path: str) -> bool:
+        """Download file from URL"""
+        cached_path = self.fetch_cached(url)
+        if not cached_path:
+            return False
+
+        try:
+            shutil.copyfile(cached_path, output_path)
             logger.info(f"Downloaded to {output_path}")
             return True
 
@@ -144,6 +282,13 @@ class VideoGeneratorLite:
             logger.error(f"Download failed: {e}")
             return False
 
+    def fetch_logo(self, url: str, logo_path: str) -> Optional[str]:
+        """Download a logo to logo_path and scale it for the corner; None if the download failed"""
+        self.temp_files.append(logo_path)
+        if not self.download_file(url, logo_path):
+            return None
+        return self.resize_logo(logo_path, max_height=80)
+
     def resize_logo(self, logo_path: str, max_height: int = 100) -> str:
         """Resize logo to fit video"""
         try:
@@ -164,16 +309,17 @@ class VideoGeneratorLite:
             logger.error(f"Logo resize failed: {e}")
             return logo_path
 
-    def create_simple_text_overlay(self, text: str, video_size: tuple, duration: float) -> TextClip:
+    def create_simple_text_overlay(self, text: str, video_size: tuple, duration: float) -> ImageClip:
         """Create a simple text overlay"""
         try:
-            txt_clip = TextClip(
+            txt_clip = caption_clip(
                 text,
-                fontsize=40,
+                'Arial-Bold',
+                40,
                 color='white',
-                font='Arial-Bold',
                 stroke_color='black',
-                stroke_width=2
+                stroke_width=2,
+                box_width=video_size[0] - 200
             )
             txt_clip = txt_clip.set_position('center').set_duration(duration)
             return txt_clip
@@ -181,6 +327,167 @@ class VideoGeneratorLite:
             logger.warning(f"Text overlay creation failed: {e}")
             return None
 
+    def build_timeline(
+        self,
+        audio_path: str,
+        duration: float,
+        template_path: Optional[str] = None,
+        template_info: Optional[MediaInfo] = None,
+        client_logo_path: Optional[str] = None,
+        user_logo_path: Optional[str] = None
+    ) -> Timeline:
+        """Template (looped to the narration length) or a plain background, logos 20px in from the top corners"""
+        if template_info is not None:
+            width, height = template_info.size
+            background = VisualLayer(
+                template_path, 0, duration, full_frame=True,
+                loop=template_info.duration < duration, name='body'
+            )
+        else:
+            width, height = self.video_width, self.video_height
+            background = VisualLayer('#141428', 0, duration, kind='color', full_frame=True, name='body')
+
+        layers = [background]
+        if client_logo_path:
+            with Image.open(client_logo_path) as img:
+                logo_width = img.width
+            layers.append(VisualLayer(
+                client_logo_path, 0, duration, kind='image',
+                x=width - logo_width - 20, y=20, name='client_logo'
+            ))
+        if user_logo_path:
+            layers.append(VisualLayer(
+                user_logo_path, 0, duration, kind='image', x=20, y=20, name='user_logo'
+            ))
+
+        timeline = Timeline(
+            width=width,
+            height=height,
+            fps=self.video_fps,
+            duration=duration,
+            layers=tuple(layers),
+            audio=(AudioLayer(audio_path, 0, duration),)
+        )
+        if self.flatten_overlays:
+            timeline = flatten_static_overlays(timeline, self.save_temp_png)
+        return timeline
+
+    @staticmethod
+    def image_size(path: str) -> Tuple[int, int]:
+        """Pixel size of an image file, closing it again (the --serve process outlives many jobs)"""
+        with Image.open(path) as img:
+            return img.size
+
+    def save_temp_png(self, image: Image.Image) -> str:
+        """Write an image to a temp PNG that is removed by cleanup()"""
+        png_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
+        png_file.close()
+        image.save(png_file.name, format='PNG')
+        self.temp_files.append(png_file.name)
+        return png_file.name
+
+    def render_file(
+        self,
+        timeline: Timeline,
+        sources: Dict[str, Any],
+        output_path: str,
+        temp_dir: str,
+        profile: EncodingProfile,
+        track: Optional[Callable[[Any], Any]] = None
+    ):
+        """Composite `timeline` with MoviePy and encode it to output_path with `profile`"""
+        final_clip = timeline_clip(timeline, sources, track)
+        try:
+            final_clip.write_videofile(
+                output_path,
+                fps=timeline.fps,
+                threads=profile.encoder_threads() or None,
+                temp_audiofile=os.path.join(temp_dir, 'temp-audio.m4a'),
+                remove_temp=True,
+                logger=None,  # Suppress moviepy progress bars
+                **profile.moviepy_params()
+            )
+        finally:
+            final_clip.close()
+
+    def s3_url(self, s3_key: str) -> str:
+        return f"https://{self.s3_bucket}.s3.{self.aws_region}.amazonaws.com/{s3_key}"
+
+    def publish(self, output_path: str, output_filename: str) -> str:
+        """Upload a rendered file to S3 and return its URL (or the local path without S3)"""
+        if not self.s3_client:
+            logger.warning("S3 client not configured - video saved locally only")
+            return output_path
+
+        s3_key = f"generated-videos/{output_filename}"
+        logger.info(f"Uploading to S3: {self.s3_bucket}/{s3_key}")
+
+        self.uploader.upload_file(output_path, s3_key)
+
+        s3_url = self.s3_url(s3_key)
+        logger.info(f"Video uploaded: {s3_url}")
+        return s3_url
+
+    def stream_publish(
+        self,
+        timeline: Timeline,
+        sources: Dict[str, Any],
+        output_filename: str,
+        profile: EncodingProfile,
+        track: Optional[Callable[[Any], Any]] = None
+    ) -> str:
+        """Encode `timeline` straight into a multipart S3 upload, without writing the MP4 locally"""
+        s3_key = f"generated-videos/{output_filename}"
+        logger.info(f"Streaming to S3: {self.s3_bucket}/{s3_key}")
+
+        final_clip = timeline_clip(timeline, sources, track)
+        try:
+            stream_clip(
+                final_clip,
+                timeline.fps,
+                lambda pipe, wait: self.uploader.upload_stream(pipe, s3_key, before_complete=wait),
+                get_setting('FFMPEG_BINARY'),
+                profile
+            )
+        finally:
+            final_clip.close()
+
+        s3_url = self.s3_url(s3_key)
+        logger.info(f"Video uploaded: {s3_url}")
+        return s3_url
+
+    def render_output(
+        self,
+        pipeline: Pipeline,
+        timeline: Timeline,
+        sources: Dict[str, Any],
+        output_filename: str,
+        temp_dir: str,
+        stage: str = 'render',
+        profile: Optional[EncodingProfile] = None,
+        resources: Optional[JobResources] = None
+    ) -> str:
+        """Render and publish `timeline`, streaming it to S3 when STREAM_UPLOAD is on"""
+        profile = profile or get_profile(self.encoding_profile)
+        track = resources.track if resources else None
+        if self.stream_upload and self.uploader:
+            try:
+                with pipeline.stage(f"{stage}+upload"):
+                    return self.stream_publish(timeline, sources, output_filename, profile, track)
+            except Exception as e:
+                if resources:
+                    resources.raise_if_exceeded(e)
+                logger.warning(f"Streaming upload failed, rendering to disk instead: {e}")
+
+        output_path = os.path.join(temp_dir, output_filename)
+        logger.info(f"Rendering to {output_path} ({profile.name})...")
+        with pipeline.stage(stage):
+            self.render_file(timeline, sources, output_path, temp_dir, profile, track=track)
+        if resources:
+            resources.check(stage)
+        with pipeline.stage(f"upload:{stage}"):
+            return self.publish(output_path, output_filename)
+
     def generate_video(
         self,
         script: str,
@@ -189,145 +496,253 @@ class VideoGeneratorLite:
         user_logo_url: Optional[str] = None,
         output_filename: str = "output.mp4",
         voice_id: str = 'gtts-en-us',
-        custom_voice_url: Optional[str] = None
+        custom_voice_url: Optional[str] = None,
+        preview: bool = False,
+        on_preview: Optional[Callable[[str], None]] = None,
+        encoding_profile: Optional[str] = None,
+        max_output_mb: Optional[float] = None
     ) -> str:
-        """Generate video with narration and overlays"""
-
+        """
+        Generate video with narration and overlays
+
+        With preview=True only a low-resolution, low-fps preview is rendered and
+        returned. With on_preview, the preview is rendered first and passed to
+        the callback, then the full-quality render reuses the same narration.
+        encoding_profile names the full-quality render's profile (default
+        ENCODING_PROFILE); previews use PREVIEW_ENCODING_PROFILE. max_output_mb
+        caps the full-quality render's video bitrate from the narration length so
+        the file fits that size in the same encode.
+        """
+        # Unknown profile names and bad size limits fail here, before any work is done
+        profile = get_profile(encoding_profile or self.encoding_profile)
+        preview_profile = get_profile(self.preview_encoding_profile)
+        if max_output_mb is None:
+            max_output_mb = self.max_output_mb
+        if max_output_mb is not None and max_output_mb <= 0:
+            raise ValueError(f"max_output_mb must be positive, got {max_output_mb}")
+
+        pipeline = Pipeline(self.pipeline_threads)
+        # Owns every clip this job opens; all of them are closed when it ends
+        resources = JobResources.from_env(output_filename).start()
+        temp_dir = None
+        # Rendered files handed back as local paths (no S3), kept when temp_dir is removed
+        outputs: List[str] = []
         try:
             # Create temp directory
             temp_dir = tempfile.mkdtemp()
             logger.info(f"Working directory: {temp_dir}")
 
-            # Step 1: Generate or download audio
+            # Steps 1-3 are independent: narration, template and logos are fetched concurrently
             audio_path = os.path.join(temp_dir, "narration.mp3")
             self.temp_files.append(audio_path)
+            narration = pipeline.submit(
+                'tts', self.generate_audio, script, audio_path, voice_id, custom_voice_url
+            )
+            template = pipeline.submit(
+                'asset:template', self.fetch_template, template_url
+            ) if template_url else None
+            client_logo = pipeline.submit(
+                'logo:client', self.fetch_logo, client_logo_url, os.path.join(temp_dir, "client_logo.png")
+            ) if client_logo_url and not client_logo_url.startswith('blob:') else None
+            user_logo = pipeline.submit(
+                'logo:user', self.fetch_logo, user_logo_url, os.path.join(temp_dir, "user_logo.png")
+            ) if user_logo_url and user_logo_url != 'w' and not user_logo_url.startswith('blob:') else None
+
+            # Step 1: Load audio to get duration
+            narration.result()
+            audio_clip = resources.track(AudioFileClip(audio_path))
+            video_duration = audio_clip.duration
+            logger.info(f"Audio duration: {video_duration:.2f} seconds")
 
-            audio_generated = False
-
-            # Priority 1: Custom uploaded voice
-            if custom_voice_url:
-                logger.info(f"Using custom voice from: {custom_voice_url}")
-                audio_generated = self.download_file(custom_voice_url, audio_path)
+            # Step 2: Plan the template from the media index (probed once per version);
+            # one shorter than the narration is looped by ffmpeg into a single file
+            template_path = template.result() if template else None
+            template_info = None
+            if template_path:
+                template_path = self.media_index.looped(template_path, video_duration)
+                template_info = self.media_index.info(template_path)
+
+            # Step 3: Logos
+            client_logo_path = client_logo.result() if client_logo else None
+            user_logo_path = user_logo.result() if user_logo else None
+
+            # Step 4: Lay out the video
+            timeline = self.build_timeline(
+                audio_path, video_duration, template_path, template_info,
+                client_logo_path, user_logo_path
+            )
+            resources.check('timeline')
+            if max_output_mb is not None:
+                profile = profile.within_size(max_output_mb, timeline.duration)
+                logger.info(f"Capping video at {profile.maxrate_kbps} kbit/s for {max_output_mb:g} MB")
+
+            # Step 5: Render (a quick low-resolution preview first if requested) and upload
+            sources = {audio_path: audio_clip}
+
+            if preview or on_preview:
+                preview_name = f"{Path(output_filename).stem}-preview{Path(output_filename).suffix or '.mp4'}"
+                preview_timeline = timeline.scaled(
+                    self.preview_height,
+                    self.preview_fps,
+                    image_size=self.image_size
+                )
+                logger.info(f"Rendering {preview_timeline.height}p preview...")
+                # Each render opens the template itself, decoded at that render's size
+                preview_sources = {audio_path: audio_clip}
+                try:
+                    preview_url = self.render_output(
+                        pipeline, preview_timeline, preview_sources, preview_name, temp_dir,
+                        stage='preview', profile=preview_profile, resources=resources
+                    )
+                    outputs.append(preview_url)
+                finally:
+                    for path, clip in preview_sources.items():
+                        if path not in sources:
+                            resources.release(clip)
+                if preview:
+                    return preview_url
+                on_preview(preview_url)
+
+            logger.info("Rendering video...")
+            video_url = self.render_output(
+                pipeline, timeline, sources, output_filename, temp_dir, profile=profile, resources=resources
+            )
+            outputs.append(video_url)
 
-            # Priority 2: ElevenLabs (if API key available)
-            if not audio_generated and self.elevenlabs_api_key:
-                audio_generated = self.generate_audio_elevenlabs(script, audio_path)
+            logger.info("Video generation complete!")
+            logger.info(f"Asset cache: {self.asset_cache.stats}")
+            logger.info(f"HTTP: {self.asset_cache.http.summary()}")
+            return video_url
 
-            # Priority 3: gTTS with selected voice/accent
-            if not audio_generated:
-                audio_generated = self.generate_audio_gtts(script, audio_path, voice_id)
+        except Exception as e:
+            logger.error(f"Video generation failed: {e}", exc_info=True)
+            resources.raise_if_exceeded(e)
+            raise
+        finally:
+            pipeline.close()
+            resources.close()
+            logger.info(f"Stage timings: {pipeline.summary()}")
+            logger.info(f"Job memory: {resources.summary()}")
+            self.cleanup()
+            if temp_dir:
+                self.remove_temp_dir(temp_dir, keep=outputs)
+
+
+def preview_result(video_url: str, job_id: Optional[str] = None) -> Dict[str, Any]:
+    """Interim result line for a preview rendered ahead of the full-quality video"""
+    result = {
+        'success': True,
+        'preview': True,
+        'video_url': video_url,
+        'message': 'Preview ready'
+    }
+    if job_id is not None:
+        result['job_id'] = job_id
+    return result
+
+
+def run_job(
+    generator: VideoGeneratorLite,
+    job: Dict[str, Any],
+    on_preview: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run a single job payload and return the CLI-compatible result dict.
+
+    `preview: true` renders only the preview; `preview_first: true` passes the
+    preview URL to on_preview and then renders the full-quality video.
+    `encoding_profile` picks the full-quality render's encoding profile and
+    `max_output_mb` its size limit.
+    """
+    try:
+        if not job.get('script'):
+            raise ValueError("script is required")
 
-            if not audio_generated:
-                raise Exception("Failed to generate audio")
+        video_url = generator.generate_video(
+            script=job['script'],
+            template_url=job.get('template'),
+            client_logo_url=job.get('client_logo'),
+            user_logo_url=job.get('user_logo'),
+            output_filename=job.get('output') or 'output.mp4',
+            voice_id=job.get('voice_id') or 'gtts-en-us',
+            custom_voice_url=job.get('custom_voice_url'),
+            preview=bool(job.get('preview')),
+            on_preview=on_preview if job.get('preview_first') else None,
+            encoding_profile=job.get('encoding_profile'),
+            max_output_mb=job.get('max_output_mb')
+        )
 
-            # Load audio to get duration
-            audio_clip = AudioFileClip(audio_path)
-            video_duration = audio_clip.duration
-            logger.info(f"Audio duration: {video_duration:.2f} seconds")
+        result = {
+            'success': True,
+            'video_url': video_url,
+            'message': 'Video generated successfully'
+        }
+    except Exception as e:
+        result = {
+            'success': False,
+            'error': str(e)
+        }
 
-            # Step 2: Get or create video clip
-            if template_url:
-                # Download template
-                template_path = os.path.join(temp_dir, "template.mp4")
-                self.temp_files.append(template_path)
+    if job.get('job_id') is not None:
+        result['job_id'] = job['job_id']
+    return result
 
-                if self.download_file(template_url, template_path):
-                    video_clip = VideoFileClip(template_path)
 
-                    # Loop video if shorter than audio
-                    if video_clip.duration < video_duration:
-                        repeats = int(video_duration / video_clip.duration) + 1
-                        video_clip = concatenate_videoclips([video_clip] * repeats)
+def serve_stream(generator: VideoGeneratorLite, infile, outfile) -> None:
+    """
+    Process newline-delimited JSON jobs from infile, one JSON result line per job
+    (preceded by a `"preview": true` line for preview_first jobs)
+    """
+    for line in infile:
+        line = line.strip()
+        if not line:
+            continue
 
-                    # Trim to match audio duration
-                    video_clip = video_clip.subclip(0, video_duration)
-                else:
-                    # Fallback to colored background
-                    video_clip = ColorClip(size=(1920, 1080), color=(20, 20, 40), duration=video_duration)
-            else:
-                # Create colored background
-                from moviepy.editor import ColorClip
-                video_clip = ColorClip(size=(1920, 1080), color=(20, 20, 40), duration=video_duration)
-
-            # Step 3: Add audio
-            video_clip = video_clip.set_audio(audio_clip)
-
-            # Step 4: Add logos
-            clips = [video_clip]
-
-            if client_logo_url and not client_logo_url.startswith('blob:'):
-                logo_path = os.path.join(temp_dir, "client_logo.png")
-                self.temp_files.append(logo_path)
-
-                if self.download_file(client_logo_url, logo_path):
-                    resized_logo = self.resize_logo(logo_path, max_height=80)
-                    logo_clip = ImageClip(resized_logo).set_duration(video_duration)
-                    logo_clip = logo_clip.set_position(('right', 'top')).margin(right=20, top=20, opacity=0)
-                    clips.append(logo_clip)
-
-            if user_logo_url and user_logo_url != 'w' and not user_logo_url.startswith('blob:'):
-                logo_path = os.path.join(temp_dir, "user_logo.png")
-                self.temp_files.append(logo_path)
-
-                if self.download_file(user_logo_url, logo_path):
-                    resized_logo = self.resize_logo(logo_path, max_height=80)
-                    logo_clip = ImageClip(resized_logo).set_duration(video_duration)
-                    logo_clip = logo_clip.set_position(('left', 'top')).margin(left=20, top=20, opacity=0)
-                    clips.append(logo_clip)
-
-            # Step 5: Composite video
-            final_clip = CompositeVideoClip(clips)
-
-            # Step 6: Write output
-            output_path = os.path.join(temp_dir, output_filename)
-            logger.info(f"Rendering video to {output_path}...")
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("job must be a JSON object")
+        except ValueError as e:
+            result = {'success': False, 'error': f"Invalid job: {e}"}
+        else:
+            logger.info(f"Received job {job.get('job_id', '')}".rstrip())
 
-            final_clip.write_videofile(
-                output_path,
-                fps=24,
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile=os.path.join(temp_dir, 'temp-audio.m4a'),
-                remove_temp=True,
-                logger=None  # Suppress moviepy progress bars
-            )
+            def emit_preview(video_url: str, job_id=job.get('job_id')):
+                outfile.write(json.dumps(preview_result(video_url, job_id)) + '\n')
+                outfile.flush()
 
-            # Close clips
-            final_clip.close()
-            audio_clip.close()
+            result = run_job(generator, job, on_preview=emit_preview)
 
-            logger.info("Video generation complete!")
+        outfile.write(json.dumps(result) + '\n')
+        outfile.flush()
 
-            # Step 7: Upload to S3
-            if self.s3_client:
-                s3_key = f"generated-videos/{output_filename}"
-                logger.info(f"Uploading to S3: {self.s3_bucket}/{s3_key}")
 
-                self.s3_client.upload_file(
-                    output_path,
-                    self.s3_bucket,
-                    s3_key,
-                    ExtraArgs={'ContentType': 'video/mp4'}
-                )
+def serve_socket(generator: VideoGeneratorLite, socket_path: str) -> None:
+    """Accept newline-delimited JSON jobs over a Unix socket, one connection at a time"""
 
-                s3_url = f"https://{self.s3_bucket}.s3.{self.aws_region}.amazonaws.com/{s3_key}"
-                logger.info(f"Video uploaded: {s3_url}")
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            serve_stream(
+                generator,
+                io.TextIOWrapper(self.rfile, encoding='utf-8'),
+                io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+            )
 
-                return s3_url
-            else:
-                logger.warning("S3 client not configured - video saved locally only")
-                return output_path
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
 
-        except Exception as e:
-            logger.error(f"Video generation failed: {e}", exc_info=True)
-            raise
+    with socketserver.UnixStreamServer(socket_path, JobHandler) as server:
+        logger.info(f"Video generator listening on {socket_path}")
+        try:
+            server.serve_forever()
         finally:
-            self.cleanup()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
 
 
 def main():
     parser = argparse.ArgumentParser(description='Generate marketing videos')
-    parser.add_argument('--script', required=True, help='Narration script')
+    parser.add_argument('--script', help='Narration script')
     parser.add_argument('--template', help='Template video URL')
     parser.add_argument('--client-logo', help='Client logo URL')
     parser.add_argument('--user-logo', help='User logo URL')
@@ -335,10 +750,45 @@ def main():
     parser.add_argument('--campaign-id', help='Campaign ID for status updates')
     parser.add_argument('--voice-id', default='gtts-en-us', help='Voice ID for accent (e.g., gtts-en-us, gtts-en-uk)')
     parser.add_argument('--custom-voice-url', help='Custom voice file URL')
+    parser.add_argument('--serve', action='store_true',
+                        help='Stay resident and read newline-delimited JSON jobs from stdin')
+    parser.add_argument('--socket', help='With --serve, listen on this Unix socket instead of stdin')
+    parser.add_argument('--jobs-file', help='Render every job in a JSON Lines file and exit')
+    parser.add_argument('--preview', action='store_true',
+                        help='Render only a fast low-resolution preview (PREVIEW_HEIGHT/PREVIEW_FPS, PREVIEW_ENCODING_PROFILE)')
+    parser.add_argument('--preview-first', action='store_true',
+                        help='Print a preview result line first, then render the full-quality video')
+    parser.add_argument('--profile', choices=sorted(PROFILES),
+                        help='Encoding profile for full-quality renders (default ENCODING_PROFILE); '
+                             'jobs can set their own with "encoding_profile"')
+    parser.add_argument('--max-output-mb', type=float,
+                        help='Size limit for full-quality videos, met in the same encode; '
+                             'jobs can set their own with "max_output_mb"')
 
     args = parser.parse_args()
 
+    if not args.serve and not args.jobs_file and not args.script:
+        parser.error('--script is required unless --serve or --jobs-file is given')
+    if args.max_output_mb is not None and args.max_output_mb <= 0:
+        parser.error('--max-output-mb must be positive')
+
     generator = VideoGeneratorLite()
+    if args.profile:
+        generator.encoding_profile = args.profile
+    generator.max_output_mb = args.max_output_mb
+
+    if args.jobs_file:
+        with open(args.jobs_file, 'r') as jobs:
+            serve_stream(generator, jobs, sys.stdout)
+        return 0
+
+    if args.serve:
+        if args.socket:
+            serve_socket(generator, args.socket)
+        else:
+            logger.info("Video generator ready, reading jobs from stdin")
+            serve_stream(generator, sys.stdin, sys.stdout)
+        return 0
 
     try:
         video_url = generator.generate_video(
@@ -348,7 +798,10 @@ def main():
             user_logo_url=args.user_logo,
             output_filename=args.output,
             voice_id=args.voice_id,
-            custom_voice_url=args.custom_voice_url
+            custom_voice_url=args.custom_voice_url,
+            preview=args.preview,
+            on_preview=(lambda url: print(json.dumps(preview_result(url)), flush=True))
+            if args.preview_first else None
         )
 
         print(json.dumps({
@@ -0,0 +1,203 @@
+"""
+Shared HTTP client for asset downloads.
+
+One keep-alive connection pool per process, so repeated fetches from the same
+CDN reuse TCP/TLS connections instead of handshaking per file. Requests are
+retried a bounded number of times with exponentially growing, fully jittered
+backoff on connection errors, timeouts and retryable statuses (429, 5xx). A body
+that breaks off mid-transfer is resumed with an HTTP Range request guarded by
+If-Range, so a dropped connection late in a large template does not start
+the download over.
+
+Every request feeds latency (time to response headers) and throughput metrics,
+exposed as `stats` and `summary()`.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, BinaryIO, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+CHUNK_SIZE = 65536
+
+
+class HttpClient:
+    """Pooled requests.Session with retries, Range resume and transfer metrics"""
+
+    def __init__(
+        self,
+        pool_size: int = 16,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        timeout: float = 30
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            'requests': 0,
+            'retries': 0,
+            'resumes': 0,
+            'failures': 0,
+            'bytes': 0,
+            'latency_seconds': 0.0,
+            'transfer_seconds': 0.0,
+        }
+
+    @classmethod
+    def from_env(cls) -> 'HttpClient':
+        """Build a client from HTTP_POOL_SIZE / HTTP_RETRIES / HTTP_BACKOFF / HTTP_TIMEOUT"""
+        return cls(
+            pool_size=int(os.getenv('HTTP_POOL_SIZE', '16')),
+            retries=int(os.getenv('HTTP_RETRIES', '3')),
+            backoff=float(os.getenv('HTTP_BACKOFF', '0.5')),
+            timeout=float(os.getenv('HTTP_TIMEOUT', '30'))
+        )
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.stats[name] += value
+
+    def _sleep_before_retry(self, attempt: int, response: Optional[requests.Response] = None) -> None:
+        """Full-jitter exponential backoff, or the server's Retry-After when it sends one"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            delay = min(self.max_backoff, float(retry_after))
+        self._count('retries')
+        time.sleep(delay)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> requests.Response:
+        """
+        GET with bounded retries. Returns the last response for non-retryable (or
+        exhausted) statuses; raises the last requests exception when every
+        attempt failed to connect.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    self._count('failures')
+                    raise
+                logger.warning(f"GET {url} failed ({e}), retrying")
+                self._sleep_before_retry(attempt)
+                continue
+
+            self._count('requests')
+            self._count('latency_seconds', time.perf_counter() - start)
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                logger.warning(f"GET {url} returned {response.status_code}, retrying")
+                response.close()
+                self._sleep_before_retry(attempt, response)
+                continue
+            return response
+
+    def stream_to(
+        self,
+        response: requests.Response,
+        f: BinaryIO,
+        url: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        Write the body of a successful streaming `response` to `f`, resuming with
+        Range requests if the transfer breaks off. Returns the number of bytes in `f`.
+
+        The file is rewound and rewritten if the server cannot resume (ignores the
+        Range, or the resource changed and If-Range fails).
+        """
+        written = 0
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        expected = response.headers.get('Content-Length')
+        expected = int(expected) if expected and expected.isdigit() else None
+        start = time.perf_counter()
+
+        for attempt in range(self.retries + 1):
+            try:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+                    self._count('bytes', len(chunk))
+                if expected is None or written >= expected:
+                    self._count('transfer_seconds', time.perf_counter() - start)
+                    return written
+                error: Exception = IOError(f"body ended at {written} of {expected} bytes")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                error = e
+            finally:
+                response.close()
+
+            if attempt == self.retries:
+                break
+            logger.warning(f"Download of {url} interrupted at {written} bytes ({error}), resuming")
+            self._sleep_before_retry(attempt)
+
+            resume_headers = dict(headers or {})
+            resume_headers['Range'] = f"bytes={written}-"
+            if validator:
+                resume_headers['If-Range'] = validator
+            response = self.get(url, headers=resume_headers, stream=True)
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                self._count('resumes')
+            else:
+                # Full body again: start the file over
+                f.seek(0)
+                f.truncate()
+                written = 0
+                length = response.headers.get('Content-Length')
+                expected = int(length) if length and length.isdigit() else None
+
+        self._count('failures')
+        self._count('transfer_seconds', time.perf_counter() - start)
+        raise requests.ConnectionError(f"Download of {url} failed after {self.retries} resumes: {error}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters plus mean latency (ms) and throughput (MB/s)"""
+        with self._lock:
+            stats = dict(self.stats)
+        requests_made = stats['requests'] or 1
+        transfer = stats['transfer_seconds']
+        return {
+            'requests': int(stats['requests']),
+            'retries': int(stats['retries']),
+            'resumes': int(stats['resumes']),
+            'failures': int(stats['failures']),
+            'mb': round(stats['bytes'] / 1e6, 2),
+            'latency_ms': round(1000 * stats['latency_seconds'] / requests_made, 1),
+            'mb_per_s': round(stats['bytes'] / 1e6 / transfer, 2) if transfer else None,
+        }
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> HttpClient:
+    """Process-wide client, so every cache and generator shares one connection pool"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient.from_env()
+        return _shared_client
@@ -0,0 +1,130 @@
+"""
+Media metadata for render planning.
+
+Laying out a video needs a template's duration and frame size, which MoviePy
+only reports after VideoFileClip has started an ffmpeg reader for it. probe()
+gets the same facts (plus frame rate, codec and keyframe times) from one
+ffprobe call without decoding, and MediaIndex (video_asset_cache) keeps the
+result per asset version so each template is probed once.
+
+Where ffprobe is not installed (e.g. MoviePy's bundled imageio-ffmpeg binary
+only ships ffmpeg), the header that `ffmpeg -i` prints is parsed instead and
+keyframes are listed by decoding keyframes only.
+"""
+
+import os
+import re
+import json
+import shutil
+import subprocess
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """What planning needs to know about a video file"""
+
+    duration: float
+    width: int
+    height: int
+    fps: float
+    codec: str
+    keyframes: Tuple[float, ...] = field(default=())   # presentation times, seconds
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MediaInfo':
+        return cls(**{**data, 'keyframes': tuple(data.get('keyframes', ()))})
+
+
+def _rate(value: str) -> float:
+    """'24000/1001' or '24' -> frames per second (0 when unknown)"""
+    num, _, den = (value or '0').partition('/')
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def find_ffprobe(ffmpeg_binary: str) -> Optional[str]:
+    """FFPROBE_BINARY, an ffprobe next to `ffmpeg_binary`, or one on PATH"""
+    configured = os.getenv('FFPROBE_BINARY')
+    if configured:
+        return configured
+    sibling = os.path.join(os.path.dirname(ffmpeg_binary), 'ffprobe')
+    if os.path.dirname(ffmpeg_binary) and os.access(sibling, os.X_OK):
+        return sibling
+    return shutil.which('ffprobe')
+
+
+def _run(cmd) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def _probe_ffprobe(path: str, ffprobe_binary: str) -> MediaInfo:
+    result = _run([
+        ffprobe_binary, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries',
+        'stream=codec_name,width,height,avg_frame_rate,r_frame_rate,duration:format=duration:packet=pts_time,flags',
+        '-of', 'json', path
+    ])
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr.strip()[-500:]}")
+
+    data = json.loads(result.stdout)
+    if not data.get('streams'):
+        raise ValueError(f"No video stream in {path}")
+    stream = data['streams'][0]
+    duration = stream.get('duration') or data.get('format', {}).get('duration')
+    keyframes = sorted(
+        float(packet['pts_time']) for packet in data.get('packets', [])
+        if 'K' in packet.get('flags', '') and packet.get('pts_time') not in (None, 'N/A')
+    )
+    return MediaInfo(
+        duration=float(duration or 0),
+        width=int(stream['width']),
+        height=int(stream['height']),
+        fps=_rate(stream.get('avg_frame_rate')) or _rate(stream.get('r_frame_rate')),
+        codec=stream.get('codec_name', ''),
+        keyframes=tuple(keyframes)
+    )
+
+
+def _probe_ffmpeg(path: str, ffmpeg_binary: str) -> MediaInfo:
+    # Decoding keyframes only is fast, and the input header is printed first
+    result = _run([
+        ffmpeg_binary, '-hide_banner', '-nostdin', '-skip_frame', 'nokey', '-i', path,
+        '-map', '0:v:0', '-vf', 'showinfo', '-f', 'null', '-'
+    ])
+    header = result.stderr
+    duration = re.search(r"Duration: (\d+):(\d+):([\d.]+)", header)
+    video = re.search(r"Stream #\S+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})", header)
+    if not video:
+        raise ValueError(f"No video stream in {path}: {header.strip()[-500:]}")
+    fps = re.search(r", ([\d.]+) fps", header) or re.search(r", ([\d.]+) tbr", header)
+    return MediaInfo(
+        duration=(
+            int(duration.group(1)) * 3600 + int(duration.group(2)) * 60 + float(duration.group(3))
+            if duration else 0.0
+        ),
+        width=int(video.group(2)),
+        height=int(video.group(3)),
+        fps=float(fps.group(1)) if fps else 0.0,
+        codec=video.group(1),
+        keyframes=tuple(sorted(float(t) for t in re.findall(r"pts_time:([\d.]+)", header)))
+    )
+
+
+def probe(path: str, ffmpeg_binary: str = 'ffmpeg') -> MediaInfo:
+    """Duration, size, fps, codec and keyframe times of the first video stream in `path`"""
+    ffprobe_binary = find_ffprobe(ffmpeg_binary)
+    if ffprobe_binary:
+        return _probe_ffprobe(path, ffprobe_binary)
+    return _probe_ffmpeg(path, ffmpeg_binary)
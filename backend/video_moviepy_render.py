@@ -0,0 +1,185 @@
+"""
+MoviePy render backend.
+
+Turns a Timeline into a clip with its audio mixed in. Frames are composited in
+Python (by video_compositor, or MoviePy's CompositeVideoClip with
+compositor='moviepy'), which makes this the slow path but also the reference
+output the ffmpeg backend is compared against.
+
+stream_clip() encodes a clip to a pipe instead of a file: frames go to ffmpeg's
+stdin and fragmented MP4 comes out of its stdout for a consumer to read.
+"""
+
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+from moviepy.editor import (
+    VideoFileClip,
+    AudioFileClip,
+    ImageClip,
+    ColorClip,
+    CompositeVideoClip,
+    CompositeAudioClip
+)
+from moviepy.video.fx.all import loop as loop_clip
+
+from video_compositor import composite_clip
+from video_encoding import DEFAULT_PROFILE, EncodingProfile
+from video_ffmpeg_render import STREAM_OUTPUT, STREAM_FORMAT_ARGS, StreamConsumer, run_streaming
+from video_timeline import Timeline, VisualLayer, AudioLayer
+
+
+def _rgb(color: str) -> tuple:
+    """'#rrggbb' -> (r, g, b)"""
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _source(sources: Dict[str, Any], path: str, opener, track: Optional[Callable] = None):
+    """Open each source file once per render (or reuse a clip the caller already opened)"""
+    if path not in sources:
+        clip = opener(path)
+        sources[path] = track(clip) if track else clip
+    return sources[path]
+
+
+def _visual_clip(
+    layer: VisualLayer,
+    timeline: Timeline,
+    sources: Dict[str, Any],
+    duration: float,
+    track: Optional[Callable] = None
+):
+    size = (timeline.width, timeline.height)
+
+    if layer.kind == 'color':
+        clip = ColorClip(
+            size=size if layer.full_frame else (layer.width or size[0], layer.height or size[1]),
+            color=_rgb(layer.source),
+            duration=duration
+        )
+    elif layer.kind == 'image':
+        clip = _source(sources, layer.source, ImageClip, track)
+    else:
+        if layer.full_frame and layer.fit == 'scale':
+            # Let ffmpeg scale while decoding instead of resizing every frame in Python
+            opener = lambda path: VideoFileClip(path, target_resolution=(size[1], size[0]))
+        else:
+            opener = VideoFileClip
+        clip = _source(sources, layer.source, opener, track).without_audio()
+        if layer.loop:
+            clip = loop_clip(clip, duration=layer.source_start + duration)
+        # Past the end of the source the last frame is held, as the ffmpeg backend does
+        end = min(layer.source_start + duration, clip.duration)
+        clip = clip.subclip(min(layer.source_start, end), end)
+
+    if layer.full_frame:
+        if layer.fit == 'crop' and clip.size != size:
+            clip = clip.crop(
+                x_center=clip.w / 2,
+                y_center=clip.h / 2,
+                width=min(clip.w, size[0]),
+                height=min(clip.h, size[1])
+            )
+        if tuple(clip.size) != size:
+            clip = clip.resize(newsize=size)
+    elif layer.width and layer.height:
+        clip = clip.resize(newsize=(layer.width, layer.height))
+    elif layer.width:
+        clip = clip.resize(width=layer.width)
+    elif layer.height:
+        clip = clip.resize(height=layer.height)
+
+    return clip.set_start(layer.start).set_duration(duration).set_position((layer.x, layer.y))
+
+
+def _audio_clip(layer: AudioLayer, sources: Dict[str, Any], track: Optional[Callable] = None):
+    source = _source(sources, layer.source, AudioFileClip, track)
+    end = min(layer.source_start + layer.duration, source.duration)
+    return source.subclip(min(layer.source_start, end), end).volumex(layer.gain).set_start(layer.start)
+
+
+def timeline_clip(
+    timeline: Timeline,
+    sources: Optional[Dict[str, Any]] = None,
+    track: Optional[Callable] = None,
+    compositor: str = 'indexed'
+):
+    """
+    Build the composite clip for `timeline`.
+
+    `sources` maps file paths to clips that are already open (e.g. assets shared
+    across a batch). Files opened here are added to it, so the caller can close
+    them once the clip has been written, and passed to `track` (e.g.
+    JobResources.track) as soon as they are opened.
+
+    compositor='indexed' composites each frame from only the layers on screen
+    (video_compositor); 'moviepy' uses CompositeVideoClip, for comparison.
+    """
+    sources = {} if sources is None else sources
+    clips = []
+
+    # Each background runs until the next one starts
+    backgrounds = timeline.backgrounds
+    for i, layer in enumerate(backgrounds):
+        next_start = backgrounds[i + 1].start if i + 1 < len(backgrounds) else timeline.duration
+        duration = min(layer.end, next_start, timeline.duration) - layer.start
+        if duration > 0:
+            clips.append(_visual_clip(layer, timeline, sources, duration, track))
+
+    for layer in timeline.overlays:
+        duration = min(layer.end, timeline.duration) - layer.start
+        if duration > 0:
+            clips.append(_visual_clip(layer, timeline, sources, duration, track))
+
+    size = (timeline.width, timeline.height)
+    if compositor == 'moviepy':
+        final = CompositeVideoClip(clips, size=size).set_duration(timeline.duration)
+    else:
+        final = composite_clip(clips, size, timeline.duration)
+
+    audio_clips = [_audio_clip(layer, sources, track) for layer in timeline.audio if layer.start < timeline.duration]
+    if audio_clips:
+        final = final.set_audio(CompositeAudioClip(audio_clips).set_duration(timeline.duration))
+    return final
+
+
+def stream_clip(
+    clip,
+    fps: int,
+    consume: StreamConsumer,
+    ffmpeg_binary: str = 'ffmpeg',
+    profile: EncodingProfile = DEFAULT_PROFILE,
+    threads: Optional[int] = None
+) -> Any:
+    """Encode `clip` with `profile` as fragmented MP4 and hand the encoder's stdout to `consume`"""
+    audio_path = None
+    try:
+        cmd = [
+            ffmpeg_binary, '-y', '-nostdin', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{clip.w}x{clip.h}", '-r', str(fps), '-i', 'pipe:0'
+        ]
+        if clip.audio is not None:
+            # Audio is small; writing it first keeps the pipe for video frames only
+            fd, audio_path = tempfile.mkstemp(suffix='.m4a')
+            os.close(fd)
+            clip.audio.set_duration(clip.duration).write_audiofile(
+                audio_path, fps=44100, codec='aac', bitrate=profile.audio_bitrate, verbose=False, logger=None
+            )
+            cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:a', 'copy', '-shortest']
+
+        cmd += list(profile.video_args())
+        threads = profile.encoder_threads(threads or 0)
+        if threads:
+            cmd += ['-threads', str(threads)]
+        cmd += list(STREAM_FORMAT_ARGS) + [STREAM_OUTPUT]
+
+        def feed(stdin):
+            for frame in clip.iter_frames(fps=fps, dtype='uint8'):
+                stdin.write(frame[:, :, :3].tobytes())
+
+        return run_streaming(cmd, consume, feed)
+    finally:
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
@@ -0,0 +1,117 @@
+"""
+Static overlay flattening.
+
+Corner logos sit in the same place with the same pixels for the whole body of
+a video, yet each is its own layer: resized and blended per frame by MoviePy,
+and one scale plus one overlay filter each in the ffmpeg graph.
+
+flatten_static_overlays() merges image overlays that show over exactly the
+same time span (and nothing time-overlapping between them in stacking order)
+into one pre-sized RGBA image cropped to the pixels that are drawn. Renderers
+then blend a single layer that needs no resizing. PNG stores straight alpha, so
+the premultiplied form is made once when the image is loaded (IndexedCompositor
+in video_compositor).
+"""
+
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from video_timeline import Timeline, VisualLayer, _t
+
+
+def _overlaps(a: VisualLayer, b: VisualLayer) -> bool:
+    return _t(a.start) < _t(b.end) and _t(b.start) < _t(a.end)
+
+
+def _span(layer: VisualLayer) -> Tuple[float, float]:
+    return _t(layer.start), _t(layer.duration)
+
+
+def _sized_image(layer: VisualLayer) -> Image.Image:
+    """The layer's image in RGBA at the size it is drawn (rounded down, as MoviePy's resize does)"""
+    with Image.open(layer.source) as img:
+        img = img.convert('RGBA')
+    width, height = layer.width, layer.height
+    if width and not height:
+        height = int(img.height * width / img.width)
+    elif height and not width:
+        width = int(img.width * height / img.height)
+    if width and height and (width, height) != img.size:
+        img = img.resize((width, height), Image.LANCZOS)
+    return img
+
+
+def _corner(position, outer: int, inner: int) -> int:
+    """Pixel offset of a named or numeric position along one axis"""
+    if isinstance(position, str):
+        return int({'left': 0, 'top': 0, 'center': outer / 2 - inner / 2,
+                    'right': outer - inner, 'bottom': outer - inner}[position])
+    return int(position)
+
+
+def _flatten(layers: List[VisualLayer], timeline: Timeline, save: Callable[[Image.Image], str]) -> Optional[VisualLayer]:
+    """One image layer drawing `layers` (bottom first), or None if nothing is visible"""
+    frame = Image.new('RGBA', (timeline.width, timeline.height), (0, 0, 0, 0))
+    for layer in layers:
+        img = _sized_image(layer)
+        x = _corner(layer.x, timeline.width, img.width)
+        y = _corner(layer.y, timeline.height, img.height)
+        frame.alpha_composite(img, (max(0, x), max(0, y)), (max(0, -x), max(0, -y)))
+
+    box = frame.getchannel('A').getbbox()
+    if box is None:
+        return None
+    first = layers[0]
+    return VisualLayer(
+        save(frame.crop(box)), first.start, first.duration, kind='image',
+        x=box[0], y=box[1], name='+'.join(layer.name for layer in layers)
+    )
+
+
+def flatten_static_overlays(timeline: Timeline, save: Callable[[Image.Image], str]) -> Timeline:
+    """
+    Merge image overlays that share the same start and duration into one layer.
+
+    `save(image)` writes the merged RGBA image and returns its path (e.g. a temp
+    PNG the caller cleans up). A group stays open while the layers between its
+    members in stacking order are not on screen at the same time, so the merged
+    layer can take the first member's place without changing what is drawn.
+    """
+    layers = list(timeline.layers)
+    open_groups: Dict[Tuple[float, float], List[int]] = {}
+    groups: List[List[int]] = []
+
+    for i, layer in enumerate(layers):
+        if layer.full_frame:
+            continue
+        static = layer.kind == 'image'
+        span = _span(layer)
+        if static and span in open_groups:
+            open_groups[span].append(i)
+            continue
+        # Anything else on screen at the same time closes the groups it overlaps
+        for key in [k for k, members in open_groups.items() if _overlaps(layers[members[0]], layer)]:
+            del open_groups[key]
+        if static:
+            open_groups[span] = [i]
+            groups.append(open_groups[span])
+
+    merged: Dict[int, Optional[VisualLayer]] = {}
+    for members in groups:
+        if len(members) < 2:
+            continue
+        merged[members[0]] = _flatten([layers[i] for i in members], timeline, save)
+        for i in members[1:]:
+            merged[i] = None
+    if not merged:
+        return timeline
+
+    result = []
+    for i, layer in enumerate(layers):
+        if i not in merged:
+            result.append(layer)
+        elif merged[i] is not None:
+            result.append(merged[i])
+    return replace(timeline, layers=tuple(result))
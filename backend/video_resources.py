@@ -0,0 +1,186 @@
+"""
+Per-job ownership of MoviePy clips and their ffmpeg readers.
+
+Every VideoFileClip/AudioFileClip keeps an ffmpeg subprocess and frame or
+sample buffers alive until it is closed. In a long-lived worker, a clip that
+is missed on one error path leaks those for good. A JobResources owns every
+clip opened for one job and closes all of them, in reverse order, when the
+job ends, whether it succeeds or fails.
+
+It also enforces a memory budget: the job's RSS growth, counting this process
+and the ffmpeg readers it owns, is sampled in the background and checked at
+stage boundaries. A job that goes over the budget has its readers closed, which
+stops the render, and fails with ResourceLimitExceeded instead of taking the
+worker down with the OOM killer.
+"""
+
+import os
+import gc
+import logging
+import resource
+import threading
+from typing import Any, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+Clip = TypeVar('Clip')
+
+
+class ResourceLimitExceeded(MemoryError):
+    """A job grew past its JOB_RSS_LIMIT_MB budget"""
+
+
+def _proc_rss(pid: str = 'self') -> int:
+    """Resident set size in bytes from /proc, or 0 where it is unavailable"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def process_rss() -> int:
+    """Current RSS of this process (peak RSS on platforms without /proc)"""
+    rss = _proc_rss()
+    if rss:
+        return rss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if peak > 1 << 32 else peak * 1024
+
+
+def _reader_procs(clip: Any) -> List[Any]:
+    """The ffmpeg subprocesses behind a clip (video reader and its audio reader)"""
+    procs = []
+    for owner in (clip, getattr(clip, 'audio', None)):
+        proc = getattr(getattr(owner, 'reader', None), 'proc', None)
+        if proc is not None:
+            procs.append(proc)
+    return procs
+
+
+class JobResources:
+    """Clips opened for one job, closed together, under an optional RSS budget"""
+
+    def __init__(self, rss_limit_mb: int = 0, sample_seconds: float = 0.5, label: str = ''):
+        self.rss_limit = rss_limit_mb * MB
+        self.sample_seconds = sample_seconds
+        self.label = label
+        self.clips: List[Any] = []
+        self.baseline = process_rss()
+        self.peak = 0
+        self.exceeded: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, label: str = '') -> 'JobResources':
+        """Build from JOB_RSS_LIMIT_MB (0 = no limit) / JOB_RSS_SAMPLE_SECONDS"""
+        return cls(
+            rss_limit_mb=int(os.getenv('JOB_RSS_LIMIT_MB', '0')),
+            sample_seconds=float(os.getenv('JOB_RSS_SAMPLE_SECONDS', '0.5')),
+            label=label
+        )
+
+    def __enter__(self) -> 'JobResources':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if exc_type is not None:
+            self.raise_if_exceeded(exc_val)
+
+    def start(self) -> 'JobResources':
+        """Start sampling RSS in the background when a limit is set"""
+        if self.rss_limit and self._monitor is None:
+            self._monitor = threading.Thread(target=self._watch, name='job-rss', daemon=True)
+            self._monitor.start()
+        return self
+
+    def raise_if_exceeded(self, error: BaseException) -> None:
+        """A render that died because its readers were stopped reports the real cause"""
+        if self.exceeded and not isinstance(error, ResourceLimitExceeded):
+            raise ResourceLimitExceeded(self.exceeded) from error
+
+    def track(self, clip: Clip) -> Clip:
+        """Take ownership of a clip; returns it so calls can be wrapped inline"""
+        if clip is not None:
+            with self._lock:
+                self.clips.append(clip)
+        return clip
+
+    def release(self, clip: Any) -> None:
+        """Close one clip now instead of at the end of the job"""
+        with self._lock:
+            self.clips = [c for c in self.clips if c is not clip]
+        self._close(clip)
+
+    @staticmethod
+    def _close(clip: Any) -> None:
+        try:
+            clip.close()
+        except Exception as e:
+            logger.warning(f"Failed to close {type(clip).__name__}: {e}")
+        # Readers that close() missed (e.g. a half-initialized clip) still get stopped
+        for proc in _reader_procs(clip):
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    def rss(self) -> int:
+        """This job's memory: growth of this process since the job started plus its ffmpeg readers"""
+        with self._lock:
+            clips = list(self.clips)
+        readers = sum(_proc_rss(str(proc.pid)) for clip in clips for proc in _reader_procs(clip))
+        return max(0, process_rss() - self.baseline) + readers
+
+    def check(self, stage: str = '') -> None:
+        """Raise ResourceLimitExceeded if the job is over its budget"""
+        used = self.rss()
+        self.peak = max(self.peak, used)
+        if self.rss_limit and used > self.rss_limit and not self.exceeded:
+            self.exceeded = (
+                f"{self.label or 'job'} used {used / MB:.0f} MB"
+                f"{f' at {stage}' if stage else ''}, over the {self.rss_limit / MB:.0f} MB limit"
+            )
+        if self.exceeded:
+            raise ResourceLimitExceeded(self.exceeded)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.sample_seconds):
+            try:
+                self.check('render')
+            except ResourceLimitExceeded:
+                logger.error(self.exceeded)
+                # Stop the readers so the render fails now rather than at the OOM killer
+                with self._lock:
+                    clips = list(self.clips)
+                for clip in clips:
+                    for proc in _reader_procs(clip):
+                        if proc.poll() is None:
+                            proc.kill()
+                return
+
+    def close(self) -> None:
+        """Close every tracked clip, newest first; safe to call more than once"""
+        self._stop.set()
+        if self._monitor is not None and self._monitor is not threading.current_thread():
+            self._monitor.join()
+        self.peak = max(self.peak, self.rss())
+
+        with self._lock:
+            clips, self.clips = self.clips, []
+        for clip in reversed(clips):
+            self._close(clip)
+        if clips:
+            # Frame buffers sit in reference cycles between clips and readers
+            gc.collect()
+
+    def summary(self) -> str:
+        return f"peak +{self.peak / MB:.0f} MB" + (f" (limit {self.rss_limit / MB:.0f} MB)" if self.rss_limit else '')
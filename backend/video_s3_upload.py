@@ -0,0 +1,212 @@
+"""
+S3 uploads for rendered videos.
+
+A PUT to an existing key replaces it, so uploads go straight out without a
+head_object/delete_object round-trip first. Files above the multipart threshold
+are sent as concurrent multipart uploads (TransferConfig), every request carries
+a checksum that S3 verifies on receipt (ChecksumAlgorithm), and the SHA-256 of
+the whole file is stored as x-amz-meta-sha256 for end-to-end checks.
+
+`upload_stream()` sends a non-seekable stream, such as an encoder's stdout, in
+fixed-size multipart parts as it is produced, without landing the file on disk
+and with a fixed ceiling on buffered memory.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from boto3.s3.transfer import TransferConfig
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# S3 rejects multipart parts smaller than this, except the last one
+MIN_PART_SIZE = 5 * MB
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(MB), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_full(stream: BinaryIO, size: int) -> bytes:
+    """Read exactly `size` bytes, or fewer only at end of stream"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+class HashingReader:
+    """Read-only wrapper that hashes and counts whatever passes through it"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.digest = hashlib.sha256()
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.digest.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+class S3Uploader:
+    """Overwriting, multipart, checksummed uploads to one bucket"""
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        transfer_config: Optional[TransferConfig] = None,
+        checksum_algorithm: Optional[str] = 'SHA256'
+    ):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.transfer_config = transfer_config or TransferConfig()
+        self.checksum_algorithm = checksum_algorithm
+
+    @classmethod
+    def from_env(cls, s3_client: Any, bucket: str) -> 'S3Uploader':
+        """
+        Build an uploader from S3_MULTIPART_THRESHOLD_MB / S3_MULTIPART_CHUNK_MB /
+        S3_UPLOAD_CONCURRENCY / S3_UPLOAD_CHECKSUM (empty disables checksums)
+        """
+        chunk_size = int(os.getenv('S3_MULTIPART_CHUNK_MB', '8')) * MB
+        return cls(
+            s3_client,
+            bucket,
+            TransferConfig(
+                multipart_threshold=int(os.getenv('S3_MULTIPART_THRESHOLD_MB', '8')) * MB,
+                multipart_chunksize=chunk_size,
+                max_concurrency=int(os.getenv('S3_UPLOAD_CONCURRENCY', '8')),
+                use_threads=True
+            ),
+            checksum_algorithm=os.getenv('S3_UPLOAD_CHECKSUM', 'SHA256').upper() or None
+        )
+
+    def _extra_args(self, content_type: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        extra: Dict[str, Any] = {'ContentType': content_type}
+        if self.checksum_algorithm:
+            extra['ChecksumAlgorithm'] = self.checksum_algorithm
+        if metadata:
+            extra['Metadata'] = metadata
+        return extra
+
+    def upload_file(self, path: str, key: str, content_type: str = 'video/mp4') -> Dict[str, Any]:
+        """Upload (or overwrite) `key` from a local file; returns its size and SHA-256"""
+        sha256 = file_sha256(path)
+        self.s3_client.upload_file(
+            Filename=path,
+            Bucket=self.bucket,
+            Key=key,
+            ExtraArgs=self._extra_args(content_type, {'sha256': sha256}),
+            Config=self.transfer_config
+        )
+        size = os.path.getsize(path)
+        logger.info(f"Uploaded s3://{self.bucket}/{key} ({size / MB:.1f} MB, sha256 {sha256[:12]})")
+        return {'key': key, 'bytes': size, 'sha256': sha256}
+
+    def _upload_part(self, key: str, upload_id: str, number: int, body: bytes) -> Dict[str, Any]:
+        args: Dict[str, Any] = {}
+        if self.checksum_algorithm:
+            args['ChecksumAlgorithm'] = self.checksum_algorithm
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body, **args
+        )
+        part = {'PartNumber': number, 'ETag': response['ETag']}
+        checksum_field = f"Checksum{self.checksum_algorithm}" if self.checksum_algorithm else None
+        if checksum_field and response.get(checksum_field):
+            part[checksum_field] = response[checksum_field]
+        return part
+
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        key: str,
+        content_type: str = 'video/mp4',
+        before_complete: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload (or overwrite) `key` from a readable stream of unknown length, such
+        as an encoder's stdout, in fixed-size parts sent as the stream produces them.
+
+        At most max_concurrency parts are in flight, so memory stays under
+        (max_concurrency + 1) x multipart_chunksize whatever the video length.
+        `before_complete()` runs before the upload is committed; if it raises
+        (e.g. the encoder failed) the multipart upload is aborted and the
+        previous object, if any, is left in place.
+        """
+        part_size = max(self.transfer_config.multipart_chunksize, MIN_PART_SIZE)
+        max_in_flight = max(1, self.transfer_config.max_concurrency)
+        reader = HashingReader(stream)
+
+        body = read_full(reader, part_size)
+        if len(body) < part_size:
+            # Fits in a single request
+            if before_complete:
+                before_complete()
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=body,
+                **self._extra_args(content_type, {'sha256': reader.hexdigest()})
+            )
+            return self._streamed(key, reader, parts=1)
+
+        extra = self._extra_args(content_type)
+        upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)['UploadId']
+        try:
+            slots = threading.BoundedSemaphore(max_in_flight)
+            futures: List[Future] = []
+            with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='s3-part') as pool:
+                number = 1
+                while body:
+                    slots.acquire()
+                    failed = [f for f in futures if f.done() and f.exception()]
+                    if failed:
+                        slots.release()
+                        raise failed[0].exception()
+                    future = pool.submit(self._upload_part, key, upload_id, number, body)
+                    future.add_done_callback(lambda _: slots.release())
+                    futures.append(future)
+                    number += 1
+                    body = read_full(reader, part_size)
+                parts = [f.result() for f in futures]
+
+            if before_complete:
+                before_complete()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return self._streamed(key, reader, parts=len(parts))
+
+    def _streamed(self, key: str, reader: HashingReader, parts: int) -> Dict[str, Any]:
+        logger.info(
+            f"Streamed s3://{self.bucket}/{key} ({reader.bytes_read / MB:.1f} MB in {parts} parts, "
+            f"sha256 {reader.hexdigest()[:12]})"
+        )
+        return {'key': key, 'bytes': reader.bytes_read, 'sha256': reader.hexdigest(), 'parts': parts}
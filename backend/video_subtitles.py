@@ -0,0 +1,256 @@
+"""
+Subtitle timing from a known narration script.
+
+The voiceover is synthesized from text we already have, so instead of running
+speech recognition we only need to place those words in time. When the TTS
+provider returns word timestamps they are used directly; otherwise an
+energy-based aligner finds the speech regions in the audio and spreads the
+words across them in proportion to their length.
+
+Segments use the same {"start", "end", "text"} shape as Whisper's output.
+"""
+
+import io
+import re
+import wave
+import subprocess
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+# Silences shorter than this are treated as gaps inside speech, not pauses
+MIN_PAUSE_SECONDS = 0.15
+
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+CLAUSE_END = re.compile(r'[,;:]["\')\]]*$')
+
+
+def split_words(text: str) -> List[str]:
+    """Split narration text into whitespace-separated words, keeping punctuation attached"""
+    return text.split()
+
+
+def load_audio_mono(path: str, sample_rate: int = SAMPLE_RATE, ffmpeg_binary: str = "ffmpeg") -> np.ndarray:
+    """Decode an audio file to mono float32 samples in [-1, 1] using ffmpeg"""
+    cmd = [
+        ffmpeg_binary, "-nostdin", "-loglevel", "error",
+        "-i", path,
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate),
+        "-"
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio {path}: {result.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def detect_speech_regions(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, float]]:
+    """Return (start, end) times of speech, based on short-time RMS energy"""
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return []
+
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    peak = float(rms.max())
+    if peak <= 0:
+        return []
+
+    noise_floor = float(np.percentile(rms, 10))
+    threshold = max(noise_floor * 3, peak * 0.05)
+    voiced = rms > threshold
+
+    regions = []
+    start = None
+    for i, is_voiced in enumerate(voiced):
+        if is_voiced and start is None:
+            start = i
+        elif not is_voiced and start is not None:
+            regions.append([start, i])
+            start = None
+    if start is not None:
+        regions.append([start, n_frames])
+
+    # Merge regions separated by gaps too short to be pauses
+    min_gap = int(MIN_PAUSE_SECONDS / FRAME_SECONDS)
+    merged = []
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < min_gap:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+
+    return [(s * FRAME_SECONDS, e * FRAME_SECONDS) for s, e in merged]
+
+
+def align_words(words: List[str], regions: List[Tuple[float, float]], duration: float) -> List[Dict[str, Any]]:
+    """
+    Place words on the speech regions, each taking time proportional to its length.
+
+    Time is measured along the concatenated speech regions, so silences fall
+    between words rather than inside them. With no detected speech the words are
+    spread evenly over the whole duration.
+    """
+    if not words:
+        return []
+    if not regions:
+        regions = [(0.0, duration)]
+
+    starts = np.array([r[0] for r in regions])
+    lengths = np.array([r[1] - r[0] for r in regions])
+    cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+    speech_total = cumulative[-1]
+
+    weights = np.array([len(re.sub(r'\W', '', w)) + 1 for w in words], dtype=np.float64)
+    bounds = np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum() * speech_total
+
+    def region_of(offset: float, is_end: bool) -> int:
+        # Word ends that land exactly on a region boundary belong to the earlier region
+        side = 'left' if is_end else 'right'
+        return int(np.clip(np.searchsorted(cumulative, offset, side=side) - 1, 0, len(regions) - 1))
+
+    timings = []
+    for i, word in enumerate(words):
+        start_offset, end_offset = bounds[i], bounds[i + 1]
+        start_region = region_of(start_offset, False)
+        end_region = region_of(end_offset, True)
+
+        # A word straddling a pause is moved entirely to the side holding most of it
+        if end_region != start_region:
+            split = cumulative[start_region + 1]
+            if end_offset - split > split - start_offset:
+                start_offset, start_region = split, start_region + 1
+            else:
+                end_offset, end_region = split, start_region
+
+        timings.append({
+            "word": word,
+            "start": float(starts[start_region] + (start_offset - cumulative[start_region])),
+            "end": float(starts[end_region] + (end_offset - cumulative[end_region])),
+        })
+    return timings
+
+
+def group_words(word_timings: List[Dict[str, Any]], max_words: int = 12, clause_words: int = 6) -> List[Dict[str, Any]]:
+    """Group timed words into caption segments at sentence ends, long clauses or max_words"""
+    segments = []
+    current: List[Dict[str, Any]] = []
+
+    for timing in word_timings:
+        current.append(timing)
+        word = timing["word"]
+        if (
+            SENTENCE_END.search(word)
+            or (CLAUSE_END.search(word) and len(current) >= clause_words)
+            or len(current) >= max_words
+        ):
+            segments.append(current)
+            current = []
+    if current:
+        segments.append(current)
+
+    return [
+        {
+            "start": seg[0]["start"],
+            "end": seg[-1]["end"],
+            "text": " ".join(t["word"] for t in seg),
+        }
+        for seg in segments
+    ]
+
+
+def words_from_character_alignment(
+    characters: List[str],
+    start_times: List[float],
+    end_times: List[float]
+) -> List[Dict[str, Any]]:
+    """Collapse per-character TTS timestamps (e.g. ElevenLabs alignment) into word timings"""
+    words = []
+    current = ""
+    word_start = word_end = 0.0
+
+    for char, start, end in zip(characters, start_times, end_times):
+        if char.isspace():
+            if current:
+                words.append({"word": current, "start": word_start, "end": word_end})
+                current = ""
+            continue
+        if not current:
+            word_start = float(start)
+        current += char
+        word_end = float(end)
+
+    if current:
+        words.append({"word": current, "start": word_start, "end": word_end})
+    return words
+
+
+def synthesize_stub_speech(
+    text: str,
+    chars_per_second: float = 15.0,
+    sample_rate: int = 22050
+) -> Tuple[bytes, Dict[str, List[Any]]]:
+    """
+    Offline stand-in for a timestamped TTS call.
+
+    Returns WAV bytes (a tone for every non-space character, silence for spaces
+    and a short pause after sentence punctuation) together with an
+    ElevenLabs-style character alignment describing exactly that audio.
+    """
+    char_seconds = 1.0 / chars_per_second
+    alignment: Dict[str, List[Any]] = {
+        "characters": [],
+        "character_start_times_seconds": [],
+        "character_end_times_seconds": [],
+    }
+    chunks = []
+    t = 0.0
+
+    for char in text:
+        n = int(round(char_seconds * sample_rate))
+        if char.isspace():
+            chunks.append(np.zeros(n, dtype=np.float32))
+        else:
+            phase = 2 * np.pi * 220.0 * np.arange(n) / sample_rate
+            chunks.append((0.3 * np.sin(phase)).astype(np.float32))
+
+        alignment["characters"].append(char)
+        alignment["character_start_times_seconds"].append(t)
+        t += n / sample_rate
+        alignment["character_end_times_seconds"].append(t)
+
+        if char in ".!?":
+            pause = int(0.3 * sample_rate)
+            chunks.append(np.zeros(pause, dtype=np.float32))
+            t += pause / sample_rate
+
+    samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue(), alignment
+
+
+def align_segments(
+    text: str,
+    audio_path: str,
+    word_timings: Optional[List[Dict[str, Any]]] = None,
+    ffmpeg_binary: str = "ffmpeg"
+) -> List[Dict[str, Any]]:
+    """
+    Build Whisper-style subtitle segments for `text` spoken in `audio_path`.
+
+    `word_timings` ({"word", "start", "end"} dicts from the TTS provider) are used
+    as-is when given; otherwise the words are aligned to the audio's energy.
+    """
+    if not word_timings:
+        samples = load_audio_mono(audio_path, SAMPLE_RATE, ffmpeg_binary)
+        duration = len(samples) / SAMPLE_RATE
+        word_timings = align_words(split_words(text), detect_speech_regions(samples), duration)
+    return group_words(word_timings)
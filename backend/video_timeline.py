@@ -0,0 +1,267 @@
+"""
+Render timeline: what appears when, independent of how it is rendered.
+
+A Timeline is a list of visual layers (background video segments, logos,
+caption images) and audio layers (BGM, voiceover) with absolute start times
+and durations on the output. Generators build one, and a render backend
+(video_moviepy_render or video_ffmpeg_render) turns it into a file.
+
+Timelines are immutable values: equal timelines hash equal, they round-trip
+through JSON, `window()` cuts out a sub-timeline (e.g. the shared intro) whose
+`fingerprint()` can key a cache, `diff()` reports the time ranges where
+two timelines render differently and `scaled()` gives a low-resolution copy
+for previews.
+"""
+
+import json
+import hashlib
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+Position = Union[int, str]
+
+# Times are compared and serialized at millisecond precision
+TIME_PRECISION = 3
+
+
+def _t(value: float) -> float:
+    return round(float(value), TIME_PRECISION)
+
+
+@dataclass(frozen=True)
+class VisualLayer:
+    """A video, still image or solid colour placed on the timeline"""
+
+    source: str                         # file path, or '#rrggbb' when kind == 'color'
+    start: float
+    duration: float
+    kind: str = 'video'                 # 'video' | 'image' | 'color'
+    source_start: float = 0.0           # offset into the source video
+    full_frame: bool = False            # background: fills the frame, one at a time
+    fit: str = 'scale'                  # full-frame only: 'scale' (stretch) or 'crop' (centre crop)
+    width: Optional[int] = None         # overlay size; None on one side keeps the aspect ratio
+    height: Optional[int] = None
+    x: Position = 'center'              # int pixels, or 'left' / 'center' / 'right'
+    y: Position = 'center'              # int pixels, or 'top' / 'center' / 'bottom'
+    loop: bool = False                  # repeat a short source video to fill the duration
+    name: str = ''                      # role in the layout ('body', 'subtitle', ...); not rendered
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def source_time(self, t: float) -> float:
+        """Position in the source that is showing at output time t"""
+        return self.source_start + (t - self.start) if self.kind == 'video' else 0.0
+
+
+@dataclass(frozen=True)
+class AudioLayer:
+    """An audio source mixed into the output at a fixed gain"""
+
+    source: str
+    start: float
+    duration: float
+    gain: float = 1.0
+    source_start: float = 0.0
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def source_time(self, t: float) -> float:
+        return self.source_start + (t - self.start)
+
+
+Layer = Union[VisualLayer, AudioLayer]
+
+
+def _clip_layer(layer: Layer, start: float, end: float) -> Optional[Layer]:
+    """The part of `layer` inside [start, end), re-based so `start` becomes 0"""
+    layer_start = max(layer.start, start)
+    layer_end = min(layer.end, end)
+    if layer_end - layer_start <= 10 ** -TIME_PRECISION:
+        return None
+
+    changes: Dict[str, Any] = {'start': layer_start - start, 'duration': layer_end - layer_start}
+    if isinstance(layer, AudioLayer) or layer.kind == 'video':
+        changes['source_start'] = layer.source_time(layer_start)
+    return replace(layer, **changes)
+
+
+def _layer_state(layer: Layer, t: float) -> Tuple:
+    """What a layer contributes at output time t, independent of where it sits on the timeline"""
+    fields = asdict(layer)
+    for name in ('start', 'duration', 'source_start', 'name'):
+        fields.pop(name, None)
+    return (type(layer).__name__, _t(layer.source_time(t))) + tuple(sorted(fields.items()))
+
+
+@dataclass(frozen=True)
+class Timeline:
+    """Complete description of one output video"""
+
+    width: int
+    height: int
+    fps: int
+    duration: float
+    layers: Tuple[VisualLayer, ...] = ()
+    audio: Tuple[AudioLayer, ...] = ()
+
+    @property
+    def backgrounds(self) -> Tuple[VisualLayer, ...]:
+        return tuple(sorted((l for l in self.layers if l.full_frame), key=lambda l: l.start))
+
+    @property
+    def overlays(self) -> Tuple[VisualLayer, ...]:
+        # Layer order is stacking order, as in CompositeVideoClip
+        return tuple(l for l in self.layers if not l.full_frame)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'width': self.width,
+            'height': self.height,
+            'fps': self.fps,
+            'duration': _t(self.duration),
+            'layers': [self._layer_dict(l) for l in self.layers],
+            'audio': [self._layer_dict(l) for l in self.audio],
+        }
+
+    @staticmethod
+    def _layer_dict(layer: Layer) -> Dict[str, Any]:
+        fields = asdict(layer)
+        for name in ('start', 'duration', 'source_start'):
+            fields[name] = _t(fields[name])
+        return fields
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Timeline':
+        return cls(
+            width=data['width'],
+            height=data['height'],
+            fps=data['fps'],
+            duration=data['duration'],
+            layers=tuple(VisualLayer(**l) for l in data.get('layers', [])),
+            audio=tuple(AudioLayer(**l) for l in data.get('audio', [])),
+        )
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True, **kwargs)
+
+    @classmethod
+    def from_json(cls, payload: str) -> 'Timeline':
+        return cls.from_dict(json.loads(payload))
+
+    def fingerprint(self, source_key: Optional[Callable[[str], str]] = None) -> str:
+        """
+        Stable hash of everything that affects the rendered output.
+
+        `source_key` maps a source path to an identity for its contents (for
+        example a content hash), so a temp file name does not change the key.
+        """
+        data = self.to_dict()
+        if source_key:
+            for layer in data['layers'] + data['audio']:
+                if layer.get('kind') != 'color':
+                    layer['source'] = source_key(layer['source'])
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def window(self, start: float, end: float) -> 'Timeline':
+        """The sub-timeline covering [start, end), re-based to start at 0"""
+        end = min(end, self.duration)
+        return replace(
+            self,
+            duration=max(0.0, end - start),
+            layers=tuple(l for l in (_clip_layer(l, start, end) for l in self.layers) if l),
+            audio=tuple(l for l in (_clip_layer(l, start, end) for l in self.audio) if l),
+        )
+
+    def scaled(
+        self,
+        height: int,
+        fps: Optional[int] = None,
+        image_size: Optional[Callable[[str], Tuple[int, int]]] = None
+    ) -> 'Timeline':
+        """
+        The same layout at a lower resolution (never upscaled), e.g. for previews.
+
+        Overlay sizes and pixel positions are scaled with the frame. Image layers
+        without an explicit size need `image_size(path) -> (w, h)` to be scaled.
+        """
+        scale = min(1.0, height / self.height)
+        fps = fps or self.fps
+        if scale == 1.0:
+            return replace(self, fps=fps)
+
+        def px(value):
+            return max(1, int(round(value * scale))) if isinstance(value, (int, float)) else value
+
+        layers = []
+        for layer in self.layers:
+            if layer.full_frame:
+                layers.append(layer)
+                continue
+
+            width = layer.width
+            if width is None and layer.height is None and layer.kind == 'image' and image_size:
+                width = image_size(layer.source)[0]
+            layers.append(replace(
+                layer,
+                width=px(width) if width else None,
+                height=px(layer.height) if layer.height else None,
+                x=px(layer.x),
+                y=px(layer.y)
+            ))
+
+        # Even dimensions, as yuv420p requires
+        return replace(
+            self,
+            width=int(round(self.width * scale / 2)) * 2,
+            height=int(round(self.height * scale / 2)) * 2,
+            fps=fps,
+            layers=tuple(layers)
+        )
+
+    def without_audio(self) -> 'Timeline':
+        return replace(self, audio=())
+
+    def boundaries(self) -> List[float]:
+        """Sorted times at which any layer starts or ends"""
+        duration = _t(self.duration)
+        times = {0.0, duration}
+        for layer in self.layers + self.audio:
+            times.update((_t(layer.start), _t(layer.end)))
+        return sorted(t for t in times if 0.0 <= t <= duration)
+
+    def _state(self, t: float) -> Tuple:
+        def active(layers):
+            return tuple(_layer_state(l, t) for l in layers if l.start <= t < l.end)
+        return active(self.backgrounds), active(self.overlays), active(self.audio)
+
+    def diff(self, other: 'Timeline') -> List[Tuple[float, float]]:
+        """
+        Time ranges where this timeline and `other` render differently.
+
+        Nothing starts or stops between consecutive layer boundaries, so each
+        interval is compared once, by the state of the layers active in it. A
+        layer showing the same source position counts as unchanged even if it
+        was split or re-ordered among backgrounds. Adjacent dirty intervals
+        are merged.
+        """
+        if (self.width, self.height, self.fps) != (other.width, other.height, other.fps):
+            return [(0.0, max(self.duration, other.duration))]
+
+        duration = max(_t(self.duration), _t(other.duration))
+        times = sorted(set(self.boundaries()) | set(other.boundaries()) | {duration})
+
+        dirty: List[Tuple[float, float]] = []
+        for a, b in zip(times, times[1:]):
+            in_self = a < _t(self.duration)
+            in_other = a < _t(other.duration)
+            if in_self == in_other and (not in_self or self._state(a) == other._state(a)):
+                continue
+            if dirty and dirty[-1][1] == a:
+                dirty[-1] = (dirty[-1][0], b)
+            else:
+                dirty.append((a, b))
+        return dirty